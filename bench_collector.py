@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Collector throughput and latency benchmark.
+
+Examples:
+    python3 bench_collector.py                                  # 1k ... 10M stored rows
+    python3 bench_collector.py --sizes 1k,100k --latency 0.05 --rate-limit-every 20
+    python3 bench_collector.py --sizes 1M --storage sqlite --compare bench_results/collector-abc1234.json
+
+For every dataset size, a dataset of that many synthetic tweets is written
+first. Then collection cycles like script.py's main_loop are run against
+FakeTwitterClient, a local stand-in for tweepy.Client with configurable
+latency and 429 injection. Each cycle is collect_keywords followed by
+saving the caches. The benchmark reports tweets/s, latency percentiles per
+stage and peak RSS:
+
+    fetch   one search_recent_tweets request (including simulated latency)
+    score   scoring one page of tweets
+    dedup   filtering one batch against the dedup index
+    write   appending one batch to the storage
+    update  updating the dataset state (dedup index, rollups, word counts)
+    save    saving the sentiment cache, rollups and word counts at the end of a cycle
+
+Each size is prepared in one process and measured in a fresh one, so peak
+RSS covers only the collector's startup and cycles. Results are saved as
+JSON (by default ``bench_results/collector-<commit>.json``); ``--compare``
+prints the change against an earlier results file.
+"""
+
+import argparse
+import functools
+import importlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from benchmark import (environment, format_size, latency_stats, load_results, make_dataset, parse_size,
+                       peak_rss_mb, run_isolated, save_results)
+from storage import open_storage
+
+DEFAULT_SIZES = "1k,10k,100k,1M,10M"
+STAGES = ['fetch', 'score', 'dedup', 'write', 'update', 'save']
+
+
+class StageTimer:
+    """Collects the duration of every call to the functions it wraps, per stage"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def wrap(self, stage, function):
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.samples[stage].append(elapsed)
+        return timed
+
+
+def prepare_dataset(rows, options, workdir):
+    """Write the dataset and build its sidecars (runs in a worker process); returns its path"""
+    logging.disable(logging.INFO)
+    from dataset_state import DatasetState
+
+    path = make_dataset(workdir, rows, options['storage'], keywords=options['keywords'])
+    # The first start builds the sidecars (dedup index, rollups, word counts)
+    DatasetState(open_storage(path, options['storage'])).save()
+    return path
+
+
+def run_size(path, rows, options, workdir):
+    """Benchmark collection cycles into the prepared dataset at ``path`` (runs in a worker process)"""
+    logging.disable(logging.INFO)
+    os.chdir(workdir)
+    # Imported here so script.py's module-level state starts fresh in this process
+    script = importlib.import_module('script')
+    from dataset_state import DatasetState
+    from fake_twitter import FakeTwitterClient
+    from live_feed import LiveFeedPublisher
+    from rate_limit import FairTokenBucket
+    from sentiment_cache import SentimentCache
+    from sentiment_engine import SentimentEngine
+    from watermarks import QueryWatermarks
+
+    storage = open_storage(path, options['storage'])
+    start = time.perf_counter()
+    state = DatasetState(storage)
+    startup_seconds = time.perf_counter() - start
+
+    timer = StageTimer()
+    fake = FakeTwitterClient(total_tweets=0, latency=options['latency'],
+                             rate_limit_every=options['rate_limit_every'], seed=rows)
+    fake.search_recent_tweets = timer.wrap('fetch', fake.search_recent_tweets)
+    cache = SentimentCache(max_size=script.SENTIMENT_CACHE_SIZE, backend=options['sentiment'])
+    script.sentiment_engine = SentimentEngine(backend=options['sentiment'], cache=cache)
+    script.score_tweets = timer.wrap('score', script.score_tweets)
+    script.live_feed = LiveFeedPublisher(port=None)
+    state.dedup_index.filter_new = timer.wrap('dedup', state.dedup_index.filter_new)
+    storage.append = timer.wrap('write', storage.append)
+    state.update = timer.wrap('update', state.update)
+    save = timer.wrap('save', lambda: (cache.save(), state.save()))
+    # No rate limit hook: the fake's quota headers would throttle the benchmark
+    bucket = FairTokenBucket.per_window(10**9, 1)
+    watermarks = QueryWatermarks.for_dataset(path)
+
+    fetched = added = 0
+    cycle_seconds = []
+    for _ in range(options['cycles']):
+        fake.publish(options['tweets_per_cycle'])
+        cycle_start = time.perf_counter()
+        results = script.collect_keywords(options['keywords'], storage, state,
+                                          max_results=options['tweets_per_cycle'], api_client=fake,
+                                          bucket=bucket, watermarks=watermarks)
+        save()
+        cycle_seconds.append(time.perf_counter() - cycle_start)
+        fetched += sum(keyword_fetched for keyword_fetched, _ in results.values())
+        added += sum(len(added_df) for _, added_df in results.values())
+    collect_seconds = sum(cycle_seconds)
+
+    return {
+        'rows': rows,
+        'storage': options['storage'],
+        'rows_after': state.row_count,
+        'startup_seconds': startup_seconds,
+        'collect_seconds': collect_seconds,
+        'fetched': fetched,
+        'added': added,
+        'tweets_per_second': fetched / collect_seconds if collect_seconds else 0.0,
+        'requests': fake.requests_made,
+        'rate_limited': fake.rate_limited,
+        'cycles': latency_stats(cycle_seconds),
+        'stages': {stage: latency_stats(timer.samples[stage]) for stage in STAGES},
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def _ms(stats, key):
+    return f"{stats[key]:.1f}" if key in stats else "-"
+
+
+def print_results(results):
+    print("\n" + "="*50)
+    print("COLLECTOR BENCHMARK")
+    print("="*50)
+    header = f"{'rows':>6} {'tweets/s':>9} {'startup':>8}"
+    for stage in STAGES:
+        header += f" {stage + ' p50/p99 ms':>20}"
+    print(header + f" {'peak RSS':>9}")
+    for result in results:
+        line = f"{format_size(result['rows']):>6} {result['tweets_per_second']:9.0f} {result['startup_seconds']:7.2f}s"
+        for stage in STAGES:
+            stats = result['stages'][stage]
+            line += f" {_ms(stats, 'p50_ms') + ' / ' + _ms(stats, 'p99_ms'):>20}"
+        print(line + f" {result['peak_rss_mb']:7.0f}MB")
+
+
+def print_comparison(results, baseline):
+    """Change in tweets/s and per-stage p50 latency against an earlier results file"""
+    previous = {(r['rows'], r['storage']): r for r in baseline['results']}
+    print(f"\nCompared with {baseline['environment'].get('commit') or 'baseline'}:")
+    for result in results:
+        old = previous.get((result['rows'], result['storage']))
+        if old is None:
+            continue
+        changes = [f"tweets/s {(result['tweets_per_second'] / old['tweets_per_second'] - 1) * 100:+.1f}%"
+                   if old['tweets_per_second'] else "tweets/s n/a"]
+        for stage in STAGES:
+            new_p50, old_p50 = result['stages'][stage].get('p50_ms'), old['stages'][stage].get('p50_ms')
+            if new_p50 is not None and old_p50:
+                changes.append(f"{stage} {(new_p50 / old_p50 - 1) * 100:+.1f}%")
+        print(f"  {format_size(result['rows']):>6}: " + ", ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the tweet collector against a fake Twitter API")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help="Stored rows before collecting, comma separated (default: %(default)s)")
+    parser.add_argument('--storage', choices=['csv', 'parquet', 'sqlite'], default='csv', help="Storage backend")
+    parser.add_argument('--cycles', type=int, default=5, help="Collection cycles per size")
+    parser.add_argument('--tweets-per-cycle', type=int, default=1000, help="New tweets per keyword per cycle")
+    parser.add_argument('--keywords', default="AI", help="Comma separated keywords collected each cycle")
+    parser.add_argument('--latency', type=float, default=0.0, help="Simulated seconds per API request")
+    parser.add_argument('--rate-limit-every', type=int, help="Answer every Nth request with a 429")
+    parser.add_argument('--sentiment', choices=['textblob', 'lexicon'], default='textblob',
+                        help="Sentiment backend")
+    parser.add_argument('--output', help="Results file (default: bench_results/collector-<commit>.json)")
+    parser.add_argument('--compare', help="Earlier results file to compare with")
+    parser.add_argument('--workdir', help="Directory for the benchmark datasets (default: a temporary one)")
+    args = parser.parse_args()
+
+    options = {
+        'storage': args.storage,
+        'cycles': args.cycles,
+        'tweets_per_cycle': args.tweets_per_cycle,
+        'keywords': [k.strip() for k in args.keywords.split(',') if k.strip()],
+        'latency': args.latency,
+        'rate_limit_every': args.rate_limit_every,
+        'sentiment': args.sentiment,
+    }
+    sizes = [parse_size(size) for size in args.sizes.split(',')]
+
+    results = []
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        for rows in sizes:
+            print(f"Benchmarking {format_size(rows)} stored rows...")
+            size_dir = os.path.join(workdir, format_size(rows))
+            os.makedirs(size_dir)
+            start = time.perf_counter()
+            path = run_isolated(prepare_dataset, rows, options, size_dir)
+            print(f"  prepared in {time.perf_counter() - start:.1f}s")
+            results.append(run_isolated(run_size, path, rows, options, size_dir))
+
+    print_results(results)
+    output = args.output or os.path.join('bench_results', f"collector-{environment()['commit'] or 'local'}.json")
+    save_results(output, dict(options, sizes=sizes), results)
+    if args.compare:
+        print_comparison(results, load_results(args.compare))
+
+
+if __name__ == "__main__":
+    main()
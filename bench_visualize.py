@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Visualization benchmark across dataset sizes.
+
+Examples:
+    python3 bench_visualize.py                                   # 1k ... 1M tweets
+    python3 bench_visualize.py --sizes 10k,100k --sidecars       # with the collector's rollups/word counts
+    python3 bench_visualize.py --baseline bench_results/visualize-abc1234.json --threshold 0.25
+
+For every size, a synthetic dataset shaped like tweets_sentiment.csv is
+written, then every TweetVisualizer step is run headlessly in a fresh
+process: loading the data and each chart method. Each step is timed, then
+run again under tracemalloc for its peak allocations (``--no-memory``
+skips that second run).
+
+The scaling table shows, between consecutive sizes, how a step's time
+grows with the data: an exponent of 1 is linear, and steps above
+``SUPERLINEAR`` are flagged. With ``--baseline`` (e.g. before a library
+upgrade), steps that got more than ``--threshold`` slower than in an
+earlier results file are listed, and the exit status is 1.
+"""
+
+import argparse
+import contextlib
+import logging
+import math
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmark import (environment, format_size, load_results, make_dataset, parse_size, peak_rss_mb,
+                       run_isolated, save_results)
+
+DEFAULT_SIZES = "1k,10k,100k,1M"
+# Steps growing faster than n ** SUPERLINEAR between two sizes are flagged
+SUPERLINEAR = 1.2
+# Differences below this many seconds are noise, never regressions
+MIN_REGRESSION_SECONDS = 0.05
+
+# Benchmarked steps and the TweetVisualizer methods they call (load_data runs in the constructor)
+STEPS = {
+    'load_data': None,
+    'print_summary': 'print_summary',
+    'pie_chart': 'create_sentiment_pie_chart',
+    'bar_chart': 'create_sentiment_bar_chart',
+    'timeline_chart': 'create_timeline_chart',
+    'word_cloud': 'create_word_cloud',
+    'dashboard': 'create_interactive_dashboard',
+}
+
+
+def measure(function, memory=True):
+    """``(seconds, peak traced MB or None)`` of ``function()``; timed first, then traced"""
+    start = time.perf_counter()
+    function()
+    seconds = time.perf_counter() - start
+    if not memory:
+        return seconds, None
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return seconds, peak / (1024 * 1024)
+
+
+def prepare_dataset(rows, workdir, sidecars):
+    """Write the dataset (and, with ``sidecars``, the collector's rollups and word counts)"""
+    logging.disable(logging.INFO)
+    path = make_dataset(workdir, rows)
+    if sidecars:
+        from dataset_state import DatasetState
+        DatasetState(path).save()
+    return path
+
+
+def run_size(path, rows, options, workdir):
+    """Time and trace every step on the dataset at ``path`` (runs in a worker process)"""
+    logging.disable(logging.INFO)
+    os.environ['MPLBACKEND'] = 'Agg'
+    from visualize_tweets import TweetVisualizer
+
+    # Plotting libraries are imported on first use; import them up front so
+    # their one-off cost is reported on its own instead of in the first chart
+    start = time.perf_counter()
+    import matplotlib.pyplot
+    import plotly.graph_objects
+    import seaborn
+    import wordcloud
+    import_seconds = time.perf_counter() - start
+
+    visualizer = None
+
+    def load():
+        nonlocal visualizer
+        visualizer = TweetVisualizer(path, chunksize=options['chunksize'])
+        visualizer.interactive = False
+        visualizer.output_dir = os.path.join(workdir, 'charts')
+
+    steps = {}
+    for step, method in STEPS.items():
+        if method is None:
+            function = load
+        else:
+            def function(method=method):
+                # Word counts are cached on the visualizer; every step pays for its own
+                visualizer._word_frequencies = None
+                getattr(visualizer, method)()
+        # The visualizer's own progress output would drown the report
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            seconds, peak_mb = measure(function, options['memory'])
+        steps[step] = {'seconds': seconds, 'peak_mb': peak_mb}
+    return {'rows': rows, 'import_seconds': import_seconds, 'steps': steps, 'peak_rss_mb': peak_rss_mb()}
+
+
+def scaling_exponents(results, step):
+    """``log(t2 / t1) / log(n2 / n1)`` between consecutive sizes"""
+    exponents = []
+    for smaller, larger in zip(results, results[1:]):
+        t1, t2 = smaller['steps'][step]['seconds'], larger['steps'][step]['seconds']
+        if t1 > 0 and t2 > 0 and larger['rows'] > smaller['rows']:
+            exponents.append(math.log(t2 / t1) / math.log(larger['rows'] / smaller['rows']))
+        else:
+            exponents.append(None)
+    return exponents
+
+
+def print_scaling_table(results):
+    print("\n" + "="*50)
+    print("VISUALIZATION BENCHMARK")
+    print("="*50)
+    sizes = [format_size(result['rows']) for result in results]
+    print(f"{'seconds':<16}" + "".join(f"{size:>10}" for size in sizes)
+          + "   scaling exponent between sizes")
+    for step in STEPS:
+        line = f"{step:<16}" + "".join(f"{result['steps'][step]['seconds']:10.3f}" for result in results)
+        exponents = [f"{e:.2f}" + ("*" if e > SUPERLINEAR else "") if e is not None else "-"
+                     for e in scaling_exponents(results, step)]
+        print(line + "   " + " ".join(f"{e:>6}" for e in exponents))
+    if any(result['steps']['load_data']['peak_mb'] is not None for result in results):
+        print(f"\n{'peak MB':<16}" + "".join(f"{size:>10}" for size in sizes))
+        for step in STEPS:
+            print(f"{step:<16}" + "".join(f"{result['steps'][step]['peak_mb'] or 0:10.1f}" for result in results))
+    print(f"\n{'plotting import':<16}" + "".join(f"{result['import_seconds']:10.3f}" for result in results))
+    print(f"{'peak RSS MB':<16}" + "".join(f"{result['peak_rss_mb']:10.0f}" for result in results))
+    print(f"* grows faster than n^{SUPERLINEAR}")
+
+
+def regressions(results, baseline, threshold):
+    """``(rows, step, old seconds, new seconds)`` for steps more than ``threshold`` slower than ``baseline``"""
+    previous = {result['rows']: result for result in baseline['results']}
+    slower = []
+    for result in results:
+        old = previous.get(result['rows'])
+        if old is None:
+            continue
+        for step, stats in result['steps'].items():
+            old_seconds = old['steps'].get(step, {}).get('seconds')
+            if old_seconds is None:
+                continue
+            if stats['seconds'] > old_seconds * (1 + threshold) \
+                    and stats['seconds'] - old_seconds > MIN_REGRESSION_SECONDS:
+                slower.append((result['rows'], step, old_seconds, stats['seconds']))
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TweetVisualizer steps across dataset sizes")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help="Dataset sizes in tweets, comma separated (default: %(default)s)")
+    parser.add_argument('--sidecars', action='store_true',
+                        help="Build the collector's rollups and word counts, as in a collected dataset")
+    parser.add_argument('--chunksize', type=int, help="Benchmark the chunked summary mode")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc run of every step")
+    parser.add_argument('--output', help="Results file (default: bench_results/visualize-<commit>.json)")
+    parser.add_argument('--baseline', help="Earlier results file to check for regressions")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Slowdown against --baseline that counts as a regression (default: %(default)s)")
+    parser.add_argument('--workdir', help="Directory for the benchmark datasets (default: a temporary one)")
+    args = parser.parse_args()
+
+    options = {'sidecars': args.sidecars, 'chunksize': args.chunksize, 'memory': not args.no_memory}
+    sizes = sorted(parse_size(size) for size in args.sizes.split(','))
+
+    results = []
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        for rows in sizes:
+            print(f"Benchmarking {format_size(rows)} tweets...")
+            size_dir = os.path.join(workdir, format_size(rows))
+            os.makedirs(size_dir)
+            path = run_isolated(prepare_dataset, rows, size_dir, args.sidecars)
+            results.append(run_isolated(run_size, path, rows, options, size_dir))
+
+    print_scaling_table(results)
+    output = args.output or os.path.join('bench_results', f"visualize-{environment()['commit'] or 'local'}.json")
+    save_results(output, dict(options, sizes=sizes), results)
+
+    if args.baseline:
+        slower = regressions(results, load_results(args.baseline), args.threshold)
+        if slower:
+            print(f"\nREGRESSIONS (more than {args.threshold * 100:.0f}% slower than {args.baseline}):")
+            for rows, step, old_seconds, new_seconds in slower:
+                print(f"  {format_size(rows):>6} {step:<16} {old_seconds:.3f}s -> {new_seconds:.3f}s")
+            raise SystemExit(1)
+        print(f"\nNo step more than {args.threshold * 100:.0f}% slower than {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
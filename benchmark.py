@@ -0,0 +1,119 @@
+"""
+Shared helpers for the benchmark scripts (bench_collector.py, ...).
+
+Benchmarks run each dataset size in a fresh worker process, so peak RSS
+and module-level state (caches, pools) of one size never leak into the
+next, and save their results as JSON tagged with the current commit for
+comparison across commits.
+"""
+
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+from fake_twitter import SAMPLE_PHRASES
+from storage import open_storage
+
+PERCENTILES = (50, 90, 99)
+
+# File or directory name of a benchmark dataset per storage backend
+DATASET_NAMES = {'csv': 'tweets.csv', 'parquet': 'tweets_parquet', 'sqlite': 'tweets.db'}
+
+
+def parse_size(text):
+    """``'10k'`` -> 10000, ``'1M'`` -> 1000000"""
+    text = text.strip()
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(text[-1:].lower(), 1)
+    return int(float(text[:-1] if multiplier > 1 else text) * multiplier)
+
+
+def format_size(n):
+    for unit, value in (('M', 1_000_000), ('k', 1_000)):
+        if n >= value and n % value == 0:
+            return f"{n // value}{unit}"
+    return str(n)
+
+
+def synthetic_tweets(n, start=0, seed=0, keywords=("AI",), days=30):
+    """``n`` stored-tweet rows (all columns the collector writes) with unique IDs and texts"""
+    rng = np.random.default_rng(seed + start)
+    ids = np.arange(start + 1, start + n + 1)
+    phrases = np.asarray(SAMPLE_PHRASES, dtype=object)[rng.integers(0, len(SAMPLE_PHRASES), n)]
+    now = pd.Timestamp.now(tz='UTC').floor('s')
+    created_at = now - pd.to_timedelta(rng.integers(0, days * 86_400, n), unit='s')
+    return pd.DataFrame({
+        'Text': phrases + " (archived " + ids.astype(str).astype(object) + ")",
+        'Sentiment': rng.choice(['Positive', 'Neutral', 'Negative'], n),
+        'Created_At': created_at,
+        'Tweet_ID': ids.astype(str),
+        'Keyword': rng.choice(list(keywords), n),
+        'Collection_Time': now.tz_localize(None).strftime('%Y-%m-%d %H:%M:%S'),
+    })
+
+
+def make_dataset(directory, rows, backend='csv', chunksize=1_000_000, **kwargs):
+    """Write ``rows`` synthetic tweets with ``backend`` storage under ``directory`` and return its path"""
+    path = os.path.join(directory, DATASET_NAMES[backend])
+    storage = open_storage(path, backend)
+    for start in range(0, rows, chunksize):
+        storage.append(synthetic_tweets(min(chunksize, rows - start), start=start, **kwargs))
+    return path
+
+
+def latency_stats(seconds):
+    """Count, total and percentiles (in milliseconds) of a list of durations in seconds"""
+    if not seconds:
+        return {'count': 0}
+    values = np.asarray(seconds) * 1000
+    stats = {'count': len(values), 'total_ms': float(values.sum())}
+    for p in PERCENTILES:
+        stats[f'p{p}_ms'] = float(np.percentile(values, p))
+    stats['max_ms'] = float(values.max())
+    return stats
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def run_isolated(function, *args):
+    """Run ``function(*args)`` in a fresh (spawned) process and return its result"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+        return executor.submit(function, *args).result()
+
+
+def environment():
+    """Commit, Python, platform and CPU count the results were measured with"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(), 'platform': platform.platform(),
+            'cpus': os.cpu_count()}
+
+
+def save_results(path, config, results):
+    """Write ``{'environment', 'config', 'results'}`` to ``path`` as JSON"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'environment': environment(), 'config': config, 'results': results}, f, indent=2)
+    print(f"Saved: {path}")
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
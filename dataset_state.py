@@ -0,0 +1,88 @@
+"""
+Long-lived in-process view of the collected dataset.
+
+The collector loads this once at startup and updates it as each batch is
+written, so per-cycle summaries never need to re-read the stored tweets.
+It also keeps the dedup index, the dashboard rollups and the word
+frequencies in step with every batch; the rollups and word frequencies
+are saved once per cycle by ``save``.
+"""
+
+import logging
+import threading
+from collections import Counter
+
+import pandas as pd
+
+from dedup_index import DedupIndex
+from rollups import SentimentRollups
+from word_frequencies import WordFrequencies
+from storage import open_storage
+
+logger = logging.getLogger(__name__)
+
+
+class DatasetState:
+    """
+    Row count, running sentiment counts, dedup index, rollups and word
+    frequencies for one dataset.
+
+    ``storage`` is a storage backend or a path accepted by ``open_storage``.
+
+    Writers that share a state across threads should hold ``lock`` while
+    they dedup, write and update.
+    """
+
+    def __init__(self, storage, dedup_index=None, rollups=None, word_frequencies=None):
+        self.storage = open_storage(storage)
+        self.lock = threading.RLock()
+        self.row_count = 0
+        self.sentiment_counts = Counter()
+        self.dedup_index = dedup_index if dedup_index is not None else DedupIndex(self.storage)
+        if rollups is None:
+            rollups = SentimentRollups(self.storage)
+            rollups.load()
+        self.rollups = rollups
+        if word_frequencies is None:
+            word_frequencies = WordFrequencies(self.storage)
+            word_frequencies.load()
+        self.word_frequencies = word_frequencies
+        self.load()
+
+    def load(self, chunksize=100_000):
+        """Count rows and sentiments with a single chunked pass over the stored tweets"""
+        self.row_count = 0
+        self.sentiment_counts = Counter()
+        if not self.storage.exists():
+            logger.info(f"No existing tweets found at {self.storage.path}")
+            return
+
+        try:
+            for chunk in self.storage.iter_chunks(columns=['Sentiment'], chunksize=chunksize):
+                self.row_count += len(chunk)
+                if 'Sentiment' in chunk.columns:
+                    self.sentiment_counts.update(chunk['Sentiment'].dropna())
+            logger.info(f"Loaded {self.row_count} existing tweets from {self.storage.path}")
+        except Exception as e:
+            logger.warning(f"Error loading existing tweets: {e}")
+
+    def update(self, added_df):
+        """Account for rows that were just appended to the storage"""
+        self.dedup_index.add(added_df)
+        self.rollups.update(added_df)
+        self.word_frequencies.update(added_df)
+        self.row_count += len(added_df)
+        if 'Sentiment' in added_df.columns:
+            self.sentiment_counts.update(added_df['Sentiment'].dropna())
+
+    def sentiment_value_counts(self):
+        """Sentiment counts as a Series, ordered like ``value_counts``"""
+        counts = pd.Series(dict(self.sentiment_counts.most_common()), dtype='int64')
+        counts.index.name = 'Sentiment'
+        return counts.rename('count')
+
+    def save(self):
+        """Persist the rollups and word frequencies (the dedup index is saved with every batch)"""
+        with self.lock:
+            self.rollups.save()
+            self.word_frequencies.save()
@@ -0,0 +1,256 @@
+"""
+Persistent dedup index for collected tweets.
+
+Every tweet is reduced to compact 64-bit keys: one for its normalized text
+and, when available, one for its tweet ID. The keys are stored in an
+append-only binary file next to the dataset and loaded once at startup into a
+sorted NumPy array (8 bytes per key) with a Bloom filter in front of it, so a
+batch is checked in O(batch) without comparing full tweet strings.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+
+import numpy as np
+
+from storage import open_storage
+
+logger = logging.getLogger(__name__)
+
+INDEX_SUFFIX = '.dedup'
+META_SUFFIX = '.meta.json'
+
+# Pending keys are merged into the sorted array once there are this many
+MERGE_THRESHOLD = 100_000
+
+
+def normalize_text(text):
+    """Collapse whitespace and case so trivial variations hash the same"""
+    return ' '.join(str(text).split()).casefold()
+
+
+def _hash_key(prefix, value):
+    digest = hashlib.blake2b(f"{prefix}:{value}".encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def text_key(text):
+    """64-bit key for the normalized tweet text"""
+    return _hash_key('text', normalize_text(text))
+
+
+def id_key(tweet_id):
+    """64-bit key for a tweet ID"""
+    return _hash_key('id', str(tweet_id).strip())
+
+
+def _hash_keys(prefix, values):
+    """Like ``_hash_key`` for every string in ``values``, as a uint64 array"""
+    prefix = f"{prefix}:".encode('utf-8')
+    blake2b = hashlib.blake2b
+    # The digests go straight into one buffer, without a Python int per key
+    digests = b''.join(blake2b(prefix + value.encode('utf-8'), digest_size=8).digest() for value in values)
+    return np.frombuffer(digests, dtype='<u8').astype(np.uint64)
+
+
+def dataframe_keys(df):
+    """
+    Keys of every row in a tweets DataFrame as uint64 arrays.
+
+    Returns ``(text_keys, id_keys, has_id)``: one text key per row and the
+    tweet ID keys, which only count where ``has_id`` is True.
+    """
+    text_keys = _hash_keys('text', (normalize_text(text) for text in df['Text']))
+    id_keys = np.zeros(len(df), dtype=np.uint64)
+    has_id = np.zeros(len(df), dtype=bool)
+    if 'Tweet_ID' in df.columns:
+        ids = df['Tweet_ID'].astype('string')
+        has_id = (ids.notna() & (ids.str.strip() != '')).fillna(False).to_numpy(dtype=bool)
+        id_keys[has_id] = _hash_keys('id', (value.split('.')[0].strip() for value in ids[has_id]))
+    return text_keys, id_keys, has_id
+
+
+def _flat_keys(df):
+    """All keys of a tweets DataFrame in one uint64 array"""
+    text_keys, id_keys, has_id = dataframe_keys(df)
+    return np.concatenate([text_keys, id_keys[has_id]])
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over 64-bit keys, backed by a NumPy bit array"""
+
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(int(capacity), 1024)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+
+    def _positions(self, keys):
+        keys = np.asarray(keys, dtype=np.uint64)
+        h1 = keys & np.uint64(0xFFFFFFFF)
+        h2 = (keys >> np.uint64(32)) | np.uint64(1)
+        rounds = np.arange(self.num_hashes, dtype=np.uint64)
+        return (h1[:, None] + rounds[None, :] * h2[:, None]) % np.uint64(self.num_bits)
+
+    def add(self, keys):
+        if len(keys) == 0:
+            return
+        positions = self._positions(keys).ravel()
+        np.bitwise_or.at(self.bits, (positions >> np.uint64(3)).astype(np.int64),
+                         (np.uint8(1) << (positions & np.uint64(7)).astype(np.uint8)))
+
+    def might_contain(self, keys):
+        if len(keys) == 0:
+            return np.zeros(0, dtype=bool)
+        positions = self._positions(keys)
+        bytes_ = self.bits[(positions >> np.uint64(3)).astype(np.int64)]
+        masks = np.uint8(1) << (positions & np.uint64(7)).astype(np.uint8)
+        return ((bytes_ & masks) != 0).all(axis=1)
+
+
+class DedupIndex:
+    """
+    On-disk set of tweet keys with a Bloom filter front and exact confirmation.
+
+    ``storage`` is a storage backend or a path accepted by ``open_storage``.
+    The index records a fingerprint of the data it covers. If the data
+    changed behind its back (or the index is missing), it is rebuilt from
+    the stored tweets once.
+    """
+
+    def __init__(self, storage, error_rate=0.001):
+        self.storage = open_storage(storage)
+        self.index_file = f"{self.storage.path}{INDEX_SUFFIX}"
+        self.meta_file = f"{self.index_file}{META_SUFFIX}"
+        self.error_rate = error_rate
+        self._keys = np.zeros(0, dtype=np.uint64)
+        self._pending = set()
+        self._bloom = BloomFilter(1024, error_rate)
+        self.load()
+
+    def __len__(self):
+        return len(self._keys) + len(self._pending)
+
+    def _read_meta(self):
+        try:
+            with open(self.meta_file, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self):
+        meta = {'fingerprint': self.storage.fingerprint(), 'count': len(self)}
+        tmp_file = f"{self.meta_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.meta_file)
+
+    def load(self):
+        """Load the index from disk, rebuilding it from the CSV if it is stale"""
+        meta = self._read_meta()
+        keys = None
+        if meta is not None and os.path.exists(self.index_file):
+            keys = np.fromfile(self.index_file, dtype=np.uint64)
+            if meta.get('fingerprint') != self.storage.fingerprint() or meta.get('count') != len(keys):
+                logger.warning(f"Dedup index {self.index_file} is out of date, rebuilding")
+                keys = None
+
+        if keys is None:
+            self.rebuild()
+            return
+
+        self._set_keys(keys)
+        logger.info(f"Loaded dedup index with {len(self)} keys from {self.index_file}")
+
+    def _set_keys(self, keys):
+        self._keys = np.unique(np.asarray(keys, dtype=np.uint64))
+        self._pending = set()
+        self._bloom = BloomFilter(max(2 * len(self._keys), MERGE_THRESHOLD), self.error_rate)
+        self._bloom.add(self._keys)
+
+    def rebuild(self, chunksize=100_000):
+        """Recreate the index by streaming over the stored tweets in chunks"""
+        # One deduplicated array per chunk keeps the peak at 8 bytes per key
+        chunk_keys = []
+        try:
+            for chunk in self.storage.iter_chunks(columns=['Text', 'Tweet_ID'], chunksize=chunksize):
+                if 'Text' in chunk.columns:
+                    chunk_keys.append(np.unique(_flat_keys(chunk)))
+        except Exception as e:
+            logger.warning(f"Error reading {self.storage.path} for dedup index: {e}")
+        keys = np.unique(np.concatenate(chunk_keys)) if chunk_keys else np.zeros(0, dtype=np.uint64)
+
+        tmp_file = f"{self.index_file}.tmp"
+        with open(tmp_file, 'wb') as f:
+            keys.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.index_file)
+
+        self._set_keys(keys)
+        self._write_meta()
+        logger.info(f"Built dedup index with {len(self)} keys for {self.storage.path}")
+
+    def _contains(self, keys):
+        """Boolean array telling which of the uint64 ``keys`` are in the index"""
+        found = np.zeros(len(keys), dtype=bool)
+        # Only Bloom filter hits need an exact lookup
+        hits = np.flatnonzero(self._bloom.might_contain(keys))
+        if len(hits) == 0:
+            return found
+        candidates = keys[hits]
+        if len(self._keys):
+            pos = np.minimum(np.searchsorted(self._keys, candidates), len(self._keys) - 1)
+            found[hits] = self._keys[pos] == candidates
+        if self._pending:
+            found[hits] |= np.fromiter((key in self._pending for key in candidates.tolist()),
+                                       dtype=bool, count=len(candidates))
+        return found
+
+    def filter_new(self, df):
+        """
+        Return a boolean mask of rows in ``df`` that are not in the index.
+
+        Rows repeated within the batch are only kept the first time.
+        """
+        if len(df) == 0:
+            return np.zeros(0, dtype=bool)
+
+        text_keys, id_keys, has_id = dataframe_keys(df)
+        stored = self._contains(text_keys)
+        stored[has_id] |= self._contains(id_keys[has_id])
+
+        mask = np.zeros(len(df), dtype=bool)
+        batch_seen = set()
+        for i in np.flatnonzero(~stored):
+            keys = (int(text_keys[i]), int(id_keys[i])) if has_id[i] else (int(text_keys[i]),)
+            if batch_seen.isdisjoint(keys):
+                mask[i] = True
+                batch_seen.update(keys)
+        return mask
+
+    def add(self, df):
+        """Record the rows of ``df`` in the index and persist the new keys"""
+        keys = np.unique(_flat_keys(df))
+        new_keys = keys[~self._contains(keys)]
+        if len(new_keys):
+            with open(self.index_file, 'ab') as f:
+                new_keys.tofile(f)
+                f.flush()
+                os.fsync(f.fileno())
+            self._pending.update(new_keys.tolist())
+            self._bloom.add(new_keys)
+
+            if len(self._pending) >= MERGE_THRESHOLD or len(self) > self._bloom.capacity:
+                self._set_keys(np.concatenate([self._keys,
+                                               np.fromiter(self._pending, dtype=np.uint64,
+                                                           count=len(self._pending))]))
+        self._write_meta()
+        return len(new_keys)
@@ -0,0 +1,55 @@
+"""
+Downsampling of long time series for interactive charts.
+
+Largest-Triangle-Three-Buckets (LTTB) keeps the first and last point and,
+from each of the buckets in between, the point that forms the largest
+triangle with the previously kept point and the average of the next
+bucket. Peaks and the overall shape survive even at a small fraction of
+the original points.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def lttb_indices(x, y, threshold):
+    """Indices of at most ``threshold`` points of ``(x, y)`` chosen by LTTB (x must be sorted)"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # threshold - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    selected = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        areas = np.abs((x[selected] - avg_x) * (y[start:end] - y[selected])
+                       - (x[selected] - x[start:end]) * (avg_y - y[selected]))
+        selected = start + int(areas.argmax())
+        indices[i + 1] = selected
+    indices[-1] = n - 1
+    return indices
+
+
+def _positions(index):
+    """Numeric x positions for an index of numbers, datetimes or dates"""
+    if pd.api.types.is_numeric_dtype(index.dtype):
+        return np.asarray(index, dtype=np.float64)
+    try:
+        return pd.DatetimeIndex(index).asi8
+    except (TypeError, ValueError):
+        return np.arange(len(index))
+
+
+def lttb(series, threshold):
+    """Downsample a pandas Series with a sorted numeric or date index to ``threshold`` points"""
+    if len(series) <= threshold:
+        return series
+    return series.iloc[lttb_indices(_positions(series.index), series.to_numpy(), threshold)]
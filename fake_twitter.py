@@ -0,0 +1,150 @@
+"""
+Local stand-in for ``tweepy.Client`` used to exercise the collector offline.
+
+FakeTwitterClient serves synthetic, paginated ``search_recent_tweets``
+responses built from real tweepy types, with configurable latency and
+optional 429 (TooManyRequests) injection. It can also enforce a quota per
+window and reports it through x-rate-limit-* headers delivered to
+``client.session``'s response hooks, like tweepy.Client does. It can be
+passed anywhere the collector accepts a ``client``.
+"""
+
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import requests
+import tweepy
+
+SAMPLE_PHRASES = [
+    "AI is amazing and the new model is great",
+    "This update is terrible, worst release ever",
+    "OpenAI announced a new model today",
+    "I love how fast ChatGPT answers now",
+    "Not sure what to think about AI regulation",
+    "The demo was disappointing and buggy",
+    "Google and Meta are investing in AI labs",
+    "What a wonderful time to build with AI",
+]
+
+
+def make_response(status_code=200, limit=450, remaining=449, reset_at=None):
+    """Build a ``requests.Response`` carrying rate limit headers"""
+    response = requests.Response()
+    response.status_code = status_code
+    response.reason = "OK" if status_code == 200 else "Too Many Requests"
+    response._content = b'{}' if status_code == 200 else (
+        b'{"title": "Too Many Requests", "detail": "Too Many Requests"}')
+    response.headers['x-rate-limit-limit'] = str(limit)
+    response.headers['x-rate-limit-remaining'] = str(remaining)
+    response.headers['x-rate-limit-reset'] = str(int(reset_at or time.time() + 900))
+    return response
+
+
+def make_rate_limit_error(reset_in=900):
+    """Build a ``tweepy.errors.TooManyRequests`` like the real client raises"""
+    return tweepy.errors.TooManyRequests(
+        make_response(429, remaining=0, reset_at=time.time() + reset_in))
+
+
+class FakeTwitterClient:
+    """
+    Thread-safe fake of the parts of ``tweepy.Client`` the collector uses.
+
+    Tweets are generated on demand with decreasing IDs (newest first, like
+    the real API). ``latency`` is the simulated seconds per request,
+    ``rate_limit_every`` makes every Nth request raise TooManyRequests,
+    ``quota`` limits requests per ``window`` seconds and ``duplicate_ratio``
+    repeats earlier text to mimic retweets.
+    """
+
+    def __init__(self, total_tweets=1000, latency=0.0, rate_limit_every=None,
+                 duplicate_ratio=0.2, non_english_ratio=0.1, seed=0, quota=None, window=900):
+        self.total_tweets = total_tweets
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.quota = quota
+        self.window = window
+        self.session = requests.Session()
+        self._window_start = time.time()
+        self._window_used = 0
+        self.duplicate_ratio = duplicate_ratio
+        self.non_english_ratio = non_english_ratio
+        self.requests_made = 0
+        self.rate_limited = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._newest_id = 10**18
+        self._start_time = datetime.now(timezone.utc)
+
+    def _make_tweet(self, index):
+        tweet_id = self._newest_id - index
+        if index > 0 and self._random.random() < self.duplicate_ratio:
+            text = f"RT @user{index % 7}: {self._random.choice(SAMPLE_PHRASES)}"
+        else:
+            text = f"{self._random.choice(SAMPLE_PHRASES)} #{index}"
+        lang = "es" if self._random.random() < self.non_english_ratio else "en"
+        created_at = self._start_time - timedelta(seconds=index)
+        return tweepy.Tweet({
+            "id": str(tweet_id),
+            "text": text,
+            "lang": lang,
+            "created_at": created_at.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+            "edit_history_tweet_ids": [str(tweet_id)],
+        })
+
+    def _dispatch_hooks(self, response):
+        for hook in self.session.hooks['response']:
+            hook(response)
+
+    def publish(self, count):
+        """Make ``count`` new tweets appear at the head of the timeline"""
+        with self._lock:
+            self._newest_id += count
+            self.total_tweets += count
+
+    def search_recent_tweets(self, query, max_results=10, next_token=None, since_id=None,
+                             until_id=None, **kwargs):
+        with self._lock:
+            self.requests_made += 1
+            request_number = self.requests_made
+            # Tweet i has ID newest_id - i; honour since_id/until_id bounds
+            first = self._newest_id - int(until_id) + 1 if until_id else 0
+            end = self.total_tweets
+            if since_id:
+                end = min(end, self._newest_id - int(since_id))
+            start = int(next_token) if next_token else max(first, 0)
+            count = max(0, min(max_results, end - start))
+            tweets = [self._make_tweet(start + i) for i in range(count)]
+
+            now = time.time()
+            if now - self._window_start >= self.window:
+                self._window_start = now
+                self._window_used = 0
+            self._window_used += 1
+            limit = self.quota or 450
+            remaining = max(0, limit - self._window_used)
+            reset_at = self._window_start + self.window
+            over_quota = self.quota is not None and self._window_used > self.quota
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        injected = self.rate_limit_every and request_number % self.rate_limit_every == 0
+        if over_quota or injected:
+            with self._lock:
+                self.rate_limited += 1
+            response = make_response(429, limit, 0, reset_at if over_quota else time.time() + 1)
+            self._dispatch_hooks(response)
+            raise tweepy.errors.TooManyRequests(response)
+
+        self._dispatch_hooks(make_response(200, limit, remaining, reset_at))
+
+        meta = {"result_count": count}
+        if tweets:
+            meta["newest_id"] = str(tweets[0].id)
+            meta["oldest_id"] = str(tweets[-1].id)
+        if start + count < end:
+            meta["next_token"] = str(start + count)
+        return tweepy.Response(data=tweets or None, includes={}, errors=[], meta=meta)
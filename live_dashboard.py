@@ -0,0 +1,252 @@
+"""
+Live-updating local dashboard.
+
+LiveAggregates holds the dashboard's numbers in memory: sentiment counts,
+hourly timeline, length histogram, word counts and polarity sums. They
+start from what a TweetVisualizer loaded and are then advanced by the
+batch summaries the collector publishes (see ``live_feed``).
+
+LiveDashboardServer serves a single page over HTTP. The page subscribes to
+``/events`` (server-sent events) and redraws its charts in place with
+every update, so new tweets show up within a fraction of a second of
+being written, without re-reading the data or reloading the page.
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from downsampling import lttb
+from live_feed import DEFAULT_HOST, DEFAULT_PORT, HOUR_FORMAT, LiveFeedListener
+from tweet_summary import LENGTH_BIN_WIDTH, LENGTH_BINS
+from word_frequencies import WordFrequencies
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HTTP_PORT = 8050
+MAX_TIMELINE_POINTS = 1_000
+# Seconds between keep-alive comments on idle event streams
+KEEPALIVE_INTERVAL = 15
+
+
+class LiveAggregates:
+    """In-memory dashboard numbers, advanced one collector batch at a time"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.row_count = 0
+        self.sentiment_counts = Counter()
+        self.hourly = {}  # 'YYYY-MM-DDTHH' -> Counter of sentiments
+        self.lengths = np.zeros(LENGTH_BINS, dtype=np.int64)
+        self.words = WordFrequencies()
+        self.polarity = {}  # sentiment -> [sum, count]
+        self.updated = time.time()
+
+    @classmethod
+    def from_visualizer(cls, visualizer):
+        """Start from the aggregates of a loaded TweetVisualizer"""
+        aggregates = cls()
+        aggregates.row_count = visualizer.row_count
+        if 'Sentiment' in visualizer.columns:
+            aggregates.sentiment_counts.update(visualizer.sentiment_counts().to_dict())
+
+        if 'Created_At' in visualizer.columns and 'Sentiment' in visualizer.columns:
+            timeline = visualizer.hourly_sentiment_counts()
+            if timeline is None:
+                # Only daily counts available; they start the day's first hour
+                timeline = visualizer.daily_sentiment_counts()
+            for bucket, counts in timeline.iterrows():
+                hour = pd.Timestamp(bucket).strftime(HOUR_FORMAT)
+                aggregates.hourly[hour] = Counter({s: int(n) for s, n in counts.items() if n})
+
+        if 'Text' in visualizer.columns:
+            aggregates.lengths += visualizer.length_histogram(binned=True)[1]
+            aggregates.words = visualizer.word_frequencies()
+
+        if visualizer.rollups is not None:
+            aggregates.polarity = {s: list(totals) for s, totals in visualizer.rollups.polarity_totals().items()}
+        return aggregates
+
+    def apply(self, event):
+        """Fold one ``live_feed.batch_event`` into the aggregates"""
+        with self.lock:
+            self.row_count += event.get('rows', 0)
+            self.sentiment_counts.update(event.get('sentiments', {}))
+            for hour, counts in event.get('hours', {}).items():
+                self.hourly.setdefault(hour, Counter()).update(counts)
+            if event.get('lengths'):
+                self.lengths += np.asarray(event['lengths'], dtype=np.int64)
+            for sentiment, (total, count) in event.get('polarity', {}).items():
+                current = self.polarity.setdefault(sentiment, [0.0, 0])
+                current[0] += total
+                current[1] += count
+            for sentiment, words in event.get('words', {}).items():
+                self.words.add_counts(words, sentiment)
+            self.updated = time.time()
+
+    def snapshot(self):
+        """Everything the page draws, as a JSON-serializable dict"""
+        with self.lock:
+            sentiments = self.sentiment_counts.most_common()
+            hourly = pd.DataFrame({hour: dict(counts) for hour, counts in self.hourly.items()}).T
+            lengths = self.lengths.tolist()
+            polarity = {s: total / count for s, (total, count) in self.polarity.items() if count}
+            row_count = self.row_count
+            updated = self.updated
+        top_words = self.words.most_common(10)
+
+        timeline = []
+        if len(hourly) > 0:
+            hourly.index = pd.to_datetime(hourly.index, format=HOUR_FORMAT, utc=True)
+            hourly = hourly.sort_index().fillna(0)
+            for sentiment in sorted(hourly.columns):
+                series = lttb(hourly[sentiment], MAX_TIMELINE_POINTS)
+                timeline.append({'name': sentiment, 'x': series.index.strftime('%Y-%m-%d %H:00').tolist(),
+                                 'y': series.astype(int).tolist()})
+
+        return {
+            'rows': row_count,
+            'updated': updated,
+            'sentiments': {'labels': [s for s, _ in sentiments], 'values': [n for _, n in sentiments]},
+            'timeline': timeline,
+            'lengths': {'x': [i * LENGTH_BIN_WIDTH + LENGTH_BIN_WIDTH / 2 for i in range(LENGTH_BINS)],
+                        'y': lengths},
+            'words': {'words': [w for w, _ in reversed(top_words)], 'counts': [n for _, n in reversed(top_words)]},
+            'polarity': polarity,
+        }
+
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Live Tweet Sentiment</title>
+<script src="https://cdn.plot.ly/plotly-{plotly_version}.min.js"></script>
+<style>
+body {{ font-family: sans-serif; margin: 1em; }}
+#grid {{ display: grid; grid-template-columns: 1fr 1fr; gap: 1em; }}
+#grid > div {{ height: 380px; }}
+</style>
+</head>
+<body>
+<h2>Live Tweet Sentiment</h2>
+<div id="status">Connecting...</div>
+<div id="grid"><div id="pie"></div><div id="lengths"></div><div id="timeline"></div><div id="words"></div></div>
+<script>
+function render(s) {{
+  Plotly.react('pie', [{{type: 'pie', labels: s.sentiments.labels, values: s.sentiments.values}}],
+               {{title: 'Sentiment Distribution'}});
+  Plotly.react('lengths', [{{type: 'bar', x: s.lengths.x, y: s.lengths.y, width: {bin_width}}}],
+               {{title: 'Tweet Length Distribution'}});
+  Plotly.react('timeline', s.timeline.map(t => ({{type: 'scattergl', mode: 'lines', name: t.name, x: t.x, y: t.y}})),
+               {{title: 'Sentiment Over Time (hourly)'}});
+  Plotly.react('words', [{{type: 'bar', orientation: 'h', x: s.words.counts, y: s.words.words}}],
+               {{title: 'Top Words'}});
+  const polarity = Object.entries(s.polarity).map(([k, v]) => k + ' ' + v.toFixed(3)).join(', ');
+  document.getElementById('status').textContent = s.rows + ' tweets, updated ' +
+    new Date(s.updated * 1000).toLocaleTimeString() + (polarity ? ' | mean polarity: ' + polarity : '');
+}}
+fetch('/snapshot').then(r => r.json()).then(render);
+new EventSource('/events').onmessage = e => render(JSON.parse(e.data));
+</script>
+</body>
+</html>
+"""
+
+
+class LiveDashboardServer:
+    """HTTP server for the live page, fed by a LiveFeedListener on ``feed_port``"""
+
+    def __init__(self, aggregates, host=DEFAULT_HOST, port=DEFAULT_HTTP_PORT, feed_port=DEFAULT_PORT):
+        from plotly.offline import get_plotlyjs_version
+
+        self.aggregates = aggregates
+        self._clients = []
+        self._clients_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._page = PAGE.format(plotly_version=get_plotlyjs_version(), bin_width=LENGTH_BIN_WIDTH).encode('utf-8')
+        self.listener = LiveFeedListener(self.on_event, host=host, port=feed_port)
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def on_event(self, event):
+        """Apply a collector batch and push the new numbers to every open page"""
+        self.aggregates.apply(event)
+        message = json.dumps(self.aggregates.snapshot())
+        with self._clients_lock:
+            for client in self._clients:
+                if client.full():
+                    client.get_nowait()  # A slow page only needs the latest numbers
+                client.put_nowait(message)
+
+    def serve_forever(self):
+        self.listener.start()
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self._stopped.set()
+            self.listener.stop()
+            self.httpd.server_close()
+
+    def shutdown(self):
+        self.httpd.shutdown()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                logger.debug(f"{self.address_string()} {format % args}")
+
+            def _send(self, body, content_type):
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == '/':
+                    self._send(server._page, 'text/html; charset=utf-8')
+                elif self.path == '/snapshot':
+                    self._send(json.dumps(server.aggregates.snapshot()).encode('utf-8'), 'application/json')
+                elif self.path == '/events':
+                    self._stream_events()
+                else:
+                    self.send_error(404)
+
+            def _stream_events(self):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+                client = queue.Queue(maxsize=8)
+                with server._clients_lock:
+                    server._clients.append(client)
+                try:
+                    while not server._stopped.is_set():
+                        try:
+                            message = client.get(timeout=KEEPALIVE_INTERVAL)
+                            self.wfile.write(f"data: {message}\n\n".encode('utf-8'))
+                        except queue.Empty:
+                            self.wfile.write(b": keep-alive\n\n")
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    with server._clients_lock:
+                        server._clients.remove(client)
+
+        return Handler
@@ -0,0 +1,113 @@
+"""
+Batch notifications from the collector to a live dashboard.
+
+After each batch is written, the collector sends a compact summary of it
+(counts per sentiment and hour, polarity sums, length histogram and the
+batch's most common words) as one JSON datagram to a local UDP port. A
+dashboard server listening there folds the summaries into its in-memory
+aggregates; when nobody listens the datagrams are simply dropped, so the
+collector never blocks on or fails because of the dashboard.
+"""
+
+import json
+import logging
+import socket
+import threading
+
+import numpy as np
+import pandas as pd
+
+from rollups import HOUR_FORMAT
+from tweet_summary import LENGTH_BIN_WIDTH, LENGTH_BINS
+from word_frequencies import WordFrequencies
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8766
+
+# Words per sentiment sent with each batch (keeps datagrams well under 64 KB)
+EVENT_WORDS = 200
+MAX_DATAGRAM = 65_000
+
+
+def batch_event(df):
+    """Summary of a batch of written tweets, as a JSON-serializable dict"""
+    df = df.dropna(subset=['Sentiment'])
+    sentiments = df['Sentiment'].astype(str)
+    event = {'rows': int(len(df)), 'sentiments': sentiments.value_counts().to_dict(),
+             'hours': {}, 'polarity': {}, 'lengths': {}, 'words': {}}
+
+    if 'Created_At' in df.columns:
+        hours = pd.to_datetime(df['Created_At'], errors='coerce', utc=True).dt.strftime(HOUR_FORMAT)
+        for (hour, sentiment), count in sentiments.groupby([hours, sentiments]).size().items():
+            event['hours'].setdefault(hour, {})[sentiment] = int(count)
+
+    if 'Polarity' in df.columns:
+        polarity = pd.to_numeric(df['Polarity'], errors='coerce')
+        for sentiment, values in polarity.groupby(sentiments):
+            event['polarity'][sentiment] = [float(values.sum()), int(values.count())]
+
+    if 'Text' in df.columns:
+        bins = np.minimum(df['Text'].astype(str).str.len().to_numpy() // LENGTH_BIN_WIDTH, LENGTH_BINS - 1)
+        event['lengths'] = np.bincount(bins.astype(np.int64), minlength=LENGTH_BINS).tolist()
+        words = WordFrequencies()
+        words.update(df)
+        event['words'] = {s: words.frequencies(s, n=EVENT_WORDS) for s in words.sentiments}
+    return event
+
+
+class LiveFeedPublisher:
+    """Sends batch summaries to ``host:port`` over UDP (``port=None`` disables it)"""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.address = (host, port)
+        self.enabled = port is not None
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM) if self.enabled else None
+
+    def publish(self, df):
+        if not self.enabled or len(df) == 0:
+            return
+        try:
+            payload = json.dumps(batch_event(df)).encode('utf-8')
+            if len(payload) > MAX_DATAGRAM:
+                logger.warning(f"Live feed event of {len(payload)} bytes is too large, skipped")
+                return
+            self._socket.sendto(payload, self.address)
+        except OSError as e:
+            # Nobody listening (or a full socket buffer) must not affect collection
+            logger.debug(f"Could not publish batch to live feed: {e}")
+
+
+class LiveFeedListener:
+    """Background thread calling ``handler(event)`` for every datagram received on ``host:port``"""
+
+    def __init__(self, handler, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.handler = handler
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind((host, port))
+        self._socket.settimeout(0.5)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="live-feed", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        self._socket.close()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                payload, _ = self._socket.recvfrom(MAX_DATAGRAM + 1024)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            try:
+                self.handler(json.loads(payload))
+            except Exception as e:
+                logger.warning(f"Ignoring bad live feed event: {e}")
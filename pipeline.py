@@ -0,0 +1,120 @@
+"""
+Three-stage collection pipeline: fetch pages -> score -> write.
+
+Each stage runs in its own thread and hands work to the next through a
+bounded queue, so scoring and disk writes overlap with the next API request
+while back-pressure keeps at most a few pages in memory. The stages are
+plain callables, which keeps the pipeline independent of the Twitter client
+(script.py wires in the real one; tests can use fake_twitter.py).
+"""
+
+import logging
+import queue
+import threading
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+QUEUE_DEPTH = registry.gauge(
+    'collector_pipeline_queue_depth', "Pages or batches waiting for the next pipeline stage", ['queue'])
+
+# Marks the end of a stream on a queue
+_DONE = object()
+
+
+class PipelineStopped(Exception):
+    """Raised inside a stage when another stage has failed"""
+
+
+class CollectionPipeline:
+    """
+    Run ``pages`` through ``score_page`` and ``write_batch`` concurrently.
+
+    ``pages`` is an iterable of pages (e.g. lists of tweets), ``score_page``
+    turns a page into a batch (e.g. a DataFrame) and ``write_batch`` persists
+    a batch and returns whatever the caller wants to collect from it.
+    """
+
+    def __init__(self, score_page, write_batch, queue_size=4):
+        self.score_page = score_page
+        self.write_batch = write_batch
+        self.queue_size = queue_size
+        self._stop = threading.Event()
+        self._errors = []
+
+    def _put(self, q, item, name):
+        # Block while the next stage is busy, but give up if the pipeline stops
+        while True:
+            if self._stop.is_set():
+                raise PipelineStopped()
+            try:
+                q.put(item, timeout=0.1)
+                QUEUE_DEPTH.set(q.qsize(), queue=name)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, q, name):
+        while True:
+            if self._stop.is_set():
+                raise PipelineStopped()
+            try:
+                item = q.get(timeout=0.1)
+                QUEUE_DEPTH.set(q.qsize(), queue=name)
+                return item
+            except queue.Empty:
+                continue
+
+    def _run_stage(self, name, body):
+        try:
+            body()
+        except PipelineStopped:
+            pass
+        except BaseException as e:
+            logger.error(f"Pipeline {name} stage failed: {e}")
+            self._errors.append(e)
+            self._stop.set()
+
+    def run(self, pages):
+        """Run the pipeline to completion and return the list of write results"""
+        self._stop.clear()
+        self._errors = []
+        score_queue = queue.Queue(maxsize=self.queue_size)
+        write_queue = queue.Queue(maxsize=self.queue_size)
+        results = []
+
+        def fetch():
+            for page in pages:
+                self._put(score_queue, page, "score")
+            self._put(score_queue, _DONE, "score")
+
+        def score():
+            while True:
+                page = self._get(score_queue, "score")
+                if page is _DONE:
+                    break
+                self._put(write_queue, self.score_page(page), "write")
+            self._put(write_queue, _DONE, "write")
+
+        def write():
+            while True:
+                batch = self._get(write_queue, "write")
+                if batch is _DONE:
+                    break
+                results.append(self.write_batch(batch))
+
+        threads = [threading.Thread(target=self._run_stage, args=(name, body), daemon=True)
+                   for name, body in (("fetch", fetch), ("score", score))]
+        for thread in threads:
+            thread.start()
+        try:
+            # The writer runs on the calling thread
+            self._run_stage("write", write)
+        finally:
+            for thread in threads:
+                thread.join()
+
+        if self._errors:
+            raise self._errors[0]
+        return results
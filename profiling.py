@@ -0,0 +1,385 @@
+"""
+Profiles of collector cycles and visualizer charts (``--profile``).
+
+``Profiler.profile(label)`` wraps one section of work (a collection cycle,
+a chart) and writes, under ``output_dir``:
+
+    <label>.collapsed        stacks in the collapsed format of flamegraph.pl,
+                             speedscope and inferno, one "frame;frame;... value" per line
+    <label>.txt              top-N functions (and allocation sites) of the section
+    <label>.prof             (deterministic mode) the full cProfile stats, for pstats or snakeviz
+    <label>.tracemalloc      (with memory) tracemalloc snapshot, for tracemalloc.Snapshot.load
+    <label>.alloc.collapsed  (with memory) memory growth of the section by allocating stack, in KB
+
+Two modes:
+
+    sample         a background thread records the Python stack of every
+                   thread the section runs on every ``interval`` seconds;
+                   costs about 1% of one core at the default interval
+                   (less with a longer one), cheap enough to leave on.
+                   Values are samples (wall clock, so waits show up too).
+    deterministic  cProfile on the section's thread and every thread it
+                   starts (on Python 3.12+, where cProfile is built on
+                   sys.monitoring, one profile of every thread running
+                   during the section); exact call counts but slows
+                   Python code down noticeably. Values are microseconds,
+                   and the stacks are reconstructed from caller/callee
+                   pairs, so they are approximate where a function is
+                   called from several places.
+
+tracemalloc (``memory``) is independent of the mode and slows allocations
+down several times, so it is best used for a few sections at a time.
+"""
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+MODES = ('sample', 'deterministic')
+DEFAULT_DIR = "profiles"
+DEFAULT_INTERVAL = 0.01  # Seconds between stack samples
+DEFAULT_TOP = 25  # Rows per table in the summaries
+TRACEMALLOC_FRAMES = 16  # Frames kept per allocation
+# Branches of deterministic profiles below this share of the section's time are folded into their caller
+MIN_STACK_SHARE = 1e-4
+MAX_STACK_DEPTH = 128
+# From 3.12 cProfile uses sys.monitoring: one profiler sees every thread and a second one cannot be enabled
+PROFILES_ALL_THREADS = sys.version_info >= (3, 12)
+
+
+def run_directory(base, name):
+    """``base/name-YYYYmmdd-HHMMSS``: a fresh directory for the profiles of one run"""
+    return os.path.join(base, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}")
+
+
+def _file_label(filename):
+    parent, base = os.path.split(filename)
+    if base == '__init__.py':
+        return f"{os.path.basename(parent)}/{base}"
+    return base
+
+
+def _code_label(code):
+    return f"{code.co_name} ({_file_label(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _pstats_label(func):
+    filename, line, name = func
+    if filename == '~':
+        # Built-in functions have no file
+        return name
+    return f"{name} ({_file_label(filename)}:{line})"
+
+
+class StackSampler:
+    """Counts the stacks of selected threads, sampled from a background thread"""
+
+    def __init__(self, interval=DEFAULT_INTERVAL, ignore=()):
+        self.interval = interval
+        self.ignore = set(ignore)
+        self.samples = 0
+        # Time spent taking samples, i.e. the sampler's overhead
+        self.busy = 0.0
+        # Stacks are counted as (thread name, code objects...) and only labelled once at the end
+        self._counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    @property
+    def stacks(self):
+        """``{(thread name, frame label, ...): samples}``, outermost frame first"""
+        labels = {}
+        stacks = Counter()
+        for (thread, *codes), count in self._counts.items():
+            for code in codes:
+                if code not in labels:
+                    labels[code] = _code_label(code)
+            stacks[(thread,) + tuple(labels[code] for code in reversed(codes))] += count
+        return stacks
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            start = time.perf_counter()
+            for ident, frame in sys._current_frames().items():
+                if ident == own or ident in self.ignore:
+                    continue
+                stack = [names.get(ident)]
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                if stack[0] is None:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                    stack[0] = names.get(ident, f"thread-{ident}")
+                self._counts[tuple(stack)] += 1
+            self.samples += 1
+            self.busy += time.perf_counter() - start
+
+
+def collapse_pstats(stats):
+    """Approximate ``{stack: microseconds}`` from cProfile's caller/callee times"""
+    children = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, (_, _, _, cumulative) in callers.items():
+            children.setdefault(caller, []).append((func, cumulative))
+    roots = [func for func, (_, _, _, _, callers) in stats.items() if not callers]
+    total = sum(stats[func][3] for func in roots)
+    cutoff = total * MIN_STACK_SHARE
+    stacks = Counter()
+
+    def walk(func, stack, on_stack, seconds):
+        _, _, own, cumulative, _ = stats[func]
+        stack = stack + (_pstats_label(func),)
+        # A function's own and callee times are split between its callers by their share of its time
+        share = seconds / cumulative if cumulative else 0.0
+        folded = own * share
+        for child, child_seconds in children.get(func, ()):
+            child_seconds *= share
+            if child in on_stack:
+                # Recursive calls are already part of the outer call's time
+                continue
+            if child_seconds <= cutoff or len(stack) >= MAX_STACK_DEPTH:
+                # Tiny or too deep branches are counted in this frame
+                folded += child_seconds
+            else:
+                walk(child, stack, on_stack | {child}, child_seconds)
+        stacks[stack] += folded * 1e6
+
+    for root in roots:
+        walk(root, (), {root}, stats[root][3])
+    return stacks
+
+
+def _write_collapsed(path, stacks):
+    with open(path, 'w', encoding='utf-8') as f:
+        for stack, value in sorted(stacks.items()):
+            value = round(value)
+            if value > 0:
+                f.write(";".join(frame.replace(';', ':') for frame in stack) + f" {value}\n")
+
+
+def _sample_tables(stacks, top):
+    """Top functions by own and by total (inclusive) samples"""
+    total = sum(stacks.values()) or 1
+    own = Counter()
+    inclusive = Counter()
+    for stack, count in stacks.items():
+        # The first frame is the thread name
+        own[stack[-1]] += count
+        for frame in set(stack[1:]):
+            inclusive[frame] += count
+    lines = []
+    for title, table in (("own", own), ("total", inclusive)):
+        lines.append(f"\nTop {top} functions by {title} samples:")
+        lines.append(f"{'own %':>7} {'total %':>8}  function")
+        for frame, _ in table.most_common(top):
+            lines.append(f"{own[frame] / total * 100:7.1f} {inclusive[frame] / total * 100:8.1f}  {frame}")
+    return lines
+
+
+class Profiler:
+    """
+    Profiles ``with profiler.profile(label)`` sections into ``output_dir``.
+
+    ``mode`` is ``'sample'``, ``'deterministic'`` or None (profiling off,
+    sections run as they are). With ``keep``, only the files of the last
+    ``keep`` sections are kept.
+    """
+
+    def __init__(self, mode=None, output_dir=DEFAULT_DIR, interval=DEFAULT_INTERVAL, memory=False,
+                 top=DEFAULT_TOP, keep=None):
+        if mode not in MODES + (None,):
+            raise ValueError(f"Unknown profile mode {mode!r}, expected one of {', '.join(MODES)}")
+        self.mode = mode
+        self.output_dir = output_dir
+        self.interval = interval
+        self.memory = memory
+        self.top = top
+        self.keep = keep
+        self._written = deque()
+
+    @property
+    def enabled(self):
+        return self.mode is not None or self.memory
+
+    @contextmanager
+    def profile(self, label):
+        """Profile the ``with`` block and write its files under ``label``"""
+        if not self.enabled:
+            yield
+            return
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, re.sub(r'[^\w.-]+', '_', label))
+        files = []
+        lines = [f"Profile of {label} ({self.mode or 'memory only'}"
+                 + (f", every {self.interval * 1000:g} ms" if self.mode == 'sample' else "") + ")"]
+
+        started_tracemalloc = self.memory and not tracemalloc.is_tracing()
+        if started_tracemalloc:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        if self.memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+
+        sampler = deterministic = None
+        thread_profiles = []
+        if self.mode == 'sample':
+            # Threads that were already running (servers, feeds) are not part of the section
+            current = threading.get_ident()
+            sampler = StackSampler(self.interval, ignore={thread.ident for thread in threading.enumerate()
+                                                          if thread.ident != current}).start()
+        elif self.mode == 'deterministic':
+            deterministic = cProfile.Profile()
+            if not PROFILES_ALL_THREADS:
+                # Threads started by the section (pipeline stages, keyword workers) get their own profiler
+                def profile_thread(frame, event, arg):
+                    thread_profile = cProfile.Profile()
+                    try:
+                        thread_profile.enable()
+                    except ValueError as e:
+                        logger.debug(f"Could not profile thread {threading.current_thread().name}: {e}")
+                        return
+                    thread_profiles.append(thread_profile)
+
+                previous_hook = threading.getprofile()
+                threading.setprofile(profile_thread)
+            deterministic.enable()
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            lines.append(f"Wall time {elapsed:.3f}s")
+
+            # Stop recording before writing anything, so the profiles leave out their own output
+            if sampler is not None:
+                sampler.stop()
+            if deterministic is not None:
+                deterministic.disable()
+                if not PROFILES_ALL_THREADS:
+                    threading.setprofile(previous_hook)
+            if self.memory:
+                after = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                if started_tracemalloc:
+                    tracemalloc.stop()
+
+            if sampler is not None:
+                stacks = sampler.stacks
+                _write_collapsed(base + ".collapsed", stacks)
+                files.append(base + ".collapsed")
+                lines.append(f"{sampler.samples} samples of {sum(stacks.values())} thread stacks, "
+                             f"sampler overhead {sampler.busy * 1000:.1f} ms "
+                             f"({sampler.busy / elapsed * 100 if elapsed else 0:.2f}% of one core)")
+                lines.extend(_sample_tables(stacks, self.top))
+
+            if deterministic is not None:
+                stats = pstats.Stats(deterministic)
+                for thread_profile in thread_profiles:
+                    stats.add(thread_profile)
+                stats.dump_stats(base + ".prof")
+                _write_collapsed(base + ".collapsed", collapse_pstats(stats.stats))
+                files.extend([base + ".prof", base + ".collapsed"])
+                if PROFILES_ALL_THREADS:
+                    lines.append("Threads running during the section are included in the same profile")
+                else:
+                    lines.append(f"{len(thread_profiles)} threads started during the section were profiled too")
+                stats.strip_dirs()
+                for sort, title in (('cumulative', "cumulative time"), ('tottime', "own time")):
+                    output = io.StringIO()
+                    stats.stream = output
+                    stats.sort_stats(sort).print_stats(self.top)
+                    lines.append(f"\nTop {self.top} functions by {title}:")
+                    # Skip pstats' own header; the table starts at the column titles
+                    table = output.getvalue()
+                    lines.append(table[table.find("   ncalls"):].rstrip())
+
+            if self.memory:
+                after.dump(base + ".tracemalloc")
+                files.append(base + ".tracemalloc")
+                lines.extend(self._memory_lines(before, after, peak, base + ".alloc.collapsed"))
+                files.append(base + ".alloc.collapsed")
+
+            with open(base + ".txt", 'w', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+            files.append(base + ".txt")
+            logger.info(f"Profile of {label} written to {base}.txt")
+            self._prune(files)
+
+    def _memory_lines(self, before, after, peak, collapsed_path):
+        # Leave out the profilers' own allocations
+        ignore = [tracemalloc.Filter(False, module.__file__) for module in (tracemalloc, cProfile, pstats)]
+        ignore.append(tracemalloc.Filter(False, __file__))
+        before = before.filter_traces(ignore)
+        after = after.filter_traces(ignore)
+
+        # Memory still held at the end of the section, by allocating stack (oldest frame first)
+        stacks = Counter()
+        for stat in after.compare_to(before, 'traceback'):
+            if stat.size_diff > 0:
+                stack = tuple(f"{_file_label(frame.filename)}:{frame.lineno}"
+                              for frame in stat.traceback)
+                stacks[stack] += stat.size_diff / 1024
+        _write_collapsed(collapsed_path, stacks)
+
+        lines = [f"\nMemory: peak {peak / (1024 * 1024):.1f} MB traced during the section",
+                 f"Top {self.top} allocation sites by growth:",
+                 f"{'growth':>10} {'blocks':>8}  line"]
+        for stat in after.compare_to(before, 'lineno')[:self.top]:
+            frame = stat.traceback[0]
+            lines.append(f"{stat.size_diff / 1024:+9.0f}K {stat.count_diff:+8d}  "
+                         f"{_file_label(frame.filename)}:{frame.lineno}")
+        return lines
+
+    def _prune(self, files):
+        self._written.append(files)
+        while self.keep is not None and len(self._written) > self.keep:
+            for path in self._written.popleft():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+def add_profile_arguments(parser, default_dir=DEFAULT_DIR):
+    """``--profile [MODE]``, ``--profile-dir``, ``--profile-interval`` and ``--profile-memory``"""
+    group = parser.add_argument_group("profiling")
+    group.add_argument('--profile', nargs='?', const='sample', choices=MODES,
+                       help="Profile every cycle or chart: 'sample' (default, low overhead) or 'deterministic'")
+    group.add_argument('--profile-dir', default=default_dir,
+                       help="Directory for profiles (default: a new one under %(default)s)")
+    group.add_argument('--profile-interval', type=float, default=DEFAULT_INTERVAL,
+                       help="Seconds between stack samples (default: %(default)s)")
+    group.add_argument('--profile-memory', action='store_true',
+                       help="Also record tracemalloc snapshots (slows allocations down)")
+    return group
+
+
+def profiler_from_args(args, name, keep=None):
+    """Profiler configured by :func:`add_profile_arguments` (disabled without ``--profile``)"""
+    if not args.profile and not args.profile_memory:
+        return Profiler()
+    return Profiler(args.profile, run_directory(args.profile_dir, name), interval=args.profile_interval,
+                    memory=args.profile_memory, keep=keep)
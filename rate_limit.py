@@ -0,0 +1,204 @@
+"""
+Shared rate limiting for the tweet collector.
+
+All keywords collected by one process draw API requests from a single
+token bucket. When several keywords are waiting for a token, tokens are
+handed out round-robin by keyword, so one busy keyword cannot starve the
+others.
+
+The bucket is re-synced from the x-rate-limit-* headers of every API
+response, so requests are spread evenly over whatever quota is actually
+left in the current window instead of relying on fixed sleeps.
+AdaptiveInterval stretches or shrinks the pause between collection cycles
+based on how productive the last cycle was.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+
+import tweepy
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_WAIT_SECONDS = registry.histogram(
+    'collector_rate_limit_wait_seconds', "Time spent waiting for a rate limit token", ['keyword'])
+API_REQUEST_SECONDS = registry.histogram(
+    'collector_api_request_seconds', "Latency of search_recent_tweets requests", ['keyword'])
+RATE_LIMITED = registry.counter(
+    'collector_rate_limited_total', "Requests answered with 429 Too Many Requests", ['keyword'])
+
+
+class FairTokenBucket:
+    """
+    Token bucket with round-robin hand-out between keys.
+
+    ``rate`` tokens are added per second up to ``capacity``. ``acquire(key)``
+    blocks until a token is available and it is ``key``'s turn among the
+    keys currently waiting.
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = float(rate)
+        self.base_rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self._clock = clock
+        self._updated = clock()
+        self._condition = threading.Condition()
+        self._turns = deque()  # Keys waiting for a token, in the order they get one
+        self._waiting = {}
+        self.waited = 0.0  # Total seconds callers spent blocked
+
+    @classmethod
+    def per_window(cls, requests, window_seconds):
+        """Bucket allowing ``requests`` per ``window_seconds``, all usable in a burst"""
+        return cls(requests / window_seconds, requests)
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, key=None):
+        """Take one token for ``key``, waiting for it if necessary"""
+        start = self._clock()
+        with self._condition:
+            if self._waiting.get(key, 0) == 0:
+                self._turns.append(key)
+            self._waiting[key] = self._waiting.get(key, 0) + 1
+            try:
+                while True:
+                    self._refill()
+                    if self._turns[0] == key and self.tokens >= 1:
+                        self.tokens -= 1
+                        break
+                    if self._turns[0] == key:
+                        timeout = (1 - self.tokens) / self.rate
+                    else:
+                        timeout = None
+                    self._condition.wait(timeout)
+            finally:
+                self._waiting[key] -= 1
+                if self._turns and self._turns[0] == key:
+                    self._turns.popleft()
+                    if self._waiting[key] > 0:
+                        # More requests for this key go to the back of the line
+                        self._turns.append(key)
+                elif self._waiting[key] == 0 and key in self._turns:
+                    self._turns.remove(key)
+                self.waited += self._clock() - start
+                self._condition.notify_all()
+
+    def sync(self, remaining, reset_in):
+        """
+        Match the bucket to the quota the server reports.
+
+        The ``remaining`` requests (less one for requests still in flight)
+        are spread evenly over the ``reset_in`` seconds left in the window.
+        With no quota left, the bucket blocks until the window resets.
+        """
+        with self._condition:
+            self._refill()
+            reset_in = max(float(reset_in), 1.0)
+            usable = remaining - 1
+            if usable <= 0:
+                self.rate = self.base_rate
+                self.tokens = min(self.tokens, 0.0) - reset_in * self.rate
+            else:
+                self.tokens = min(self.tokens, 1.0)
+                self.rate = usable / reset_in
+            self._condition.notify_all()
+
+    def drain(self, seconds):
+        """Empty the bucket and block new tokens for ``seconds`` (e.g. after a 429)"""
+        with self._condition:
+            self._refill()
+            self.rate = self.base_rate
+            self.tokens = -seconds * self.rate
+            self._condition.notify_all()
+
+
+class RateLimitedClient:
+    """Wraps a tweepy-like client so every search request takes a token for ``key``"""
+
+    def __init__(self, client, bucket, key):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+
+    def search_recent_tweets(self, *args, **kwargs):
+        while True:
+            with RATE_LIMIT_WAIT_SECONDS.time(keyword=self.key):
+                self.bucket.acquire(self.key)
+            try:
+                with API_REQUEST_SECONDS.time(keyword=self.key):
+                    return self.client.search_recent_tweets(*args, **kwargs)
+            except tweepy.errors.TooManyRequests as e:
+                RATE_LIMITED.inc(keyword=self.key)
+                # The quota is shared, so every keyword backs off until the
+                # reset, after which the next acquire() lets this retry through
+                wait = seconds_until_reset(e.response)
+                logger.warning(f"Rate limit exceeded for {self.key!r}, resuming in {wait:.0f}s")
+                self.bucket.drain(wait)
+
+
+def seconds_until_reset(response, default=900):
+    """Seconds until the rate limit window in ``response``'s headers resets"""
+    try:
+        reset = int(response.headers['x-rate-limit-reset'])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return default
+    return max(0.0, reset - time.time())
+
+
+def install_rate_limit_hook(client, bucket):
+    """
+    Re-sync ``bucket`` from the rate limit headers of every response ``client`` receives.
+
+    Works with any client that sends requests through a ``requests.Session``
+    stored as ``client.session`` (tweepy.Client and FakeTwitterClient do).
+    """
+    session = getattr(client, 'session', None)
+    if session is None:
+        logger.warning("Client has no session; rate limit headers will be ignored")
+        return
+
+    def on_response(response, *args, **kwargs):
+        headers = response.headers
+        if 'x-rate-limit-remaining' in headers and 'x-rate-limit-reset' in headers:
+            try:
+                remaining = int(headers['x-rate-limit-remaining'])
+            except ValueError:
+                return
+            bucket.sync(remaining, seconds_until_reset(response))
+
+    session.hooks['response'].append(on_response)
+
+
+class AdaptiveInterval:
+    """
+    Pause between collection cycles, tuned by how many new tweets each cycle found.
+
+    A cycle that fills most of its ``target`` suggests tweets are piling up,
+    so the next pause is halved; a nearly empty cycle stretches it by half.
+    The interval always stays between ``minimum`` and ``maximum``.
+    """
+
+    def __init__(self, initial, minimum, maximum, target):
+        self.interval = float(initial)
+        self.minimum = float(minimum)
+        self.maximum = float(maximum)
+        self.target = max(int(target), 1)
+
+    def next(self, new_tweets):
+        """Return the pause before the next cycle after one that added ``new_tweets``"""
+        ratio = new_tweets / self.target
+        if ratio >= 0.8:
+            self.interval = max(self.minimum, self.interval * 0.5)
+        elif ratio < 0.2:
+            self.interval = min(self.maximum, self.interval * 1.5)
+        return self.interval
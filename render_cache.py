@@ -0,0 +1,77 @@
+"""
+Content-addressed cache for rendered charts.
+
+A chart's cache key hashes everything its output depends on: the storage
+fingerprint and time range of the data it was drawn from, the chart job
+and its arguments, and the source of the module that draws it (so changed
+chart code or parameters never serve an old image). When nothing changed
+since the previous run, the cached file is copied to the output directory
+instead of being rendered again.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Cached versions kept per chart; older ones are deleted when a new one is stored
+KEEP_VERSIONS = 3
+
+
+def file_digest(path):
+    """SHA-256 of a file's contents"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def cache_key(*parts):
+    """Stable hash of JSON-serializable ``parts``"""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class RenderCache:
+    """Rendered files stored under ``directory`` as ``<name>-<key><ext>``"""
+
+    def __init__(self, directory, keep=KEEP_VERSIONS):
+        self.directory = directory
+        self.keep = keep
+
+    def _path(self, name, key, filename):
+        return os.path.join(self.directory, f"{name}-{key}{os.path.splitext(filename)[1]}")
+
+    def fetch(self, name, key, destination):
+        """Copy the cached file for ``key`` to ``destination``; False if there is none"""
+        cached = self._path(name, key, destination)
+        if not os.path.exists(cached):
+            return False
+        os.makedirs(os.path.dirname(destination) or '.', exist_ok=True)
+        shutil.copyfile(cached, destination)
+        # Recently used versions survive pruning
+        os.utime(cached)
+        return True
+
+    def store(self, name, key, source):
+        """Keep a copy of the freshly rendered ``source`` under ``key``"""
+        os.makedirs(self.directory, exist_ok=True)
+        cached = self._path(name, key, source)
+        tmp_file = f"{cached}.{uuid.uuid4().hex}.tmp"
+        shutil.copyfile(source, tmp_file)
+        os.replace(tmp_file, cached)
+        self._prune(name)
+
+    def _prune(self, name):
+        prefix = f"{name}-"
+        versions = [os.path.join(self.directory, f) for f in os.listdir(self.directory)
+                    if f.startswith(prefix) and not f.endswith('.tmp')
+                    and len(os.path.splitext(f)[0]) == len(prefix) + 64]
+        versions.sort(key=os.path.getmtime, reverse=True)
+        for old in versions[self.keep:]:
+            try:
+                os.remove(old)
+            except OSError as e:
+                logger.warning(f"Could not remove old cached chart {old}: {e}")
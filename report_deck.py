@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Build sentiment report decks (PowerPoint) from the collected data.
+
+Examples:
+    python3 report_deck.py tweets_sentiment.csv
+    python3 report_deck.py tweets_sentiment.csv --all-keywords --periods 4 --output-dir decks
+    python3 report_deck.py tweets_sentiment.csv --keyword Gemini --start 2024-05-01 --end 2024-05-08
+
+Every number comes from the rollups the collector keeps next to the data
+(rollups.py), so a deck costs a few hundred hourly lookups instead of a
+pass over the tweets; charts of a deck's own numbers are native PowerPoint
+charts. Images already rendered by ``visualize_tweets.py batch`` (word
+clouds, timeline) are added from ``--charts-dir`` when present.
+
+Slides follow ``DECK_TEMPLATE`` and are laid out with the slide layouts of
+``--template`` (any .pptx, e.g. one with the company theme), or the
+python-pptx default. Decks for every keyword x period are built in parallel
+worker processes. Requires: pip install python-pptx
+"""
+
+import argparse
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from pptx import Presentation
+from pptx.chart.data import CategoryChartData
+from pptx.enum.chart import XL_CHART_TYPE, XL_LEGEND_POSITION
+from pptx.util import Inches
+
+from rollups import SentimentRollups, to_utc
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Slides of every deck, in order. Text is formatted with the report context
+# (see report_context); 'chart', 'table' and 'image' name what the slide shows.
+DECK_TEMPLATE = [
+    {'layout': 'Title Slide', 'title': "{scope} Sentiment Report",
+     'subtitle': "{period}\n{tweets:,} tweets"},
+    {'layout': 'Title and Content', 'title': "Key Numbers", 'bullets': 'key_numbers'},
+    {'layout': 'Title Only', 'title': "Sentiment Distribution", 'chart': 'sentiment_pie'},
+    {'layout': 'Title Only', 'title': "Sentiment Over Time", 'chart': 'daily_line'},
+    {'layout': 'Title Only', 'title': "Sentiment by Keyword", 'table': 'keyword_table'},
+    {'layout': 'Title Only', 'title': "Sentiment Over Time (all collected tweets)",
+     'image': 'sentiment_timeline.png'},
+    {'layout': 'Title Only', 'title': "Word Cloud - {sentiment} Tweets (all collected tweets)",
+     'image': 'wordcloud_{sentiment_lower}.png', 'each_sentiment': True},
+]
+
+# Fallback layout positions in the default python-pptx template
+DEFAULT_LAYOUTS = {'Title Slide': 0, 'Title and Content': 1, 'Title Only': 5}
+
+ALL_KEYWORDS = "All Keywords"
+
+
+def report_periods(rollups, periods=1, period_days=7, end=None):
+    """The last ``periods`` windows of ``period_days`` days, as ``(start, end)``, oldest first"""
+    if end is None:
+        hours = rollups.hourly_sentiment_counts().index
+        if len(hours) == 0:
+            return []
+        end = hours.max().floor('D') + pd.Timedelta(days=1)
+    end = to_utc(end).floor('h')
+    length = pd.Timedelta(days=period_days)
+    return [(end - length * (i + 1), end - length * i) for i in reversed(range(periods))]
+
+
+def report_context(rollups, keyword=None, start=None, end=None):
+    """Everything a deck shows for one keyword (None for all) and window, read from ``rollups``"""
+    counts = rollups.sentiment_counts(start, end, keyword)
+    tweets = int(counts.sum())
+    daily = rollups.daily_sentiment_counts(start, end, keyword)
+    polarity = rollups.mean_polarity(start, end, keyword).dropna()
+
+    if start is not None and end is not None:
+        period = f"{start:%b %d, %Y} - {end - pd.Timedelta(seconds=1):%b %d, %Y}"
+    elif len(daily) > 0:
+        period = f"{daily.index.min():%b %d, %Y} - {daily.index.max():%b %d, %Y}"
+    else:
+        period = "No tweets"
+
+    key_numbers = [f"Tweets: {tweets:,}"]
+    if start is not None and end is not None:
+        previous = int(rollups.sentiment_counts(start - (end - start), start, keyword).sum())
+        if previous:
+            key_numbers.append(f"Change vs previous period: {(tweets - previous) / previous * 100:+.1f}% "
+                               f"({previous:,} tweets)")
+    if tweets:
+        net = (counts.get('Positive', 0) - counts.get('Negative', 0)) / tweets
+        key_numbers.append(f"Net sentiment (positive - negative share): {net * 100:+.1f} points")
+        for sentiment, count in counts.items():
+            key_numbers.append(f"{sentiment}: {count:,} ({count / tweets * 100:.1f}%)"
+                               + (f", mean polarity {polarity[sentiment]:+.3f}" if sentiment in polarity else ""))
+    if len(daily) > 0:
+        busiest = daily.sum(axis=1)
+        key_numbers.append(f"Busiest day: {busiest.idxmax():%b %d} ({int(busiest.max()):,} tweets)")
+
+    keyword_table = None
+    if keyword is None and rollups.keywords:
+        keyword_table = pd.DataFrame({k: rollups.sentiment_counts(start, end, k) for k in rollups.keywords}).T
+        keyword_table = keyword_table.fillna(0).astype('int64')
+
+    return {
+        'scope': keyword or ALL_KEYWORDS,
+        'period': period,
+        'tweets': tweets,
+        'sentiment_counts': counts,
+        'daily': daily,
+        'key_numbers': key_numbers,
+        'keyword_table': keyword_table,
+    }
+
+
+def _layout(prs, name):
+    for layout in prs.slide_layouts:
+        if layout.name == name:
+            return layout
+    return prs.slide_layouts[DEFAULT_LAYOUTS[name]]
+
+
+def _content_box(prs):
+    """Left, top, width and height of the area below a slide title"""
+    return Inches(0.5), Inches(1.5), prs.slide_width - Inches(1), prs.slide_height - Inches(2)
+
+
+def _add_chart(prs, slide, name, context):
+    chart_data = CategoryChartData()
+    if name == 'sentiment_pie':
+        counts = context['sentiment_counts']
+        if len(counts) == 0:
+            return False
+        chart_data.categories = list(counts.index)
+        chart_data.add_series('Tweets', [int(n) for n in counts.values])
+        chart_type = XL_CHART_TYPE.PIE
+    else:
+        daily = context['daily']
+        if len(daily) == 0:
+            return False
+        chart_data.categories = [f"{day:%b %d}" for day in daily.index]
+        for sentiment in daily.columns:
+            chart_data.add_series(sentiment, [int(n) for n in daily[sentiment]])
+        chart_type = XL_CHART_TYPE.LINE_MARKERS
+    chart = slide.shapes.add_chart(chart_type, *_content_box(prs), chart_data).chart
+    chart.has_legend = True
+    chart.legend.position = XL_LEGEND_POSITION.BOTTOM
+    chart.legend.include_in_layout = False
+    if name == 'sentiment_pie':
+        chart.plots[0].has_data_labels = True
+        chart.plots[0].data_labels.show_percentage = True
+        chart.plots[0].data_labels.number_format = '0.0%'
+    return True
+
+
+def _add_table(prs, slide, table):
+    left, top, width, _ = _content_box(prs)
+    columns = ['Keyword'] + list(table.columns) + ['Total']
+    shape = slide.shapes.add_table(len(table) + 1, len(columns), left, top, width,
+                                   Inches(0.4) * (len(table) + 1))
+    cells = shape.table
+    for j, column in enumerate(columns):
+        cells.cell(0, j).text = str(column)
+    for i, (keyword, row) in enumerate(table.iterrows(), start=1):
+        values = [keyword] + [f"{n:,}" for n in row] + [f"{row.sum():,}"]
+        for j, value in enumerate(values):
+            cells.cell(i, j).text = str(value)
+
+
+def _add_image(prs, slide, path):
+    left, top, width, height = _content_box(prs)
+    picture = slide.shapes.add_picture(path, left, top, height=height)
+    if picture.width > width:
+        # Too wide at full height: fit the width instead, keeping the aspect ratio
+        picture.height = int(picture.height * width / picture.width)
+        picture.width = width
+    picture.left = int((prs.slide_width - picture.width) / 2)
+
+
+def build_deck(context, path, template=None, charts_dir=None):
+    """Write a deck for ``context`` (see report_context) to ``path`` following ``DECK_TEMPLATE``"""
+    prs = Presentation(template)
+    sentiments = list(context['sentiment_counts'].index)
+    for spec in DECK_TEMPLATE:
+        for sentiment in (sentiments if spec.get('each_sentiment') else [None]):
+            values = dict(context, sentiment=sentiment, sentiment_lower=(sentiment or '').lower())
+            image = None
+            if 'image' in spec:
+                # Rendered charts cover the whole dataset, so only add those that exist
+                image = os.path.join(charts_dir, spec['image'].format(**values)) if charts_dir else None
+                if image is None or not os.path.exists(image):
+                    continue
+            if 'table' in spec and context[spec['table']] is None:
+                continue
+
+            slide = prs.slides.add_slide(_layout(prs, spec['layout']))
+            slide.shapes.title.text = spec['title'].format(**values)
+            if 'subtitle' in spec:
+                slide.placeholders[1].text = spec['subtitle'].format(**values)
+            if 'bullets' in spec:
+                slide.placeholders[1].text = "\n".join(context[spec['bullets']])
+            if 'chart' in spec and not _add_chart(prs, slide, spec['chart'], context):
+                slide.shapes.title.text += " (no tweets)"
+            if 'table' in spec:
+                _add_table(prs, slide, context[spec['table']])
+            if image is not None:
+                _add_image(prs, slide, image)
+    prs.save(path)
+    return path
+
+
+def deck_filename(keyword=None, start=None, end=None):
+    scope = re.sub(r'\W+', '_', keyword).strip('_').lower() if keyword else 'all'
+    period = f"_{start:%Y%m%d}-{end:%Y%m%d}" if start is not None and end is not None else ""
+    return f"report_{scope or 'keyword'}{period}.pptx"
+
+
+def _build(rollups, keyword, start, end, output_dir, template, charts_dir):
+    """Build one deck and return ``(path, seconds, error message or None)``"""
+    began = time.perf_counter()
+    path = os.path.join(output_dir, deck_filename(keyword, start, end))
+    try:
+        build_deck(report_context(rollups, keyword, start, end), path, template=template,
+                   charts_dir=charts_dir)
+        error = None
+    except Exception as e:
+        logger.error(f"Could not build {path}: {e}")
+        error = str(e)
+    return path, time.perf_counter() - began, error
+
+
+_worker_rollups = None
+
+def _init_worker(rollups):
+    """Keep one copy of the rollups per worker process"""
+    global _worker_rollups
+    _worker_rollups = rollups
+
+def _build_in_worker(*args):
+    return _build(_worker_rollups, *args)
+
+
+def build_decks(rollups, keywords=(None,), periods=((None, None),), output_dir=".", template=None,
+                charts_dir=None, workers=1):
+    """
+    Build a deck from ``rollups`` for every keyword (None for all keywords) and ``(start, end)`` period.
+
+    Returns ``[(path, seconds, error)]``. With ``workers`` > 1 the decks are
+    built in parallel worker processes.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [(keyword, start, end, output_dir, template, charts_dir)
+            for keyword in keywords for start, end in periods]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(rollups,)) as executor:
+            return list(executor.map(_build_in_worker, *zip(*jobs)))
+    return [_build(rollups, *job) for job in jobs]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build sentiment report decks")
+    parser.add_argument('data', nargs='?', default='tweets_sentiment.csv',
+                        help="CSV file, Parquet directory or SQLite database")
+    parser.add_argument('--keyword', action='append', help="Build a deck for this keyword (repeatable)")
+    parser.add_argument('--all-keywords', action='store_true',
+                        help="Build a deck for every collected keyword, plus one for all of them")
+    parser.add_argument('--start', type=pd.Timestamp, help="Start of the report period")
+    parser.add_argument('--end', type=pd.Timestamp, help="End of the report period (exclusive)")
+    parser.add_argument('--periods', type=int,
+                        help="Build decks for this many consecutive periods ending at --end (or the last day)")
+    parser.add_argument('--period-days', type=int, default=7, help="Length of each period in days")
+    parser.add_argument('--template', help="PowerPoint file whose theme and slide layouts decks use")
+    parser.add_argument('--charts-dir', default=".",
+                        help="Directory with charts rendered by visualize_tweets.py (batch)")
+    parser.add_argument('--output-dir', default=".", help="Directory for the decks")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Processes building decks in parallel")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    # The collector owns the sidecar; a stale one is rebuilt here without writing over it
+    rollups = SentimentRollups.open(args.data)
+    if rollups is None:
+        rollups = SentimentRollups(args.data)
+        rollups.rebuild(save=False)
+    keywords = list(args.keyword or [])
+    if args.all_keywords:
+        keywords = [None] + rollups.keywords
+    if args.periods:
+        periods = report_periods(rollups, args.periods, args.period_days, args.end)
+    else:
+        # Rollups answer whole hours, so the period is widened to them
+        periods = [(to_utc(args.start).floor('h') if args.start is not None else None,
+                    to_utc(args.end).ceil('h') if args.end is not None else None)]
+
+    results = build_decks(rollups, keywords or [None], periods, output_dir=args.output_dir,
+                          template=args.template, charts_dir=args.charts_dir, workers=args.workers)
+
+    for path, seconds, error in results:
+        print(f"  {path:<60} {seconds:6.2f}s" + (f"  failed: {error}" if error else ""))
+    failed = sum(1 for _, _, error in results if error)
+    print(f"Built {len(results) - failed} decks in {time.perf_counter() - start:.2f}s"
+          + (f" ({failed} failed)" if failed else ""))
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Re-score collected tweets with one of the sentiment backends.
+
+Examples:
+    python3 rescore.py tweets_sentiment.csv --backend lexicon --output rescored.csv
+    python3 rescore.py tweets_sentiment.csv --backend lexicon --report
+
+``--report`` prints how often the chosen backend agrees with the labels
+already stored in the CSV (the TextBlob labels written by script.py's
+fetch_tweets), including a confusion matrix.
+"""
+
+import argparse
+import json
+import logging
+import os
+from collections import Counter
+
+import pandas as pd
+
+from sentiment_engine import BACKENDS, SentimentEngine, sentiment_label
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+LABELS = ["Positive", "Neutral", "Negative"]
+
+
+def rescore_csv(input_file, engine, output_file=None, chunksize=100_000):
+    """
+    Score every tweet in ``input_file`` and return agreement counts.
+
+    The returned Counter maps ``(stored_label, new_label)`` pairs to counts.
+    If ``output_file`` is given, the tweets are written there with the new
+    labels and a ``Polarity`` column.
+    """
+    confusion = Counter()
+    tmp_file = f"{output_file}.tmp" if output_file else None
+    first_chunk = True
+
+    for chunk in pd.read_csv(input_file, chunksize=chunksize):
+        polarities = engine.score_batch(chunk['Text'].fillna('').astype(str))
+        labels = [sentiment_label(p) for p in polarities]
+
+        if 'Sentiment' in chunk.columns:
+            confusion.update(zip(chunk['Sentiment'].fillna('Unknown'), labels))
+
+        if tmp_file:
+            chunk = chunk.assign(Sentiment=labels, Polarity=polarities)
+            chunk.to_csv(tmp_file, mode='w' if first_chunk else 'a',
+                         header=first_chunk, index=False)
+        first_chunk = False
+
+    if tmp_file:
+        os.replace(tmp_file, output_file)
+        logger.info(f"Saved re-scored tweets to {output_file}")
+
+    return confusion
+
+
+def agreement_report(confusion, backend):
+    """Build a JSON-friendly summary of a confusion Counter"""
+    total = sum(confusion.values())
+    agreed = sum(count for (stored, new), count in confusion.items() if stored == new)
+    matrix = {stored: {new: confusion.get((stored, new), 0) for new in LABELS}
+              for stored in LABELS}
+    return {
+        'backend': backend,
+        'tweets': total,
+        'agreement': agreed / total if total else None,
+        'confusion': matrix,
+    }
+
+
+def print_report(report):
+    print("\n" + "="*50)
+    print(f"AGREEMENT REPORT: {report['backend']} vs stored TextBlob labels")
+    print("="*50)
+    print(f"Tweets compared: {report['tweets']}")
+    if report['agreement'] is not None:
+        print(f"Label agreement: {report['agreement'] * 100:.1f}%")
+    print("\nRows = stored label, columns = new label")
+    print(f"{'':>10}" + "".join(f"{label:>10}" for label in LABELS))
+    for stored in LABELS:
+        row = report['confusion'][stored]
+        print(f"{stored:>10}" + "".join(f"{row[new]:>10}" for new in LABELS))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score collected tweets")
+    parser.add_argument('input', nargs='?', default='tweets_sentiment.csv', help="CSV file to score")
+    parser.add_argument('--backend', choices=BACKENDS, default='lexicon', help="Sentiment backend")
+    parser.add_argument('--output', help="Write re-scored tweets to this CSV file")
+    parser.add_argument('--report', action='store_true',
+                        help="Print agreement with the labels stored in the input")
+    parser.add_argument('--report-json', help="Also save the agreement report as JSON")
+    parser.add_argument('--workers', type=int, help="Worker processes for the textblob backend")
+    args = parser.parse_args()
+
+    with SentimentEngine(backend=args.backend, workers=args.workers) as engine:
+        confusion = rescore_csv(args.input, engine, output_file=args.output)
+
+    report = agreement_report(confusion, args.backend)
+    if args.report:
+        print_report(report)
+    if args.report_json:
+        with open(args.report_json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved: {args.report_json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Pre-aggregated rollups of the collected tweets for dashboards.
+
+The collector folds every batch it writes into per-hour and per-day counts
+by sentiment (with mean polarity), per-hour counts for every collection
+keyword and per-sentiment tweet-length histograms, kept in a small JSON
+sidecar next to the dataset. Charts and reports read these instead of
+regrouping the raw rows, so their cost depends on the number of hours
+covered rather than the number of tweets.
+
+Like the dedup index, the sidecar records the storage fingerprint it
+matches; a stale or missing sidecar is rebuilt from the stored tweets,
+including their polarity. Rows stored before the collector kept a
+Polarity column count towards the tweet totals but not the means.
+"""
+
+import numpy as np
+import pandas as pd
+
+from sidecar import Sidecar
+from tweet_summary import LENGTH_BIN_WIDTH, LENGTH_BINS
+
+ROLLUPS_SUFFIX = '.rollups.json'
+ROLLUPS_VERSION = 2
+
+HOUR_FORMAT = '%Y-%m-%dT%H'
+
+
+def _empty():
+    return {'totals': {}, 'hourly': {}, 'daily': {}, 'keywords': {}, 'lengths': {}}
+
+
+def _add(cell, count, polarity_sum, polarity_count):
+    cell['count'] = cell.get('count', 0) + int(count)
+    cell['polarity_sum'] = cell.get('polarity_sum', 0.0) + float(polarity_sum)
+    cell['polarity_count'] = cell.get('polarity_count', 0) + int(polarity_count)
+
+
+def to_utc(value):
+    """Timestamp in UTC; naive values are taken to be UTC already, like Created_At"""
+    value = pd.Timestamp(value)
+    return value.tz_localize('UTC') if value.tzinfo is None else value.tz_convert('UTC')
+
+
+def _mean_polarity(cell):
+    return cell['polarity_sum'] / cell['polarity_count'] if cell.get('polarity_count') else float('nan')
+
+
+class SentimentRollups(Sidecar):
+    """
+    Incrementally maintained counts, mean polarity and length histograms by sentiment.
+
+    ``storage`` is a storage backend or a path accepted by ``open_storage``.
+    Batches passed to ``update`` need Text, Sentiment and Created_At columns
+    and may carry Keyword and Polarity columns.
+    """
+
+    SUFFIX = ROLLUPS_SUFFIX
+    VERSION = ROLLUPS_VERSION
+    NAME = "rollups"
+
+    def _reset(self):
+        self._data = _empty()
+
+    def _count_stored(self, chunksize):
+        columns = ['Text', 'Sentiment', 'Created_At', 'Keyword', 'Polarity']
+        for chunk in self.storage.read_chunks(columns=columns, chunksize=chunksize):
+            self._fold(chunk)
+
+    def _payload(self):
+        return {'bin_width': LENGTH_BIN_WIDTH, **self._data}
+
+    def _restore(self, data):
+        if data.get('bin_width') != LENGTH_BIN_WIDTH:
+            return False
+        self._data = {key: data.get(key, {}) for key in _empty()}
+        return True
+
+    def update(self, df):
+        """Fold rows that were just appended to the storage into the rollups (``save`` persists them)"""
+        self._fold(df)
+
+    def _fold(self, df):
+        if len(df) == 0 or 'Sentiment' not in df.columns:
+            return
+        df = df.dropna(subset=['Sentiment'])
+        polarity = df['Polarity'] if 'Polarity' in df.columns else pd.Series(np.nan, index=df.index)
+        created_at = pd.to_datetime(df['Created_At'], errors='coerce', utc=True) \
+            if 'Created_At' in df.columns else pd.Series(pd.NaT, index=df.index)
+        lengths = df['Text'].astype(str).str.len() if 'Text' in df.columns else None
+        rows = pd.DataFrame({
+            'Sentiment': df['Sentiment'].astype(str),
+            'Polarity': pd.to_numeric(polarity, errors='coerce'),
+            'Hour': created_at.dt.strftime(HOUR_FORMAT),
+        }, index=df.index)
+        if 'Keyword' in df.columns:
+            rows['Keyword'] = df['Keyword']
+
+        def aggregate(keys):
+            return rows.groupby(keys).agg(count=('Sentiment', 'size'),
+                                          polarity_sum=('Polarity', 'sum'),
+                                          polarity_count=('Polarity', 'count'))
+
+        totals = aggregate(['Sentiment'])
+        hourly = aggregate(['Hour', 'Sentiment'])
+        keywords = aggregate(['Keyword', 'Hour', 'Sentiment']) if 'Keyword' in rows.columns else None
+        if lengths is not None:
+            bins = np.minimum(lengths.to_numpy() // LENGTH_BIN_WIDTH, LENGTH_BINS - 1)
+            histograms = pd.Series(bins, index=df.index).groupby(rows['Sentiment'])
+
+        with self._lock:
+            for sentiment, row in totals.iterrows():
+                _add(self._data['totals'].setdefault(sentiment, {}), *row)
+            for (hour, sentiment), row in hourly.iterrows():
+                _add(self._data['hourly'].setdefault(hour, {}).setdefault(sentiment, {}), *row)
+                _add(self._data['daily'].setdefault(hour[:10], {}).setdefault(sentiment, {}), *row)
+            if keywords is not None:
+                for (keyword, hour, sentiment), row in keywords.iterrows():
+                    keyword_hours = self._data['keywords'].setdefault(str(keyword), {})
+                    _add(keyword_hours.setdefault(hour, {}).setdefault(sentiment, {}), *row)
+            if lengths is not None:
+                for sentiment, sentiment_bins in histograms:
+                    counts = np.bincount(sentiment_bins.to_numpy().astype(np.int64), minlength=LENGTH_BINS)
+                    current = self._data['lengths'].get(sentiment, [0] * LENGTH_BINS)
+                    self._data['lengths'][sentiment] = [a + int(b) for a, b in zip(current, counts)]
+
+    @staticmethod
+    def can_answer(start=None, end=None):
+        """Ranges can be answered from hourly buckets only if they start and end on the hour"""
+        for value in (start, end):
+            if value is not None and to_utc(value) != to_utc(value).floor('h'):
+                return False
+        return True
+
+    @property
+    def keywords(self):
+        """Collection keywords with counted tweets"""
+        with self._lock:
+            return sorted(self._data['keywords'])
+
+    def _hours(self, start=None, end=None, keyword=None):
+        """Hourly buckets (of all tweets or of one ``keyword``) with ``start <= hour < end``"""
+        start = to_utc(start).strftime(HOUR_FORMAT) if start is not None else None
+        end = to_utc(end).strftime(HOUR_FORMAT) if end is not None else None
+        hourly = self._data['hourly'] if keyword is None else self._data['keywords'].get(keyword, {})
+        return {hour: cells for hour, cells in hourly.items()
+                if (start is None or hour >= start) and (end is None or hour < end)}
+
+    def _totals(self, start=None, end=None, keyword=None):
+        """Cells per sentiment summed over a range and/or keyword"""
+        if start is None and end is None and keyword is None:
+            return self._data['totals']
+        totals = {}
+        for cells in self._hours(start, end, keyword).values():
+            for sentiment, cell in cells.items():
+                _add(totals.setdefault(sentiment, {}), cell['count'], cell['polarity_sum'], cell['polarity_count'])
+        return totals
+
+    def sentiment_counts(self, start=None, end=None, keyword=None):
+        """Tweets per sentiment as a Series ordered like ``value_counts``"""
+        with self._lock:
+            counts = {s: cell['count'] for s, cell in self._totals(start, end, keyword).items()}
+        counts = pd.Series(counts, dtype='int64').sort_values(ascending=False)
+        counts.index.name = 'Sentiment'
+        return counts.rename('count')
+
+    def _table(self, buckets, value, index_name):
+        table = pd.DataFrame({bucket: {s: value(cell) for s, cell in cells.items()}
+                              for bucket, cells in buckets.items()}).T
+        if len(table) == 0:
+            return pd.DataFrame()
+        table.index.name = index_name
+        table.columns.name = 'Sentiment'
+        return table.sort_index()[sorted(table.columns)]
+
+    def daily_sentiment_counts(self, start=None, end=None, keyword=None):
+        """Date x Sentiment table of tweet counts"""
+        with self._lock:
+            if start is None and end is None and keyword is None:
+                buckets = self._data['daily']
+            else:
+                buckets = {}
+                for hour, cells in self._hours(start, end, keyword).items():
+                    day = buckets.setdefault(hour[:10], {})
+                    for sentiment, cell in cells.items():
+                        _add(day.setdefault(sentiment, {}), cell['count'], cell['polarity_sum'],
+                             cell['polarity_count'])
+            table = self._table(buckets, lambda cell: cell['count'], 'Date')
+        if len(table) == 0:
+            return table
+        table.index = pd.to_datetime(table.index).date
+        table.index.name = 'Date'
+        return table.fillna(0).astype('int64')
+
+    def hourly_sentiment_counts(self, start=None, end=None):
+        """Hour x Sentiment table of tweet counts"""
+        with self._lock:
+            table = self._table(self._hours(start, end), lambda cell: cell['count'], 'Hour')
+        if len(table) == 0:
+            return table
+        table.index = pd.to_datetime(table.index, format=HOUR_FORMAT, utc=True)
+        table.index.name = 'Hour'
+        return table.fillna(0).astype('int64')
+
+    def daily_mean_polarity(self):
+        """Date x Sentiment table of mean polarity (NaN where no polarity was recorded)"""
+        with self._lock:
+            table = self._table(self._data['daily'], _mean_polarity, 'Date')
+        if len(table) > 0:
+            table.index = pd.to_datetime(table.index).date
+            table.index.name = 'Date'
+        return table
+
+    def mean_polarity(self, start=None, end=None, keyword=None):
+        """Mean polarity per sentiment over the tweets with a recorded polarity"""
+        with self._lock:
+            return pd.Series({s: _mean_polarity(cell) for s, cell in self._totals(start, end, keyword).items()},
+                             dtype='float64')
+
+    def polarity_totals(self):
+        """``{sentiment: (polarity sum, tweets with a polarity)}`` over all tweets"""
+        with self._lock:
+            return {s: (cell['polarity_sum'], cell['polarity_count']) for s, cell in self._data['totals'].items()}
+
+    def length_bins(self, sentiment=None):
+        """Left edges of the tweet-length bins and the counts for one or all sentiments"""
+        with self._lock:
+            histograms = self._data['lengths']
+            if sentiment is not None:
+                counts = np.asarray(histograms.get(sentiment, [0] * LENGTH_BINS), dtype=np.int64)
+            else:
+                counts = np.zeros(LENGTH_BINS, dtype=np.int64)
+                for histogram in histograms.values():
+                    counts += np.asarray(histogram, dtype=np.int64)
+        return np.arange(LENGTH_BINS) * LENGTH_BIN_WIDTH, counts
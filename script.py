@@ -1,11 +1,23 @@
 import tweepy
-from textblob import TextBlob
 import pandas as pd
+import argparse
 import time
 import logging
-import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from dataset_state import DatasetState
+from live_feed import LiveFeedPublisher
+from metrics import MetricsServer, registry
+from pipeline import CollectionPipeline
+from profiling import Profiler, add_profile_arguments, profiler_from_args
+from rate_limit import (AdaptiveInterval, FairTokenBucket, RateLimitedClient,
+                        install_rate_limit_hook, seconds_until_reset)
+from sentiment_cache import SentimentCache
+from sentiment_engine import SentimentEngine
+from storage import open_storage
+from watermarks import QueryWatermarks
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -14,52 +26,95 @@ logger = logging.getLogger(__name__)
 # Get your Bearer Token from https://developer.twitter.com/
 BEARER_TOKEN = 'AAAAAAAAAAAAAAAAAAAAAOrs2QEAAAAA4G82iP05YgAsgHfHtF%2BbGJGru4Q%3Dbw9gSZhXzVIZrEJM4UyKk4h4D62rqF2aWMisET7ya6gUlVoN38'
 
-# Set up Tweepy client with wait_on_rate_limit=True
-client = tweepy.Client(bearer_token=BEARER_TOKEN, wait_on_rate_limit=True)
+# Set up Tweepy client. Rate limits are handled by our own scheduler (see
+# rate_limit.py), so tweepy must not add its own sleeps on top of it.
+client = tweepy.Client(bearer_token=BEARER_TOKEN, wait_on_rate_limit=False)
+
+# Collector metrics, served on /metrics while main_loop runs (see metrics.py)
+TWEETS_FETCHED = registry.counter('collector_tweets_fetched_total', "Tweets returned by the API", ['keyword'])
+TWEETS_KEPT = registry.counter('collector_tweets_kept_total', "English tweets passed on for scoring", ['keyword'])
+TWEETS_ADDED = registry.counter('collector_tweets_added_total', "New unique tweets written", ['keyword'])
+TWEETS_DUPLICATE = registry.counter('collector_tweets_duplicate_total', "Fetched tweets dropped as duplicates",
+                                    ['keyword'])
+SCORE_SECONDS = registry.histogram('collector_score_seconds', "Time to score one page of tweets")
+DEDUP_SECONDS = registry.histogram('collector_dedup_seconds', "Time to filter one batch against the dedup index")
+WRITE_SECONDS = registry.histogram('collector_write_seconds', "Time to append one batch to the storage")
+STATE_UPDATE_SECONDS = registry.histogram('collector_state_update_seconds',
+                                          "Time to update the dedup index, rollups and word counts")
+CYCLE_SECONDS = registry.histogram('collector_cycle_seconds', "Duration of a collection cycle (without the sleep)")
+CYCLES = registry.counter('collector_cycles_total', "Completed collection cycles")
+DATASET_ROWS = registry.gauge('collector_dataset_rows', "Tweets in the dataset")
+SENTIMENT_CACHE_HIT_RATE = registry.gauge('collector_sentiment_cache_hit_rate', "Sentiment cache hit rate")
+SLEEP_SECONDS = registry.gauge('collector_sleep_seconds', "Pause before the next collection cycle")
 
-# Function to load existing tweets from CSV to avoid duplicates
+# Function to load existing tweets (CSV file or Parquet directory)
 def load_existing_tweets(csv_file):
-    if os.path.exists(csv_file):
+    storage = open_storage(csv_file)
+    if storage.exists():
         try:
-            existing_df = pd.read_csv(csv_file)
+            existing_df = storage.read()
             logger.info(f"Loaded {len(existing_df)} existing tweets from {csv_file}")
             return existing_df
         except Exception as e:
-            logger.warning(f"Error loading existing CSV: {e}")
+            logger.warning(f"Error loading existing tweets: {e}")
             return pd.DataFrame()
     else:
-        logger.info(f"No existing CSV file found at {csv_file}")
+        logger.info(f"No existing tweets found at {csv_file}")
         return pd.DataFrame()
 
-# Function to append new tweets to CSV
-def append_tweets_to_csv(new_df, csv_file, existing_df=None):
-    if existing_df is None:
-        existing_df = load_existing_tweets(csv_file)
-    
-    if len(existing_df) > 0:
-        # Remove duplicates based on tweet text
-        combined_df = pd.concat([existing_df, new_df], ignore_index=True)
-        # Drop duplicates based on text content
-        combined_df = combined_df.drop_duplicates(subset=['Text'], keep='first')
-        new_tweets_added = len(combined_df) - len(existing_df)
-        logger.info(f"Added {new_tweets_added} new unique tweets (removed {len(new_df) - new_tweets_added} duplicates)")
-    else:
-        combined_df = new_df
-        logger.info(f"Created new CSV with {len(combined_df)} tweets")
+# Function to append new tweets to storage
+def append_tweets(new_df, storage, state=None):
+    """
+    Append the new unique tweets to ``storage`` and return the rows that were written.
     
-    # Add timestamp for when data was collected
-    if 'Collection_Time' not in combined_df.columns:
-        combined_df['Collection_Time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    ``storage`` is a storage backend or a path (a .csv file or a Parquet directory).
+    A long-lived ``state`` is saved by its owner once per cycle; without one,
+    a temporary state is loaded and its sidecars are saved right away.
+    """
+    storage = open_storage(storage)
+    temporary_state = state is None
+    if temporary_state:
+        state = DatasetState(storage)
     
-    # Save to CSV
-    combined_df.to_csv(csv_file, index=False)
-    logger.info(f"Saved {len(combined_df)} total tweets to {csv_file}")
+    # Several keywords may write to the same storage concurrently
+    with state.lock:
+        # Drop duplicates within the batch and against everything already stored
+        with DEDUP_SECONDS.time():
+            added_df = new_df[state.dedup_index.filter_new(new_df)].copy()
+        
+        # Add timestamp for when data was collected
+        added_df['Collection_Time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        
+        # Only the new rows are written; existing data is never rewritten
+        with WRITE_SECONDS.time():
+            storage.append(added_df)
+        with STATE_UPDATE_SECONDS.time():
+            state.update(added_df)
+        DATASET_ROWS.set(state.row_count)
+        logger.info(f"Added {len(added_df)} new unique tweets (removed {len(new_df) - len(added_df)} duplicates)")
+        logger.info(f"Saved {state.row_count} total tweets to {storage.path}")
+        if temporary_state:
+            state.save()
     
-    return combined_df
+    return added_df
 
-# Function to search recent tweets by keyword with rate limiting
-def fetch_tweets(keyword, max_results=100):
-    tweet_data = []
+# Older name, kept for existing callers
+append_tweets_to_csv = append_tweets
+
+# Function to page through recent tweets by keyword with rate limiting
+def iter_tweet_pages(keyword, max_results=100, api_client=None, since_id=None, until_id=None,
+                     progress=None):
+    """
+    Yield one list of English tweets per page of search results.
+    
+    Only tweets with ``since_id < id < until_id`` are requested when those are
+    given. If ``progress`` is a dict, it is filled with the newest and oldest
+    tweet IDs seen, whether the results were exhausted and whether an error
+    cut the run short.
+    """
+    api_client = api_client or client
+    progress = progress if progress is not None else {}
+    progress.update(newest_id=None, oldest_id=None, exhausted=False, error=False)
     tweets_collected = 0
     next_token = None
     
@@ -73,29 +128,31 @@ def fetch_tweets(keyword, max_results=100):
             logger.info(f"Fetching batch of {batch_size} tweets... (Total collected: {tweets_collected})")
             
             #API request
-            response = client.search_recent_tweets(
+            response = api_client.search_recent_tweets(
                 query=keyword, 
                 max_results=batch_size, 
                 tweet_fields=["created_at", "lang"],
-                next_token=next_token
+                next_token=next_token,
+                since_id=since_id,
+                until_id=until_id
             )
             
             # Check if we got any tweets
             if not response.data:
                 logger.info("No more tweets available")
+                progress['exhausted'] = True
                 break
             
-            # Process tweets
-            for tweet in response.data:
-                if tweet.lang == "en":
-                    text = tweet.text
-                    sentiment = TextBlob(text).sentiment.polarity
-                    sentiment_label = "Positive" if sentiment > 0 else "Negative" if sentiment < 0 else "Neutral"
-                    tweet_data.append({
-                        "Text": text, 
-                        "Sentiment": sentiment_label,
-                        "Created_At": tweet.created_at if hasattr(tweet, 'created_at') else None
-                    })
+            # Results come newest first, so the first page holds the newest ID
+            page_ids = [tweet.id for tweet in response.data]
+            if progress['newest_id'] is None:
+                progress['newest_id'] = max(page_ids)
+            progress['oldest_id'] = min(page_ids)
+            
+            page = [tweet for tweet in response.data if tweet.lang == "en"]
+            TWEETS_FETCHED.inc(len(response.data), keyword=keyword)
+            TWEETS_KEPT.inc(len(page), keyword=keyword)
+            yield page
             
             tweets_collected += len(response.data)
             
@@ -104,40 +161,205 @@ def fetch_tweets(keyword, max_results=100):
                 next_token = response.meta['next_token']
             else:
                 logger.info("No more tweets available (no next_token)")
+                progress['exhausted'] = True
                 break
-                
-            # Add a small delay between requests to be respectful
-            time.sleep(1)
             
         except tweepy.errors.TooManyRequests as e:
-            logger.warning("Rate limit exceeded. Waiting...")
-            # If wait_on_rate_limit doesn't work, manually wait
-            time.sleep(900)  # Wait 15 minutes
+            # Only reached with a client that is not wrapped in RateLimitedClient
+            wait = seconds_until_reset(e.response)
+            logger.warning(f"Rate limit exceeded. Waiting {wait:.0f} seconds until reset...")
+            time.sleep(wait)
             continue
             
         except Exception as e:
             logger.error(f"Error fetching tweets: {e}")
+            progress['error'] = True
             break
+
+# Function to score one page of tweets
+def score_tweets(tweets):
+    """Score a page of tweets in one batch and return them as a DataFrame"""
+    with SCORE_SECONDS.time():
+        polarities, labels = sentiment_engine.label_batch([tweet.text for tweet in tweets])
+    tweet_data = []
+    for tweet, polarity, sentiment_label in zip(tweets, polarities, labels):
+        tweet_data.append({
+            "Text": tweet.text, 
+            "Sentiment": sentiment_label,
+            "Created_At": tweet.created_at if hasattr(tweet, 'created_at') else None,
+            "Tweet_ID": str(tweet.id),
+            "Polarity": polarity
+        })
+    return pd.DataFrame(tweet_data, columns=["Text", "Sentiment", "Created_At", "Tweet_ID", "Polarity"])
+
+# Function to search recent tweets by keyword with rate limiting
+def fetch_tweets(keyword, max_results=100, api_client=None, since_id=None):
+    pages = iter_tweet_pages(keyword, max_results, api_client, since_id=since_id)
+    frames = [score_tweets(page) for page in pages]
+    tweet_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    logger.info(f"Total tweets collected: {len(tweet_df)}")
+    return tweet_df
+
+# Function to run pages of tweets through the fetch -> score -> write pipeline
+def _run_collection(pages, keyword, storage, state):
+    fetched = 0
+    
+    def write_batch(batch_df):
+        nonlocal fetched
+        fetched += len(batch_df)
+        if len(batch_df) == 0:
+            return batch_df
+        added_df = append_tweets(batch_df.assign(Keyword=keyword), storage, state)
+        TWEETS_ADDED.inc(len(added_df), keyword=keyword)
+        TWEETS_DUPLICATE.inc(len(batch_df) - len(added_df), keyword=keyword)
+        # Let a live dashboard (visualize_tweets.py serve) show the batch right away
+        live_feed.publish(added_df)
+        return added_df
+    
+    pipeline = CollectionPipeline(score_tweets, write_batch, queue_size=PIPELINE_QUEUE_SIZE)
+    added = pipeline.run(pages)
+    return fetched, added
+
+# Function to fetch, score and save tweets with the stages overlapping
+def collect_tweets(keyword, storage, state, max_results=100, api_client=None, watermarks=None,
+                   backfill_results=0):
+    """
+    Run one collection cycle through the fetch -> score -> write pipeline.
+    
+    With ``watermarks``, only tweets newer than the last collected one are
+    requested, and up to ``backfill_results`` tweets are then spent filling
+    the most recent gap left by an earlier cycle that could not catch up.
+    
+    Returns ``(fetched, added_df)``: the number of English tweets fetched and
+    the new unique rows that were written to ``storage``. Rows are tagged
+    with the keyword that found them.
+    """
+    since_id = watermarks.newest_id(keyword) if watermarks else None
+    progress = {}
+    pages = iter_tweet_pages(keyword, max_results, api_client, since_id=since_id, progress=progress)
+    fetched, added = _run_collection(pages, keyword, storage, state)
+    
+    if watermarks:
+        watermarks.record_fetch(keyword, since_id, progress)
+        
+        gap = watermarks.next_gap(keyword)
+        if gap and backfill_results > 0:
+            logger.info(f"Backfilling {keyword!r} between tweets {gap[0]} and {gap[1]}")
+            progress = {}
+            pages = iter_tweet_pages(keyword, backfill_results, api_client,
+                                     since_id=gap[0], until_id=gap[1], progress=progress)
+            backfill_fetched, backfill_added = _run_collection(pages, keyword, storage, state)
+            fetched += backfill_fetched
+            added += backfill_added
+            watermarks.record_backfill(keyword, gap, progress)
     
-    logger.info(f"Total tweets collected: {len(tweet_data)}")
-    return pd.DataFrame(tweet_data)
+    added_df = pd.concat(added, ignore_index=True) if added else pd.DataFrame()
+    logger.info(f"Total tweets collected: {fetched}")
+    return fetched, added_df
+
+# Function to collect several keywords at once under one rate limit
+def collect_keywords(keywords, storage, state, max_results=100, api_client=None, bucket=None,
+                     watermarks=None, backfill_results=0):
+    """
+    Run a collection cycle for every keyword concurrently.
+    
+    All keywords share ``bucket`` (the process-wide rate limiter by default),
+    which hands out requests round-robin so a busy keyword cannot starve the
+    others. Returns ``{keyword: (fetched, added_df)}``.
+    """
+    api_client = api_client or client
+    bucket = bucket or rate_limit_bucket
+    
+    with ThreadPoolExecutor(max_workers=len(keywords)) as executor:
+        futures = {
+            keyword: executor.submit(collect_tweets, keyword, storage, state, max_results,
+                                     RateLimitedClient(api_client, bucket, keyword),
+                                     watermarks, backfill_results)
+            for keyword in keywords
+        }
+    return {keyword: future.result() for keyword, future in futures.items()}
 
 # Configuration
-KEYWORD = "AI"
+KEYWORDS = ["AI"]  # Queries to track; all of them share one rate limit
 CSV_FILE = "tweets_sentiment.csv"
-MAX_RESULTS = 10  # Start small due to rate limits
-SLEEP_INTERVAL = 300  # Sleep for 5 minutes between cycles (300 seconds)
+PARQUET_DIR = "tweets_sentiment_parquet"
+SQLITE_FILE = "tweets_sentiment.db"
+STORAGE_BACKEND = "csv"  # "csv" (CSV_FILE), "parquet" (PARQUET_DIR, needs pyarrow) or "sqlite" (SQLITE_FILE)
+DATA_PATH = {"csv": CSV_FILE, "parquet": PARQUET_DIR, "sqlite": SQLITE_FILE}[STORAGE_BACKEND]
+MAX_RESULTS = 10  # Start small due to rate limits (per keyword)
+BACKFILL_RESULTS = 10  # Extra tweets per keyword per cycle spent filling gaps after downtime
+REQUESTS_PER_WINDOW = 450  # search_recent_tweets requests allowed per window
+RATE_LIMIT_WINDOW = 900  # Rate limit window in seconds (15 minutes)
+SLEEP_INTERVAL = 300  # Initial sleep between cycles (5 minutes), adapted as we go
+MIN_SLEEP_INTERVAL = 30  # Never sleep less than this between cycles
+MAX_SLEEP_INTERVAL = 1800  # Never sleep more than this between cycles
+PIPELINE_QUEUE_SIZE = 4  # Max pages buffered between the fetch, score and write stages
+SENTIMENT_BACKEND = "textblob"  # "textblob" or the faster, approximate "lexicon"
+SENTIMENT_CACHE_FILE = "sentiment_cache.json"  # Set to None to keep the cache in memory only
+SENTIMENT_CACHE_SIZE = 100000  # Max number of cached scores
+LIVE_FEED_PORT = 8766  # Local UDP port new batches are announced on (None to disable)
+METRICS_PORT = 9108  # Local HTTP port Prometheus metrics are served on (0 for any free port, None to disable)
+METRICS_TRACE_FILE = None  # e.g. "collector_metrics.jsonl" to log every metric update as JSON lines
+PROFILE_KEEP = 100  # With --profile, only the profiles of the last this many cycles are kept
+
+# Shared rate limiter for all keywords, kept in sync with the quota the API reports
+rate_limit_bucket = FairTokenBucket.per_window(REQUESTS_PER_WINDOW, RATE_LIMIT_WINDOW)
+install_rate_limit_hook(client, rate_limit_bucket)
+
+# Sentiment scoring engine (spreads large batches over a process pool and
+# scores repeated content such as retweets only once)
+sentiment_cache = SentimentCache(max_size=SENTIMENT_CACHE_SIZE, path=SENTIMENT_CACHE_FILE,
+                                 backend=SENTIMENT_BACKEND)
+sentiment_engine = SentimentEngine(backend=SENTIMENT_BACKEND, cache=sentiment_cache)
+
+# Announces written batches to a live dashboard, if one is listening
+live_feed = LiveFeedPublisher(port=LIVE_FEED_PORT)
 
-def main_loop():
-    """Main loop that runs continuously until keyboard interrupt"""
+def main_loop(profiler=None):
+    """
+    Main loop that runs continuously until keyboard interrupt.
+    
+    With a ``profiler`` (see profiling.py), every cycle is profiled as ``cycle-NNNN``.
+    """
+    profiler = profiler or Profiler()
     cycle_count = 0
     
     print("Starting continuous tweet collection...")
-    print(f"Keyword: {KEYWORD}")
+    print(f"Keywords: {', '.join(KEYWORDS)}")
     print(f"Max results per cycle: {MAX_RESULTS}")
-    print(f"Sleep interval: {SLEEP_INTERVAL} seconds")
+    print(f"Sleep interval: {SLEEP_INTERVAL} seconds (adapts between {MIN_SLEEP_INTERVAL} and {MAX_SLEEP_INTERVAL})")
+    print(f"Sentiment backend: {SENTIMENT_BACKEND}")
+    print(f"Storage: {DATA_PATH} ({STORAGE_BACKEND})")
+    if profiler.enabled:
+        print(f"Profiling every cycle ({profiler.mode or 'memory only'}) into {profiler.output_dir}")
     print("Press Ctrl+C to stop\n")
     
+    # Dataset state is loaded once and kept up to date as batches are added
+    storage = open_storage(DATA_PATH, STORAGE_BACKEND)
+    state = DatasetState(storage)
+    DATASET_ROWS.set(state.row_count)
+    
+    # Metrics for Prometheus (or curl) and, optionally, a trace of every update
+    # (never a reason to stop collecting: a taken port or unwritable trace file only logs a warning)
+    metrics_server = None
+    if METRICS_PORT is not None:
+        try:
+            metrics_server = MetricsServer(port=METRICS_PORT).start()
+            print(f"Metrics: {metrics_server.url}")
+        except OSError as e:
+            logger.warning(f"Could not serve metrics on port {METRICS_PORT}, continuing without them: {e}")
+    try:
+        registry.trace_to(METRICS_TRACE_FILE)
+    except OSError as e:
+        logger.warning(f"Could not open metrics trace {METRICS_TRACE_FILE}, continuing without it: {e}")
+    
+    # Newest collected tweet ID per keyword, so each cycle only asks for newer tweets
+    watermarks = QueryWatermarks.for_dataset(DATA_PATH)
+    
+    # The pause between cycles adapts to how many new tweets each cycle finds
+    sleep_interval = AdaptiveInterval(SLEEP_INTERVAL, MIN_SLEEP_INTERVAL, MAX_SLEEP_INTERVAL,
+                                      target=MAX_RESULTS * len(KEYWORDS))
+    
     try:
         while True:
             cycle_count += 1
@@ -145,38 +367,51 @@ def main_loop():
             print(f"CYCLE {cycle_count} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
             print(f"{'='*50}")
             
-            # Load existing data
-            existing_df = load_existing_tweets(CSV_FILE)
-            print(f"Currently have {len(existing_df)} tweets in the dataset")
-            
-            # Fetch new tweets
-            print(f"Fetching up to {MAX_RESULTS} new tweets for keyword: {KEYWORD}")
-            new_df = fetch_tweets(KEYWORD, max_results=MAX_RESULTS)
+            print(f"Currently have {state.row_count} tweets in the dataset")
             
-            if len(new_df) > 0:
-                print(f"Fetched {len(new_df)} new tweets")
-                print("Sample of new tweets:")
-                print(new_df.head())
+            # Everything up to the sleep is profiled as one cycle (a no-op without --profile)
+            with profiler.profile(f"cycle-{cycle_count:04d}"):
+                # Fetch, score and save new tweets for every keyword (the stages overlap)
+                print(f"Fetching up to {MAX_RESULTS} new tweets for keywords: {', '.join(KEYWORDS)}")
+                with CYCLE_SECONDS.time():
+                    results = collect_keywords(KEYWORDS, storage, state, max_results=MAX_RESULTS,
+                                               watermarks=watermarks, backfill_results=BACKFILL_RESULTS)
+                fetched = sum(keyword_fetched for keyword_fetched, _ in results.values())
+                added = sum(len(added_df) for _, added_df in results.values())
                 
-                # Append to existing data
-                combined_df = append_tweets_to_csv(new_df, CSV_FILE, existing_df)
+                if fetched > 0:
+                    print(f"Fetched {fetched} new tweets")
+                    for keyword, (keyword_fetched, added_df) in results.items():
+                        print(f"\n[{keyword}] fetched {keyword_fetched}, added {len(added_df)}")
+                        if len(added_df) > 0:
+                            print(added_df.head())
+                    
+                    print(f"\n=== CYCLE {cycle_count} SUMMARY ===")
+                    print(f"Total tweets in dataset: {state.row_count}")
+                    print(f"New tweets added this cycle: {added}")
+                    print(f"Saved to: {DATA_PATH}")
+                    
+                    # Show sentiment distribution
+                    print(f"\nSentiment distribution:")
+                    print(state.sentiment_value_counts())
+                else:
+                    print("No new tweets fetched this cycle")
                 
-                print(f"\n=== CYCLE {cycle_count} SUMMARY ===")
-                print(f"Total tweets in dataset: {len(combined_df)}")
-                print(f"New tweets added this cycle: {len(combined_df) - len(existing_df)}")
-                print(f"Saved to: {CSV_FILE}")
+                # Persist cached scores and word counts so they survive a restart
+                sentiment_cache.save()
+                state.save()
+                cache_stats = sentiment_cache.stats()
+                SENTIMENT_CACHE_HIT_RATE.set(cache_stats['hit_rate'])
+                CYCLES.inc()
+                print(f"Sentiment cache: {cache_stats['size']} entries, "
+                      f"{cache_stats['hit_rate'] * 100:.1f}% hit rate ({cache_stats['hits']} hits, {cache_stats['misses']} misses)")
                 
-                # Show sentiment distribution
-                if 'Sentiment' in combined_df.columns:
-                    print(f"\nSentiment distribution:")
-                    print(combined_df['Sentiment'].value_counts())
-            else:
-                print("No new tweets fetched this cycle")
-            
             # Sleep before next cycle
-            print(f"\nSleeping for {SLEEP_INTERVAL} seconds before next cycle...")
-            print(f"Next cycle will start at: {datetime.fromtimestamp(time.time() + SLEEP_INTERVAL).strftime('%Y-%m-%d %H:%M:%S')}")
-            time.sleep(SLEEP_INTERVAL)
+            interval = sleep_interval.next(added)
+            SLEEP_SECONDS.set(interval)
+            print(f"\nSleeping for {interval:.0f} seconds before next cycle...")
+            print(f"Next cycle will start at: {datetime.fromtimestamp(time.time() + interval).strftime('%Y-%m-%d %H:%M:%S')}")
+            time.sleep(interval)
             
     except KeyboardInterrupt:
         print(f"\n\n{'='*50}")
@@ -185,19 +420,35 @@ def main_loop():
         print(f"Total cycles completed: {cycle_count}")
         
         # Show final statistics
-        final_df = load_existing_tweets(CSV_FILE)
-        print(f"Final dataset contains {len(final_df)} tweets")
-        if len(final_df) > 0 and 'Sentiment' in final_df.columns:
+        print(f"Final dataset contains {state.row_count} tweets")
+        if state.row_count > 0 and state.sentiment_counts:
             print(f"\nFinal sentiment distribution:")
-            print(final_df['Sentiment'].value_counts())
+            print(state.sentiment_value_counts())
         
-        print(f"\nData saved in: {CSV_FILE}")
+        print(f"\nData saved in: {DATA_PATH}")
         print("Script terminated gracefully.")
     
     except Exception as e:
         print(f"\nUnexpected error occurred: {e}")
         logger.error(f"Unexpected error in main loop: {e}")
         print("Script terminated due to error.")
+    
+    finally:
+        # An interrupted cycle's rollups, word counts and cached scores are only in memory
+        try:
+            state.save()
+        except Exception as e:
+            logger.error(f"Could not save the dataset state: {e}")
+        try:
+            sentiment_cache.save()
+        except Exception as e:
+            logger.error(f"Could not save the sentiment cache: {e}")
+        if metrics_server:
+            metrics_server.stop()
+        registry.trace_to(None)
 
 if __name__ == "__main__":
-    main_loop()
+    parser = argparse.ArgumentParser(description="Collect tweets and score their sentiment until interrupted")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    main_loop(profiler=profiler_from_args(args, "collector", keep=PROFILE_KEEP))
@@ -0,0 +1,117 @@
+"""
+LRU cache for sentiment scores.
+
+Retweets and copy-paste spam repeat the same content many times. Scores are
+cached under a key built from the tweet text with "RT @user:" prefixes and
+URLs stripped, so each piece of content is scored once. The cache can be
+saved to disk and reloaded so it survives collector restarts.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+RT_PREFIX_PATTERN = re.compile(r'^(?:\s*RT @\w+:\s*)+')
+URL_PATTERN = re.compile(r'https?://\S+|www\.\S+')
+
+
+def normalize_for_cache(text):
+    """Strip retweet prefixes and URLs and collapse whitespace"""
+    text = RT_PREFIX_PATTERN.sub('', str(text))
+    text = URL_PATTERN.sub('', text)
+    return ' '.join(text.split())
+
+
+def cache_key(text):
+    """Compact 64-bit key for the normalized text"""
+    digest = hashlib.blake2b(normalize_for_cache(text).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+class SentimentCache:
+    """Bounded LRU mapping of normalized text to polarity, with hit-rate counters"""
+
+    def __init__(self, max_size=100_000, path=None, backend='textblob'):
+        self.max_size = max_size
+        self.path = path
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if path:
+            self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, text):
+        """Return the cached polarity for ``text`` or None"""
+        key = cache_key(text)
+        with self._lock:
+            polarity = self._entries.get(key)
+            if polarity is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return polarity
+
+    def put(self, text, polarity):
+        key = cache_key(text)
+        with self._lock:
+            self._entries[key] = float(polarity)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+        }
+
+    def load(self):
+        """Load saved entries; a missing or mismatched file leaves the cache empty"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Error loading sentiment cache {self.path}: {e}")
+            return
+
+        if data.get('backend') != self.backend:
+            logger.info(f"Ignoring sentiment cache {self.path} built for backend {data.get('backend')!r}")
+            return
+
+        for key, polarity in data.get('entries', [])[-self.max_size:]:
+            self._entries[int(key)] = float(polarity)
+        logger.info(f"Loaded {len(self._entries)} cached sentiment scores from {self.path}")
+
+    def save(self):
+        """Write the cache to disk atomically (oldest entries first)"""
+        if not self.path:
+            return
+        with self._lock:
+            entries = list(self._entries.items())
+        tmp_file = f"{self.path}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'backend': self.backend, 'entries': entries}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.path)
@@ -0,0 +1,158 @@
+"""
+Batched sentiment scoring for collected tweets.
+
+``score_batch`` scores a list of texts with the same TextBlob pattern
+analyzer (and the same Positive/Negative/Neutral thresholds) the collector
+has always used. Large batches are spread over a process pool whose workers
+each keep one warm analyzer; results come back in input order.
+
+The ``lexicon`` backend swaps TextBlob for the vectorized scorer in
+lexicon_scorer.py, which is much faster but only approximates TextBlob.
+An optional SentimentCache lets repeated content be scored only once.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from sentiment_cache import cache_key
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('textblob', 'lexicon')
+
+# Batches smaller than this are scored in-process; the pool is not worth it
+MIN_PARALLEL_BATCH = 256
+
+# Analyzer used by the current process (each pool worker has its own)
+_analyzer = None
+_analyzer_lock = threading.Lock()
+
+
+def sentiment_label(polarity):
+    """Map a polarity score to the label stored in the CSV"""
+    return "Positive" if polarity > 0 else "Negative" if polarity < 0 else "Neutral"
+
+
+def _get_analyzer():
+    global _analyzer
+    with _analyzer_lock:
+        if _analyzer is None:
+            from textblob.en.sentiments import PatternAnalyzer
+            analyzer = PatternAnalyzer()
+            # Force the lexicon to load now rather than on the first real tweet
+            analyzer.analyze("warm up")
+            _analyzer = analyzer
+    return _analyzer
+
+
+def _init_worker():
+    _get_analyzer()
+
+
+def polarity(text):
+    """Polarity of a single text, identical to ``TextBlob(text).sentiment.polarity``"""
+    return _get_analyzer().analyze(text).polarity
+
+
+def _score_chunk(texts):
+    analyzer = _get_analyzer()
+    return [analyzer.analyze(text).polarity for text in texts]
+
+
+class SentimentEngine:
+    """Scores batches of texts, in parallel when the batch is large enough"""
+
+    def __init__(self, backend='textblob', workers=None, chunksize=500,
+                 min_parallel_batch=MIN_PARALLEL_BATCH, cache=None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown sentiment backend {backend!r}, expected one of {BACKENDS}")
+        self.backend = backend
+        self.workers = workers or os.cpu_count() or 1
+        self.chunksize = chunksize
+        self.min_parallel_batch = min_parallel_batch
+        self.cache = cache
+        self._pool = None
+        self._lexicon_scorer = None
+        self._lock = threading.Lock()
+
+    def _get_lexicon_scorer(self):
+        with self._lock:
+            if self._lexicon_scorer is None:
+                from lexicon_scorer import LexiconScorer
+                self._lexicon_scorer = LexiconScorer()
+            return self._lexicon_scorer
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                logger.info(f"Starting sentiment pool with {self.workers} workers")
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+            return self._pool
+
+    def iter_scores(self, texts):
+        """Yield polarities for ``texts`` in order as they become available"""
+        texts = list(texts)
+        if self.cache is None:
+            yield from self._iter_backend_scores(texts)
+            return
+
+        cached = [self.cache.get(text) for text in texts]
+
+        # Score each distinct piece of uncached content once
+        misses = {}
+        for text, polarity in zip(texts, cached):
+            if polarity is None:
+                misses.setdefault(cache_key(text), text)
+        scored = dict(zip(misses, self._iter_backend_scores(list(misses.values()))))
+        for key, polarity in scored.items():
+            self.cache.put(misses[key], polarity)
+
+        for text, polarity in zip(texts, cached):
+            yield polarity if polarity is not None else scored[cache_key(text)]
+
+    def _iter_backend_scores(self, texts):
+        if self.backend == 'lexicon':
+            # Already vectorized over the whole batch, no pool needed
+            yield from self._get_lexicon_scorer().score_batch(texts).tolist()
+            return
+
+        if self.workers <= 1 or len(texts) < self.min_parallel_batch:
+            yield from _score_chunk(texts)
+            return
+
+        chunks = [texts[i:i + self.chunksize] for i in range(0, len(texts), self.chunksize)]
+        for scores in self._get_pool().map(_score_chunk, chunks):
+            yield from scores
+
+    def score_batch(self, texts):
+        """Return the polarity of every text in ``texts``"""
+        return list(self.iter_scores(texts))
+
+    def label_batch(self, texts):
+        """Return ``(polarities, labels)`` for ``texts``"""
+        polarities = self.score_batch(texts)
+        return polarities, [sentiment_label(p) for p in polarities]
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+_default_engine = None
+
+
+def score_batch(texts):
+    """Score ``texts`` with a shared default engine"""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = SentimentEngine()
+    return _default_engine.score_batch(texts)
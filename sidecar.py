@@ -0,0 +1,137 @@
+"""
+JSON sidecar files of tables derived from the stored tweets.
+
+The rollups and the word frequencies are both kept next to the dataset in
+a JSON file that records its format version and the storage fingerprint
+it matches. ``open`` returns the saved tables only while that fingerprint
+is current, ``load`` rebuilds them from the stored tweets when it is not,
+and ``save`` replaces the file atomically through a temp file of its own,
+so the collector and a report saving at the same time never share one.
+"""
+
+import json
+import logging
+import os
+import threading
+import uuid
+
+from storage import open_storage
+
+logger = logging.getLogger(__name__)
+
+
+def write_atomic(path, text):
+    """Replace ``path`` with ``text`` via a uniquely named temp file and rename"""
+    tmp_file = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, path)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+
+
+class Sidecar:
+    """
+    Tables derived from a storage backend, saved in ``<storage path><SUFFIX>``.
+
+    Subclasses set ``SUFFIX``, ``VERSION`` and ``NAME`` (for log messages)
+    and implement ``_reset`` (empty the tables), ``_count_stored`` (fold
+    the stored tweets in chunks), ``_payload`` (the tables as JSON fields)
+    and ``_restore`` (load them back, False if they don't fit). Without
+    ``storage`` the tables only live in memory.
+    """
+
+    SUFFIX = None
+    VERSION = None
+    NAME = None
+
+    def __init__(self, storage=None, path=None):
+        self.storage = open_storage(storage) if storage is not None else None
+        if path is None and self.storage is not None:
+            path = f"{self.storage.path}{self.SUFFIX}"
+        self.path = path
+        self.fingerprint = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    def __getstate__(self):
+        # Locks cannot be pickled (e.g. to send these to worker processes)
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, storage):
+        """Tables saved for ``storage`` if they are up to date, otherwise None (never rebuilds)"""
+        sidecar = cls(storage)
+        if not sidecar._read() or sidecar.fingerprint != sidecar.storage.fingerprint():
+            return None
+        return sidecar
+
+    def _reset(self):
+        raise NotImplementedError
+
+    def _count_stored(self, chunksize):
+        raise NotImplementedError
+
+    def _payload(self):
+        raise NotImplementedError
+
+    def _restore(self, data):
+        raise NotImplementedError
+
+    def _read(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get('version') != self.VERSION:
+            return False
+        with self._lock:
+            if not self._restore(data):
+                return False
+        self.fingerprint = data.get('fingerprint')
+        return True
+
+    def load(self):
+        """Load the saved tables, rebuilding them from the stored tweets if they are stale"""
+        if self._read() and self.fingerprint == self.storage.fingerprint():
+            logger.info(f"Loaded {self.NAME} from {self.path}")
+            return
+        if os.path.exists(self.path):
+            logger.warning(f"{self.NAME.capitalize()} {self.path} are out of date, rebuilding")
+        self.rebuild()
+
+    def rebuild(self, chunksize=100_000, save=True):
+        """
+        Recompute the tables with one chunked pass over the stored tweets.
+
+        With ``save=False`` they are only kept in memory, for readers that
+        must not write over the collector's sidecar.
+        """
+        with self._lock:
+            self._reset()
+        try:
+            self._count_stored(chunksize)
+        except Exception as e:
+            logger.warning(f"Error reading {self.storage.path} for {self.NAME}: {e}")
+        if save:
+            self.save()
+        logger.info(f"Built {self.NAME} for {self.storage.path}")
+
+    def save(self):
+        """Write the tables and the storage fingerprint they match atomically"""
+        self.fingerprint = self.storage.fingerprint()
+        with self._lock:
+            data = json.dumps({'version': self.VERSION, 'fingerprint': self.fingerprint, **self._payload()})
+        write_atomic(self.path, data)
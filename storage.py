@@ -0,0 +1,643 @@
+"""
+Storage backends for collected tweets.
+
+Both script.py and visualize_tweets.py go through ``open_storage``, which
+returns a backend with the same small interface (``append``, ``read``,
+``iter_chunks``):
+
+- CSVStorage keeps the original single ``tweets_sentiment.csv``. New rows
+  are appended to the end of the file instead of rewriting it, so the cost
+  of a cycle depends on the size of the batch rather than the dataset.
+- ParquetStorage writes typed Parquet files partitioned by collection date
+  (``<dir>/collection_date=YYYY-MM-DD/part-*.parquet``), so time-range reads
+  only touch the relevant partitions and columns. It needs pyarrow.
+- SQLiteStorage keeps tweets in an indexed SQLite database in WAL mode, so
+  the collector and the visualizer can use it at the same time, and
+  aggregations can run as SQL instead of in pandas.
+
+``read`` always returns typed columns: UTC ``Created_At``, ``Collection_Time``
+timestamps, a categorical ``Sentiment`` and a float ``Polarity``.
+"""
+
+import csv
+import contextlib
+import glob
+import hashlib
+import io
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from datetime import timedelta
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Column order used when a new CSV file is created
+CSV_COLUMNS = ['Text', 'Sentiment', 'Created_At', 'Collection_Time']
+
+SENTIMENT_CATEGORIES = ['Negative', 'Neutral', 'Positive']
+
+# Recent search only returns tweets up to this old, so a tweet's Created_At is
+# at most this far before its Collection_Time
+SEARCH_WINDOW_DAYS = 7
+
+# Parquet partition for rows without a Collection_Time
+UNKNOWN_PARTITION = 'unknown'
+
+# Collection_Time is the collector's local time, up to a day off the UTC
+# times that reads are filtered by, so partition pruning leaves this margin
+PARTITION_DATE_MARGIN = timedelta(days=1)
+
+
+def file_fingerprint(paths):
+    """
+    Fingerprint of files from their size, modification time and inode.
+
+    The size alone misses rewrites that keep it (e.g. re-scoring "Positive"
+    as "Negative"), while a rewrite always changes the mtime, and replacing
+    the file the inode.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    for path in paths:
+        stat = os.stat(path)
+        # Not the path itself, which may be spelled differently by the collector and the visualizer
+        digest.update(f"{stat.st_size}:{stat.st_mtime_ns}:{stat.st_ino};".encode('utf-8'))
+    return f"{len(paths)}:{digest.hexdigest()}"
+
+
+def _fsync_dir(path):
+    """Flush a directory entry so a rename survives a crash"""
+    dir_path = os.path.dirname(os.path.abspath(path))
+    try:
+        fd = os.open(dir_path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def read_csv_header(csv_file):
+    """Return the column names of an existing CSV file (or an empty list)"""
+    if not os.path.exists(csv_file) or os.path.getsize(csv_file) == 0:
+        return []
+    with open(csv_file, newline='', encoding='utf-8') as f:
+        return next(csv.reader(f), [])
+
+
+def write_csv_atomic(df, csv_file):
+    """Write a full DataFrame to a temp file, fsync it and rename it into place"""
+    tmp_file = f"{csv_file}.tmp"
+    with open(tmp_file, 'w', newline='', encoding='utf-8') as f:
+        df.to_csv(f, index=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, csv_file)
+    _fsync_dir(csv_file)
+
+
+def _ends_with_newline(csv_file):
+    with open(csv_file, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) in (b'\n', b'\r')
+
+
+def append_rows_to_csv(df, csv_file):
+    """
+    Append rows to a CSV file without rewriting it.
+
+    The rows are aligned to the header already in the file. If the write
+    fails part way, the file is truncated back to its previous length so a
+    crash never leaves a half-written row behind. A missing file is created
+    atomically via a temp file and rename.
+    """
+    if len(df) == 0:
+        return 0
+
+    header = read_csv_header(csv_file)
+    if not header:
+        columns = [c for c in CSV_COLUMNS if c in df.columns]
+        columns += [c for c in df.columns if c not in columns]
+        write_csv_atomic(df[columns], csv_file)
+        return len(df)
+
+    extra_columns = [c for c in df.columns if c not in header]
+    if extra_columns:
+        # The file needs a wider header; this is a one-off rewrite
+        logger.info(f"Adding new columns {extra_columns} to {csv_file}")
+        # Read everything as text so values (e.g. tweet IDs) are written back unchanged
+        existing_df = pd.read_csv(csv_file, dtype=str, keep_default_na=False)
+        combined_df = pd.concat([existing_df, df], ignore_index=True)
+        write_csv_atomic(combined_df[header + extra_columns], csv_file)
+        return len(df)
+
+    buffer = io.StringIO()
+    if not _ends_with_newline(csv_file):
+        buffer.write('\n')
+    df.reindex(columns=header).to_csv(buffer, index=False, header=False)
+    data = buffer.getvalue().encode('utf-8')
+
+    fd = os.open(csv_file, os.O_WRONLY | os.O_APPEND)
+    try:
+        original_size = os.fstat(fd).st_size
+        try:
+            view = memoryview(data)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+            os.fsync(fd)
+        except Exception:
+            os.ftruncate(fd, original_size)
+            raise
+    finally:
+        os.close(fd)
+
+    return len(df)
+
+
+def apply_schema(df):
+    """Convert the known tweet columns to their proper types in place"""
+    if 'Created_At' in df.columns:
+        df['Created_At'] = pd.to_datetime(df['Created_At'], errors='coerce', utc=True)
+    if 'Collection_Time' in df.columns:
+        df['Collection_Time'] = pd.to_datetime(df['Collection_Time'], errors='coerce')
+    if 'Sentiment' in df.columns:
+        df['Sentiment'] = pd.Categorical(df['Sentiment'], categories=SENTIMENT_CATEGORIES)
+    if 'Tweet_ID' in df.columns:
+        df['Tweet_ID'] = df['Tweet_ID'].astype('string')
+    if 'Polarity' in df.columns:
+        df['Polarity'] = pd.to_numeric(df['Polarity'], errors='coerce')
+    return df
+
+
+def filter_time_range(df, start=None, end=None, time_column='Created_At'):
+    """Keep rows with ``start <= time_column < end`` (either bound may be None)"""
+    if (start is None and end is None) or time_column not in df.columns:
+        return df
+    times = df[time_column]
+    tz = getattr(times.dt, 'tz', None)
+    mask = pd.Series(True, index=df.index)
+    if start is not None:
+        mask &= times >= _as_timestamp(start, tz)
+    if end is not None:
+        mask &= times < _as_timestamp(end, tz)
+    return df[mask]
+
+
+def _as_timestamp(value, tz):
+    value = pd.Timestamp(value)
+    if tz is not None and value.tzinfo is None:
+        return value.tz_localize(tz)
+    if tz is None and value.tzinfo is not None:
+        return value.tz_convert(None)
+    return value
+
+
+class TweetStorage:
+    """Interface shared by the storage backends"""
+
+    path = None
+
+    def exists(self):
+        raise NotImplementedError
+
+    def fingerprint(self):
+        """A value that changes whenever the stored data changes"""
+        raise NotImplementedError
+
+    def append(self, df):
+        """Persist new rows and return how many were written"""
+        raise NotImplementedError
+
+    def iter_chunks(self, columns=None, chunksize=100_000):
+        """Yield the stored rows as DataFrames of at most ``chunksize`` rows (untyped)"""
+        raise NotImplementedError
+
+    def read(self, columns=None, start=None, end=None, time_column='Created_At'):
+        """Load rows (optionally only some columns / a time range) with typed columns"""
+        raise NotImplementedError
+
+    def read_chunks(self, columns=None, start=None, end=None, time_column='Created_At',
+                    chunksize=100_000):
+        """Like ``read`` but yields typed DataFrames of at most ``chunksize`` rows"""
+        if columns is not None and (start is not None or end is not None) and time_column not in columns:
+            columns = list(columns) + [time_column]
+        for chunk in self.iter_chunks(columns=columns, chunksize=chunksize):
+            yield filter_time_range(apply_schema(chunk), start, end, time_column)
+
+    # Backends that can aggregate without loading rows into pandas set this
+    # and implement sentiment_counts() and daily_sentiment_counts()
+    supports_aggregation = False
+
+
+class CSVStorage(TweetStorage):
+    """The single tweets_sentiment.csv file"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def fingerprint(self):
+        return file_fingerprint([self.path] if self.exists() else [])
+
+    def append(self, df):
+        return append_rows_to_csv(df, self.path)
+
+    def _usecols(self, columns):
+        if columns is None:
+            return None
+        header = read_csv_header(self.path)
+        return [c for c in columns if c in header]
+
+    def iter_chunks(self, columns=None, chunksize=100_000):
+        if not self.exists() or os.path.getsize(self.path) == 0:
+            return
+        yield from pd.read_csv(self.path, usecols=self._usecols(columns), chunksize=chunksize,
+                               dtype={'Tweet_ID': str})
+
+    def read(self, columns=None, start=None, end=None, time_column='Created_At'):
+        if not self.exists() or os.path.getsize(self.path) == 0:
+            return pd.DataFrame()
+        usecols = self._usecols(columns)
+        if usecols is not None and (start is not None or end is not None) and time_column not in usecols:
+            usecols.append(time_column)
+        df = apply_schema(pd.read_csv(self.path, usecols=usecols, dtype={'Tweet_ID': str}))
+        return filter_time_range(df, start, end, time_column)
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("The Parquet storage backend needs pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+class ParquetStorage(TweetStorage):
+    """
+    Typed Parquet files partitioned by collection date.
+
+    Every append writes new part files (temp file + rename), so nothing is
+    ever rewritten; ``compact`` merges the part files of each partition.
+    """
+
+    PARTITION = 'collection_date'
+
+    def __init__(self, path):
+        self.path = path
+
+    def _schema(self):
+        pa = _require_pyarrow()
+        return pa.schema([
+            ('Text', pa.string()),
+            ('Sentiment', pa.dictionary(pa.int8(), pa.string())),
+            ('Created_At', pa.timestamp('ns', tz='UTC')),
+            ('Collection_Time', pa.timestamp('ns')),
+            ('Tweet_ID', pa.string()),
+            ('Keyword', pa.string()),
+            ('Polarity', pa.float64()),
+        ])
+
+    def _files(self):
+        return sorted(glob.glob(os.path.join(self.path, f"{self.PARTITION}=*", "*.parquet")))
+
+    def exists(self):
+        return bool(self._files())
+
+    def fingerprint(self):
+        return file_fingerprint(self._files())
+
+    def _to_table(self, df):
+        pa = _require_pyarrow()
+        schema = self._schema()
+        df = apply_schema(df.reindex(columns=schema.names).copy())
+        df['Keyword'] = df['Keyword'].astype('string')
+        df['Text'] = df['Text'].astype('string')
+        return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+    def append(self, df):
+        if len(df) == 0:
+            return 0
+        pq = _require_pyarrow().parquet
+        df = df.copy()
+        dates = pd.to_datetime(df['Collection_Time'], errors='coerce').dt.strftime('%Y-%m-%d')
+        for date, part_df in df.groupby(dates.fillna(UNKNOWN_PARTITION), sort=False):
+            partition_dir = os.path.join(self.path, f"{self.PARTITION}={date}")
+            os.makedirs(partition_dir, exist_ok=True)
+            part_file = os.path.join(partition_dir, f"part-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet")
+            tmp_file = f"{part_file}.tmp"
+            with open(tmp_file, 'wb') as f:
+                pq.write_table(self._to_table(part_df), f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, part_file)
+            _fsync_dir(part_file)
+        return len(df)
+
+    def _dataset(self):
+        pa = _require_pyarrow()
+        partitioning = pa.dataset.partitioning(pa.schema([(self.PARTITION, pa.string())]), flavor='hive')
+        schema = self._schema().append(pa.field(self.PARTITION, pa.string()))
+        return pa.dataset.dataset(self._files(), format='parquet', partitioning=partitioning,
+                                  partition_base_dir=self.path, schema=schema)
+
+    def _partition_filter(self, start, end, time_column):
+        """Expression selecting the partitions that can hold rows in [start, end)"""
+        pa = _require_pyarrow()
+        field = pa.dataset.field(self.PARTITION)
+        expression = None
+        if start is not None:
+            start = pd.Timestamp(start) - PARTITION_DATE_MARGIN
+            expression = field >= start.strftime('%Y-%m-%d')
+        if end is not None:
+            end = pd.Timestamp(end) + PARTITION_DATE_MARGIN
+            if time_column == 'Created_At':
+                # Tweets are collected up to SEARCH_WINDOW_DAYS after they are created
+                end = end + timedelta(days=SEARCH_WINDOW_DAYS)
+            upper = field <= end.strftime('%Y-%m-%d')
+            expression = upper if expression is None else expression & upper
+        if expression is not None:
+            # Rows without a collection time can't be pruned by date
+            expression = expression | (field == UNKNOWN_PARTITION)
+        return expression
+
+    def iter_chunks(self, columns=None, chunksize=100_000):
+        if not self.exists():
+            return
+        names = self._schema().names
+        columns = [c for c in (columns or names) if c in names]
+        for batch in self._dataset().to_batches(columns=columns, batch_size=chunksize):
+            df = batch.to_pandas()
+            if 'Sentiment' in df.columns:
+                df['Sentiment'] = df['Sentiment'].astype(object)
+            yield df
+
+    def read(self, columns=None, start=None, end=None, time_column='Created_At'):
+        if not self.exists():
+            return pd.DataFrame()
+        names = self._schema().names
+        columns = [c for c in (columns or names) if c in names]
+        if (start is not None or end is not None) and time_column not in columns:
+            columns.append(time_column)
+        table = self._dataset().to_table(columns=columns,
+                                         filter=self._partition_filter(start, end, time_column))
+        df = apply_schema(table.to_pandas())
+        return filter_time_range(df, start, end, time_column).reset_index(drop=True)
+
+    def compact(self):
+        """Merge the part files of every partition into a single file"""
+        pq = _require_pyarrow().parquet
+        for partition_dir in sorted(glob.glob(os.path.join(self.path, f"{self.PARTITION}=*"))):
+            parts = sorted(glob.glob(os.path.join(partition_dir, "*.parquet")))
+            if len(parts) < 2:
+                continue
+            table = pq.read_table(parts, schema=self._schema())
+            merged = os.path.join(partition_dir, f"part-{time.time_ns()}-compacted.parquet")
+            with open(f"{merged}.tmp", 'wb') as f:
+                pq.write_table(table, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(f"{merged}.tmp", merged)
+            for part in parts:
+                os.remove(part)
+            logger.info(f"Compacted {len(parts)} files in {partition_dir}")
+
+
+def _sqlite_key(text):
+    """Dedup key of the normalized text, as a signed 64-bit SQLite integer"""
+    from dedup_index import text_key
+    key = text_key(text)
+    return key - 2**64 if key >= 2**63 else key
+
+
+class SQLiteStorage(TweetStorage):
+    """
+    Tweets in a SQLite database with indexes on time, sentiment and dedup keys.
+
+    Timestamps are stored as sortable 'YYYY-MM-DD HH:MM:SS' text (Created_At
+    in UTC). Unique indexes on the text hash and tweet ID make inserts
+    idempotent: ``append`` skips rows that are already stored.
+    """
+
+    TABLE = 'tweets'
+    COLUMNS = ['Text', 'Sentiment', 'Created_At', 'Collection_Time', 'Tweet_ID', 'Keyword', 'Polarity']
+    supports_aggregation = True
+
+    def __init__(self, path):
+        self.path = path
+        if os.path.exists(path):
+            with self._connect() as conn:
+                self._create_schema(conn)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Short-lived connection that commits on success and is always closed"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _create_schema(self, conn):
+        conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS {self.TABLE} (
+                id INTEGER PRIMARY KEY,
+                Text TEXT NOT NULL,
+                Sentiment TEXT,
+                Created_At TEXT,
+                Collection_Time TEXT,
+                Tweet_ID TEXT,
+                Keyword TEXT,
+                Text_Hash INTEGER NOT NULL,
+                Polarity REAL
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_tweets_text_hash ON {self.TABLE} (Text_Hash);
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_tweets_tweet_id ON {self.TABLE} (Tweet_ID)
+                WHERE Tweet_ID IS NOT NULL;
+            CREATE INDEX IF NOT EXISTS idx_tweets_created_at ON {self.TABLE} (Created_At);
+            CREATE INDEX IF NOT EXISTS idx_tweets_collection_time ON {self.TABLE} (Collection_Time);
+            CREATE INDEX IF NOT EXISTS idx_tweets_sentiment ON {self.TABLE} (Sentiment);
+        """)
+        # Databases created before polarity was stored get the column added
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({self.TABLE})")}
+        if 'Polarity' not in columns:
+            conn.execute(f"ALTER TABLE {self.TABLE} ADD COLUMN Polarity REAL")
+
+    def exists(self):
+        if not os.path.exists(self.path):
+            return False
+        with self._connect() as conn:
+            return conn.execute(f"SELECT 1 FROM {self.TABLE} LIMIT 1").fetchone() is not None
+
+    def fingerprint(self):
+        if not os.path.exists(self.path):
+            return "0:0"
+        with self._connect() as conn:
+            count, max_id = conn.execute(f"SELECT COUNT(*), MAX(id) FROM {self.TABLE}").fetchone()
+        return f"{count}:{max_id or 0}"
+
+    @staticmethod
+    def _format_times(values, utc):
+        times = pd.to_datetime(values, errors='coerce', utc=utc)
+        if utc:
+            times = times.dt.tz_convert('UTC').dt.tz_localize(None)
+        return times.dt.strftime('%Y-%m-%d %H:%M:%S').astype(object).where(times.notna(), None)
+
+    def append(self, df):
+        if len(df) == 0:
+            return 0
+        df = df.reindex(columns=self.COLUMNS)
+        created_at = self._format_times(df['Created_At'], utc=True)
+        collection_time = self._format_times(df['Collection_Time'], utc=False)
+        tweet_ids = df['Tweet_ID'].astype(object).where(df['Tweet_ID'].notna(), None)
+        keywords = df['Keyword'].astype(object).where(df['Keyword'].notna(), None)
+        polarities = pd.to_numeric(df['Polarity'], errors='coerce').astype(object)
+        polarities = polarities.where(polarities.notna(), None)
+        rows = [
+            (str(text), sentiment, created, collected,
+             str(tweet_id) if tweet_id is not None else None, keyword, polarity, _sqlite_key(text))
+            for text, sentiment, created, collected, tweet_id, keyword, polarity in zip(
+                df['Text'], df['Sentiment'], created_at, collection_time, tweet_ids, keywords, polarities)
+        ]
+        with self._connect() as conn:
+            self._create_schema(conn)
+            before = conn.total_changes
+            conn.executemany(
+                f"INSERT OR IGNORE INTO {self.TABLE} "
+                "(Text, Sentiment, Created_At, Collection_Time, Tweet_ID, Keyword, Polarity, Text_Hash) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            return conn.total_changes - before
+
+    def _where(self, start, end, time_column):
+        """SQL condition and parameters for ``start <= time_column < end``"""
+        if time_column not in ('Created_At', 'Collection_Time'):
+            raise ValueError(f"Cannot filter on {time_column!r}")
+        clauses, params = [], []
+        utc = time_column == 'Created_At'
+        for value, op in ((start, '>='), (end, '<')):
+            if value is not None:
+                clauses.append(f"{time_column} {op} ?")
+                params.append(self._format_times(pd.Series([value]), utc=utc).iloc[0])
+        return (f" WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+    def _select(self, columns):
+        columns = [c for c in (columns or self.COLUMNS) if c in self.COLUMNS]
+        return ', '.join(columns)
+
+    def iter_chunks(self, columns=None, chunksize=100_000):
+        if not os.path.exists(self.path):
+            return
+        with self._connect() as conn:
+            cursor = conn.execute(f"SELECT {self._select(columns)} FROM {self.TABLE} ORDER BY id")
+            names = [d[0] for d in cursor.description]
+            while True:
+                rows = cursor.fetchmany(chunksize)
+                if not rows:
+                    break
+                yield pd.DataFrame.from_records(rows, columns=names)
+
+    def read(self, columns=None, start=None, end=None, time_column='Created_At'):
+        if not os.path.exists(self.path):
+            return pd.DataFrame()
+        where, params = self._where(start, end, time_column)
+        with self._connect() as conn:
+            df = pd.read_sql_query(
+                f"SELECT {self._select(columns)} FROM {self.TABLE}{where} ORDER BY id", conn, params=params)
+        return apply_schema(df)
+
+    def sentiment_counts(self, start=None, end=None, time_column='Created_At'):
+        """Tweets per sentiment as a Series ordered like ``value_counts``"""
+        where, params = self._where(start, end, time_column)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT Sentiment, COUNT(*) AS n FROM {self.TABLE}{where} "
+                "GROUP BY Sentiment ORDER BY n DESC", params).fetchall()
+        counts = pd.Series({sentiment: n for sentiment, n in rows if sentiment is not None}, dtype='int64')
+        counts.index.name = 'Sentiment'
+        return counts.rename('count')
+
+    def daily_sentiment_counts(self, start=None, end=None, time_column='Created_At'):
+        """Tweets per (Created_At date, sentiment) as a Date x Sentiment table"""
+        where, params = self._where(start, end, time_column)
+        condition = f"{where} AND" if where else " WHERE"
+        with self._connect() as conn:
+            df = pd.read_sql_query(
+                f"SELECT substr(Created_At, 1, 10) AS Date, Sentiment, COUNT(*) AS n FROM {self.TABLE}"
+                f"{condition} Created_At IS NOT NULL GROUP BY Date, Sentiment", conn, params=params)
+        if len(df) == 0:
+            return pd.DataFrame()
+        df['Date'] = pd.to_datetime(df['Date']).dt.date
+        return df.pivot(index='Date', columns='Sentiment', values='n').fillna(0).astype('int64')
+
+
+STORAGE_BACKENDS = {
+    'csv': CSVStorage,
+    'parquet': ParquetStorage,
+    'sqlite': SQLiteStorage,
+}
+
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+
+def open_storage(path, backend=None):
+    """
+    Return the storage backend for ``path``.
+
+    Without an explicit ``backend``, a ``.csv`` path is a CSVStorage, a
+    ``.db``/``.sqlite`` path is a SQLiteStorage and anything else (a
+    directory) is a ParquetStorage.
+    """
+    if isinstance(path, TweetStorage):
+        return path
+    if backend is None:
+        lower_path = str(path).lower()
+        if lower_path.endswith('.csv'):
+            backend = 'csv'
+        elif lower_path.endswith(SQLITE_SUFFIXES):
+            backend = 'sqlite'
+        else:
+            backend = 'parquet'
+    try:
+        return STORAGE_BACKENDS[backend](path)
+    except KeyError:
+        raise ValueError(f"Unknown storage backend {backend!r}, expected one of {list(STORAGE_BACKENDS)}")
+
+
+def migrate(source, destination, chunksize=100_000):
+    """Copy every row from one storage to another (e.g. CSV to Parquet)"""
+    source = open_storage(source)
+    destination = open_storage(destination)
+    copied = 0
+    for chunk in source.iter_chunks(chunksize=chunksize):
+        copied += destination.append(chunk)
+    logger.info(f"Copied {copied} tweets from {source.path} to {destination.path}")
+    return copied
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Copy tweets between storage backends")
+    parser.add_argument('source', help="Source storage, e.g. tweets_sentiment.csv")
+    parser.add_argument('destination',
+                        help="Destination storage, e.g. tweets_sentiment_parquet or tweets_sentiment.db")
+    parser.add_argument('--compact', action='store_true', help="Compact a Parquet destination afterwards")
+    args = parser.parse_args()
+
+    migrate(args.source, args.destination)
+    if args.compact and isinstance(open_storage(args.destination), ParquetStorage):
+        open_storage(args.destination).compact()
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from dedup_index import DedupIndex, dataframe_keys, id_key, text_key
+from storage import open_storage
+
+
+def test_dataframe_keys_match_the_single_key_helpers():
+    df = pd.DataFrame({'Text': ["Big  News", "big news", "other"], 'Tweet_ID': ["12.0", None, " "]})
+
+    text_keys, id_keys, has_id = dataframe_keys(df)
+
+    assert text_keys.dtype == np.uint64
+    assert text_keys.tolist() == [text_key("Big  News"), text_key("big news"), text_key("other")]
+    assert has_id.tolist() == [True, False, False]
+    assert id_keys[0] == id_key("12")
+
+
+def test_rebuilt_index_filters_stored_and_repeated_rows(tmp_path):
+    storage = open_storage(str(tmp_path / "tweets.csv"))
+    storage.append(pd.DataFrame({'Text': ["first tweet", "second tweet"], 'Tweet_ID': ["1", "2"]}))
+    index = DedupIndex(storage)
+
+    batch = pd.DataFrame({
+        'Text': ["First  Tweet", "new tweet", "new tweet", "edited text", "another"],
+        'Tweet_ID': [None, "3", "4", "2", "5"],
+    })
+
+    assert index.filter_new(batch).tolist() == [False, True, False, False, True]
+    assert index.add(batch[index.filter_new(batch)]) == 4
+    assert not DedupIndex(storage).filter_new(batch).any()
@@ -0,0 +1,26 @@
+import pstats
+import threading
+
+from profiling import Profiler
+
+
+def _busy_worker(results):
+    results.append(sum(i * i for i in range(10_000)))
+
+
+def test_deterministic_profile_includes_threads_started_by_the_section(tmp_path):
+    """A worker thread inside a deterministic section runs to completion and shows up in the profile"""
+    results = []
+    profiler = Profiler('deterministic', output_dir=str(tmp_path))
+
+    with profiler.profile("section"):
+        worker = threading.Thread(target=_busy_worker, args=(results,))
+        worker.start()
+        worker.join(timeout=10)
+
+    assert not worker.is_alive()
+    assert len(results) == 1
+    functions = {name for _, _, name in pstats.Stats(str(tmp_path / "section.prof")).stats}
+    assert '_busy_worker' in functions
+    assert (tmp_path / "section.collapsed").exists()
+    assert "Profile of section" in (tmp_path / "section.txt").read_text(encoding='utf-8')
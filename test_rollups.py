@@ -0,0 +1,38 @@
+import os
+
+import pandas as pd
+
+from rollups import SentimentRollups
+from storage import open_storage
+
+
+def _stored_tweets(tmp_path):
+    storage = open_storage(str(tmp_path / "tweets.csv"))
+    storage.append(pd.DataFrame({
+        'Text': ["great news", "bad news"],
+        'Sentiment': ["Positive", "Negative"],
+        'Created_At': ["2025-07-22 10:00:00+00:00", "2025-07-22 11:00:00+00:00"],
+        'Polarity': [0.8, -0.7],
+    }))
+    return storage
+
+
+def test_rebuild_without_save_leaves_the_sidecar_alone(tmp_path):
+    """Readers rebuild stale rollups in memory instead of writing over the collector's file"""
+    storage = _stored_tweets(tmp_path)
+
+    rollups = SentimentRollups(storage)
+    rollups.rebuild(save=False)
+
+    assert rollups.sentiment_counts().to_dict() == {"Positive": 1, "Negative": 1}
+    assert not os.path.exists(rollups.path)
+
+
+def test_save_replaces_the_sidecar_without_leaving_temp_files(tmp_path):
+    storage = _stored_tweets(tmp_path)
+
+    SentimentRollups(storage).rebuild()
+    SentimentRollups(storage).rebuild()
+
+    assert SentimentRollups.open(storage) is not None
+    assert sorted(os.listdir(tmp_path)) == ["tweets.csv", "tweets.csv.rollups.json"]
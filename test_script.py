@@ -0,0 +1,77 @@
+import socket
+
+import pandas as pd
+
+import script
+from rollups import SentimentRollups
+from storage import open_storage
+
+
+def _use_tmp_dataset(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(script, 'DATA_PATH', str(tmp_path / "tweets_sentiment.csv"))
+    monkeypatch.setattr(script, 'STORAGE_BACKEND', "csv")
+
+
+def test_main_loop_starts_when_metrics_port_is_taken(tmp_path, monkeypatch):
+    """A taken metrics port costs the /metrics endpoint, never the collection"""
+    cycles = []
+
+    def collect_keywords(*args, **kwargs):
+        # Reaching the first cycle is enough; stop the loop like Ctrl+C would
+        cycles.append(kwargs)
+        raise KeyboardInterrupt
+
+    _use_tmp_dataset(tmp_path, monkeypatch)
+    monkeypatch.setattr(script, 'collect_keywords', collect_keywords)
+
+    with socket.socket() as taken:
+        taken.bind(('127.0.0.1', 0))
+        taken.listen()
+        monkeypatch.setattr(script, 'METRICS_PORT', taken.getsockname()[1])
+        script.main_loop()
+
+    assert len(cycles) == 1
+
+
+def test_main_loop_saves_state_of_interrupted_cycle(tmp_path, monkeypatch):
+    """Batches written before Ctrl+C are in the saved rollups"""
+    batch = pd.DataFrame({
+        'Text': ["great news", "bad news"],
+        'Sentiment': ["Positive", "Negative"],
+        'Created_At': pd.to_datetime(["2025-07-22 10:00", "2025-07-22 11:00"], utc=True),
+        'Tweet_ID': ["1", "2"],
+        'Keyword': "AI",
+        'Polarity': [0.8, -0.7],
+    })
+
+    def collect_keywords(keywords, storage, state, **kwargs):
+        script.append_tweets(batch, storage, state)
+        raise KeyboardInterrupt
+
+    _use_tmp_dataset(tmp_path, monkeypatch)
+    monkeypatch.setattr(script, 'METRICS_PORT', None)
+    monkeypatch.setattr(script, 'collect_keywords', collect_keywords)
+    script.main_loop()
+
+    rollups = SentimentRollups.open(script.DATA_PATH)
+    assert rollups is not None
+    assert rollups.sentiment_counts().to_dict() == {"Positive": 1, "Negative": 1}
+
+
+def test_rebuilt_rollups_keep_stored_polarity(tmp_path, monkeypatch):
+    """Polarity is stored with the tweets, so a rollups rebuild keeps the means"""
+    batch = pd.DataFrame({
+        'Text': ["great news", "bad news"],
+        'Sentiment': ["Positive", "Negative"],
+        'Created_At': pd.to_datetime(["2025-07-22 10:00", "2025-07-22 11:00"], utc=True),
+        'Tweet_ID': ["1", "2"],
+        'Polarity': [0.8, -0.7],
+    })
+
+    _use_tmp_dataset(tmp_path, monkeypatch)
+    script.append_tweets(batch, open_storage(script.DATA_PATH))
+
+    rollups = SentimentRollups(script.DATA_PATH)
+    rollups.rebuild()
+    assert rollups.mean_polarity(None, None).to_dict() == {"Positive": 0.8, "Negative": -0.7}
@@ -0,0 +1,104 @@
+"""
+One-pass summaries of a tweet dataset for the visualizer.
+
+TweetSummary is updated chunk by chunk with the sentiment counts, per-day
+timeline, tweet-length histogram and word frequencies the charts need, so
+a dataset can be summarized in fixed-size chunks without ever holding all
+rows in memory. Memory use grows with the number of days covered, not with
+the number of tweets (word tables are bounded by ``WordFrequencies``).
+"""
+
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from word_frequencies import WordFrequencies
+
+# Tweet lengths are counted in 10-character bins; longer tweets land in the last bin
+LENGTH_BIN_WIDTH = 10
+LENGTH_BINS = 30
+
+SAMPLE_SIZE = 3
+
+
+class TweetSummary:
+    """Aggregates behind the visualizer's charts, built with ``update`` one chunk at a time"""
+
+    def __init__(self):
+        self.row_count = 0
+        self.columns = []
+        self.sentiment_counts = Counter()
+        self.daily_counts = Counter()  # (date, sentiment) -> tweets
+        self.length_histogram = np.zeros(LENGTH_BINS, dtype=np.int64)
+        self.words = WordFrequencies()
+        self.first_created_at = None
+        self.last_created_at = None
+        self.samples = []  # (sentiment, text) of the first few tweets
+
+    @classmethod
+    def from_storage(cls, storage, start=None, end=None, columns=None, chunksize=100_000):
+        """Summarize ``storage`` (optionally a Created_At range) in chunks of ``chunksize`` rows"""
+        summary = cls()
+        for chunk in storage.read_chunks(columns=columns, start=start, end=end, chunksize=chunksize):
+            summary.update(chunk)
+        return summary
+
+    def update(self, chunk):
+        """Add one typed chunk of rows (as returned by ``TweetStorage.read_chunks``)"""
+        for column in chunk.columns:
+            if column not in self.columns:
+                self.columns.append(column)
+        self.row_count += len(chunk)
+        if len(chunk) == 0:
+            return
+
+        has_sentiment = 'Sentiment' in chunk.columns
+        has_text = 'Text' in chunk.columns
+
+        if has_sentiment:
+            self.sentiment_counts.update(chunk['Sentiment'].dropna().astype(str))
+
+        if 'Created_At' in chunk.columns:
+            created_at = chunk['Created_At'].dropna()
+            if len(created_at) > 0:
+                first, last = created_at.min(), created_at.max()
+                if self.first_created_at is None or first < self.first_created_at:
+                    self.first_created_at = first
+                if self.last_created_at is None or last > self.last_created_at:
+                    self.last_created_at = last
+                if has_sentiment:
+                    dated = chunk.loc[created_at.index]
+                    daily = dated.groupby([created_at.dt.date, 'Sentiment'], observed=True).size()
+                    for (date, sentiment), count in daily.items():
+                        self.daily_counts[(date, str(sentiment))] += int(count)
+
+        if has_text:
+            texts = chunk['Text'].dropna().astype(str)
+            bins = np.minimum(texts.str.len().to_numpy() // LENGTH_BIN_WIDTH, LENGTH_BINS - 1)
+            self.length_histogram += np.bincount(bins.astype(np.int64), minlength=LENGTH_BINS)
+            self.words.update(chunk)
+
+        for _, row in chunk.head(SAMPLE_SIZE - len(self.samples)).iterrows():
+            self.samples.append((row.get('Sentiment', 'Unknown'), str(row.get('Text', ''))))
+
+    def sentiment_value_counts(self):
+        """Sentiment counts as a Series ordered like ``value_counts``"""
+        counts = pd.Series(dict(self.sentiment_counts.most_common()), dtype='int64')
+        counts.index.name = 'Sentiment'
+        return counts.rename('count')
+
+    def daily_table(self):
+        """Date x Sentiment table of tweet counts"""
+        if not self.daily_counts:
+            return pd.DataFrame()
+        counts = pd.Series(self.daily_counts)
+        counts.index.names = ['Date', 'Sentiment']
+        return counts.unstack(fill_value=0).sort_index()
+
+    def length_bins(self):
+        """Left edges of the tweet-length bins and the number of tweets in each"""
+        return np.arange(LENGTH_BINS) * LENGTH_BIN_WIDTH, self.length_histogram
+
+    def top_words(self, n=10):
+        return self.words.most_common(n)
@@ -1,85 +1,271 @@
+import time
+
+# Measured from the first import so the startup budget includes import time
+_STARTED = time.perf_counter()
+
+import argparse
+import contextlib
+import functools
+import sys
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from wordcloud import WordCloud
 import numpy as np
 from datetime import datetime, timedelta
 import os
-from collections import Counter
-import re
+from concurrent.futures import ProcessPoolExecutor
+
+from render_cache import RenderCache, cache_key, file_digest
+from rollups import SentimentRollups
+from storage import open_storage
+from downsampling import lttb
+from live_dashboard import DEFAULT_HTTP_PORT, LiveAggregates, LiveDashboardServer
+from live_feed import DEFAULT_HOST, DEFAULT_PORT
+from profiling import Profiler, add_profile_arguments, profiler_from_args
+from tweet_summary import LENGTH_BIN_WIDTH, LENGTH_BINS, TweetSummary
+from word_frequencies import WordFrequencies
+
+WORD_CLOUD_WORDS = 100
+
+# Above this many tweets the dashboard switches to its large-data mode
+LARGE_DATA_ROWS = 100_000
+# Longest timeline series drawn in large-data mode (longer ones are downsampled)
+MAX_TIMELINE_POINTS = 1_000
 
-# Set style for matplotlib
-plt.style.use('seaborn-v0_8')
-sns.set_palette("husl")
+# Modules whose code decides what the charts look like (part of render cache keys)
+RENDER_SOURCES = ['visualize_tweets.py', 'tweet_summary.py', 'word_frequencies.py', 'rollups.py']
+
+# Seconds from start to loading the data for the ``summary`` command
+# (imports and argument parsing); plotting libraries must stay out of it
+STARTUP_BUDGET = 1.0
+PLOTTING_MODULES = ['matplotlib', 'seaborn', 'plotly', 'wordcloud']
+
+@functools.lru_cache(maxsize=None)
+def _pyplot():
+    """matplotlib.pyplot, imported and styled on first use (it is slow to import)"""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
+    # Set style for matplotlib
+    plt.style.use('seaborn-v0_8')
+    sns.set_palette("husl")
+    return plt
 
 class TweetVisualizer:
-    def __init__(self, csv_file="tweets_sentiment.csv"):
+    def __init__(self, csv_file="tweets_sentiment.csv", start=None, end=None, chunksize=None):
+        """
+        ``chunksize`` switches to streaming mode: instead of loading every
+        row into ``self.df``, the charts' aggregates are computed in one pass
+        over chunks of that many rows, so memory stays flat as data grows.
+        """
         self.csv_file = csv_file
+        self.storage = open_storage(csv_file)
+        self.chunksize = chunksize
+        # Headless mode (interactive=False) saves charts without showing them
+        self.output_dir = "."
+        self.interactive = True
         self.df = None
-        self.load_data()
+        self.summary = None
+        self._word_frequencies = None
+        # Aggregates kept up to date by the collector (None if missing or stale)
+        self.rollups = SentimentRollups.open(self.storage) if self.storage.exists() else None
+        self.start = start
+        self.end = end
+        self.load_data(start=start, end=end)
     
-    def load_data(self):
-        """Load tweet data from CSV file"""
-        if not os.path.exists(self.csv_file):
+    def load_data(self, start=None, end=None, columns=None):
+        """
+        Load tweet data from the CSV file or Parquet directory
+        
+        ``start``/``end`` limit the tweets to a Created_At range; with Parquet
+        storage only the matching date partitions (and ``columns``) are read.
+        """
+        if not self.storage.exists():
             print(f"Error: {self.csv_file} not found!")
             print("Make sure to run script.py first to collect tweet data.")
             return False
         
+        self.start, self.end = start, end
         try:
-            self.df = pd.read_csv(self.csv_file)
-            print(f"Loaded {len(self.df)} tweets from {self.csv_file}")
-            
-            # Convert Created_At to datetime if it exists
-            if 'Created_At' in self.df.columns:
-                self.df['Created_At'] = pd.to_datetime(self.df['Created_At'], errors='coerce')
-            
-            # Convert Collection_Time to datetime if it exists
-            if 'Collection_Time' in self.df.columns:
-                self.df['Collection_Time'] = pd.to_datetime(self.df['Collection_Time'], errors='coerce')
+            if self.chunksize:
+                self.summary = TweetSummary.from_storage(self.storage, start=start, end=end,
+                                                         columns=columns, chunksize=self.chunksize)
+                print(f"Summarized {self.summary.row_count} tweets from {self.csv_file} "
+                      f"in chunks of {self.chunksize}")
+                return True
             
+            # Created_At/Collection_Time come back as datetimes and Sentiment as a category
+            self.df = self.storage.read(columns=columns, start=start, end=end)
+            if 'Sentiment' in self.columns:
+                self.df['Sentiment'] = self.df['Sentiment'].cat.remove_unused_categories()
+            print(f"Loaded {len(self.df)} tweets from {self.csv_file}")
             return True
         except Exception as e:
             print(f"Error loading data: {e}")
             return False
     
+    @property
+    def columns(self):
+        """Columns of the loaded data (in either mode)"""
+        if self.summary is not None:
+            return self.summary.columns
+        return list(self.df.columns) if self.df is not None else []
+    
+    @property
+    def row_count(self):
+        if self.summary is not None:
+            return self.summary.row_count
+        return len(self.df) if self.df is not None else 0
+    
+    def _usable_rollups(self):
+        if self.rollups is not None and self.rollups.can_answer(self.start, self.end):
+            return self.rollups
+        return None
+    
+    def sentiment_counts(self):
+        """Tweets per sentiment, from the rollups or counted in the database when possible"""
+        rollups = self._usable_rollups()
+        if rollups is not None:
+            return rollups.sentiment_counts(start=self.start, end=self.end)
+        if self.storage.supports_aggregation:
+            return self.storage.sentiment_counts(start=self.start, end=self.end)
+        if self.summary is not None:
+            return self.summary.sentiment_value_counts()
+        return self.df['Sentiment'].value_counts()
+    
+    def daily_sentiment_counts(self):
+        """Date x Sentiment table of tweet counts (rows without Created_At are skipped)"""
+        rollups = self._usable_rollups()
+        if rollups is not None:
+            return rollups.daily_sentiment_counts(start=self.start, end=self.end)
+        if self.storage.supports_aggregation:
+            return self.storage.daily_sentiment_counts(start=self.start, end=self.end)
+        if self.summary is not None:
+            return self.summary.daily_table()
+        df_with_dates = self.df.dropna(subset=['Created_At'])
+        if len(df_with_dates) == 0:
+            return pd.DataFrame()
+        dates = df_with_dates['Created_At'].dt.date.rename('Date')
+        return df_with_dates.groupby([dates, 'Sentiment'], observed=True).size().unstack(fill_value=0)
+    
+    def hourly_sentiment_counts(self):
+        """Hour x Sentiment table of tweet counts, or None if only daily counts are available"""
+        rollups = self._usable_rollups()
+        if rollups is not None:
+            return rollups.hourly_sentiment_counts(start=self.start, end=self.end)
+        if self.df is None:
+            return None
+        df_with_dates = self.df.dropna(subset=['Created_At'])
+        hours = df_with_dates['Created_At'].dt.floor('h').rename('Hour')
+        return df_with_dates.groupby([hours, 'Sentiment'], observed=True).size().unstack(fill_value=0)
+    
+    def length_histogram(self, binned=False):
+        """
+        Pre-binned ``(bin_starts, counts)`` of tweet lengths.
+        
+        Returns None when only the raw rows are loaded, unless ``binned``
+        asks for them to be binned here.
+        """
+        if self.rollups is not None and self.start is None and self.end is None:
+            return self.rollups.length_bins()
+        if self.summary is not None:
+            return self.summary.length_bins()
+        if binned and self.df is not None:
+            lengths = self.df['Text'].dropna().str.len().to_numpy()
+            bins = np.minimum(lengths // LENGTH_BIN_WIDTH, LENGTH_BINS - 1).astype(np.int64)
+            return np.arange(LENGTH_BINS) * LENGTH_BIN_WIDTH, np.bincount(bins, minlength=LENGTH_BINS)
+        return None
+    
+    def word_frequencies(self):
+        """
+        Per-sentiment and overall word counts for word clouds and Top Words.
+        
+        Uses the collector's saved counts when they are up to date and no
+        range was given, otherwise counts the loaded tweets once.
+        """
+        if self._word_frequencies is None:
+            saved = None
+            if self.start is None and self.end is None and self.storage.exists():
+                saved = WordFrequencies.open(self.storage)
+            if saved is not None:
+                self._word_frequencies = saved
+            elif self.summary is not None:
+                self._word_frequencies = self.summary.words
+            else:
+                self._word_frequencies = WordFrequencies()
+                self._word_frequencies.update(self.df)
+        return self._word_frequencies
+    
+    def top_words(self, n=10):
+        """Most common words across all tweets, without stop words"""
+        return self.word_frequencies().most_common(n)
+    
     def print_summary(self):
         """Print basic statistics about the dataset"""
-        if self.df is None or len(self.df) == 0:
+        if self.row_count == 0:
             print("No data available")
             return
         
         print("\n" + "="*50)
         print("DATASET SUMMARY")
         print("="*50)
-        print(f"Total tweets: {len(self.df)}")
-        print(f"Columns: {list(self.df.columns)}")
+        print(f"Total tweets: {self.row_count}")
+        print(f"Columns: {self.columns}")
         
-        if 'Sentiment' in self.df.columns:
+        if 'Sentiment' in self.columns:
             print("\nSentiment Distribution:")
-            sentiment_counts = self.df['Sentiment'].value_counts()
+            sentiment_counts = self.sentiment_counts()
             for sentiment, count in sentiment_counts.items():
-                percentage = (count / len(self.df)) * 100
+                percentage = (count / self.row_count) * 100
                 print(f"  {sentiment}: {count} ({percentage:.1f}%)")
         
-        if 'Created_At' in self.df.columns:
-            valid_dates = self.df['Created_At'].dropna()
-            if len(valid_dates) > 0:
-                print(f"\nDate range: {valid_dates.min()} to {valid_dates.max()}")
+        # Only the rollups know polarities; left out when they cannot answer the time range
+        rollups = self._usable_rollups()
+        if rollups is not None:
+            mean_polarity = rollups.mean_polarity(self.start, self.end).dropna()
+            if len(mean_polarity) > 0:
+                print("\nMean polarity (tweets scored by the collector):")
+                for sentiment, polarity in mean_polarity.items():
+                    print(f"  {sentiment}: {polarity:+.3f}")
+        
+        if self.summary is not None:
+            if self.summary.first_created_at is not None:
+                print(f"\nDate range: {self.summary.first_created_at} to {self.summary.last_created_at}")
+            samples = self.summary.samples
+        else:
+            if 'Created_At' in self.columns:
+                valid_dates = self.df['Created_At'].dropna()
+                if len(valid_dates) > 0:
+                    print(f"\nDate range: {valid_dates.min()} to {valid_dates.max()}")
+            samples = [(row.get('Sentiment', 'Unknown'), row.get('Text', ''))
+                       for i, row in self.df.head(3).iterrows()]
         
         print("\nSample tweets:")
-        for i, row in self.df.head(3).iterrows():
-            sentiment = row.get('Sentiment', 'Unknown')
-            text = row.get('Text', '')[:100] + '...' if len(row.get('Text', '')) > 100 else row.get('Text', '')
+        for sentiment, text in samples:
+            text = text[:100] + '...' if len(text) > 100 else text
             print(f"  [{sentiment}] {text}")
     
+    def output_path(self, filename):
+        """Where a generated file goes (``output_dir`` is created if needed)"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        return os.path.join(self.output_dir, filename)
+    
+    def _save_figure(self, filename):
+        """Save the current matplotlib figure, then show it or, in headless mode, close it"""
+        plt = _pyplot()
+        path = self.output_path(filename)
+        plt.savefig(path, dpi=300, bbox_inches='tight')
+        if self.interactive:
+            plt.show()
+        else:
+            plt.close('all')
+        print(f"Saved: {path}")
+        return path
+    
     def create_sentiment_pie_chart(self):
         """Create a pie chart showing sentiment distribution"""
-        if 'Sentiment' in self.df.columns:
-            sentiment_counts = self.df['Sentiment'].value_counts()
+        if 'Sentiment' in self.columns:
+            sentiment_counts = self.sentiment_counts()
             
+            plt = _pyplot()
             plt.figure(figsize=(8, 6))
             colors = ['#ff9999', '#66b3ff', '#99ff99']
             plt.pie(sentiment_counts.values, labels=sentiment_counts.index, autopct='%1.1f%%', 
@@ -87,15 +273,14 @@ class TweetVisualizer:
             plt.title('Tweet Sentiment Distribution', fontsize=16, fontweight='bold')
             plt.axis('equal')
             plt.tight_layout()
-            plt.savefig('sentiment_pie_chart.png', dpi=300, bbox_inches='tight')
-            plt.show()
-            print("Saved: sentiment_pie_chart.png")
+            return self._save_figure('sentiment_pie_chart.png')
     
     def create_sentiment_bar_chart(self):
         """Create a bar chart showing sentiment distribution"""
-        if 'Sentiment' in self.df.columns:
-            sentiment_counts = self.df['Sentiment'].value_counts()
+        if 'Sentiment' in self.columns:
+            sentiment_counts = self.sentiment_counts()
             
+            plt = _pyplot()
             plt.figure(figsize=(10, 6))
             bars = plt.bar(sentiment_counts.index, sentiment_counts.values, 
                           color=['#ff6b6b', '#4ecdc4', '#45b7d1'])
@@ -110,24 +295,19 @@ class TweetVisualizer:
                         f'{int(height)}', ha='center', va='bottom', fontsize=12)
             
             plt.tight_layout()
-            plt.savefig('sentiment_bar_chart.png', dpi=300, bbox_inches='tight')
-            plt.show()
-            print("Saved: sentiment_bar_chart.png")
+            return self._save_figure('sentiment_bar_chart.png')
     
     def create_timeline_chart(self):
         """Create a timeline chart showing sentiment over time"""
-        if 'Created_At' in self.df.columns and 'Sentiment' in self.df.columns:
-            # Filter out rows with invalid dates
-            df_with_dates = self.df.dropna(subset=['Created_At'])
+        if 'Created_At' in self.columns and 'Sentiment' in self.columns:
+            # Count tweets by date and sentiment (rows with invalid dates are skipped)
+            timeline_data = self.daily_sentiment_counts()
             
-            if len(df_with_dates) == 0:
+            if len(timeline_data) == 0:
                 print("No valid dates found for timeline chart")
                 return
             
-            # Group by date and sentiment
-            df_with_dates['Date'] = df_with_dates['Created_At'].dt.date
-            timeline_data = df_with_dates.groupby(['Date', 'Sentiment']).size().unstack(fill_value=0)
-            
+            plt = _pyplot()
             plt.figure(figsize=(12, 6))
             timeline_data.plot(kind='line', marker='o', linewidth=2, markersize=6)
             plt.title('Tweet Sentiment Over Time', fontsize=16, fontweight='bold')
@@ -137,48 +317,56 @@ class TweetVisualizer:
             plt.xticks(rotation=45)
             plt.grid(True, alpha=0.3)
             plt.tight_layout()
-            plt.savefig('sentiment_timeline.png', dpi=300, bbox_inches='tight')
-            plt.show()
-            print("Saved: sentiment_timeline.png")
+            return self._save_figure('sentiment_timeline.png')
     
-    def create_word_cloud(self):
-        """Create word clouds for each sentiment"""
-        if 'Text' not in self.df.columns or 'Sentiment' not in self.df.columns:
+    def create_word_cloud(self, sentiment=None):
+        """Create word clouds for each sentiment (or only for ``sentiment``)"""
+        if 'Text' not in self.columns or 'Sentiment' not in self.columns:
             print("Cannot create word cloud: missing Text or Sentiment columns")
             return
         
-        sentiments = self.df['Sentiment'].unique()
-        
+        # Word counts come from one tokenizing pass shared with the Top Words chart
+        word_frequencies = self.word_frequencies()
+        sentiments = [sentiment] if sentiment is not None else word_frequencies.sentiments
+        paths = []
+        if sentiments:
+            from wordcloud import WordCloud
+            plt = _pyplot()
         for sentiment in sentiments:
-            # Get all text for this sentiment
-            sentiment_texts = self.df[self.df['Sentiment'] == sentiment]['Text'].tolist()
-            all_text = ' '.join(sentiment_texts)
-            
-            # Clean text (remove URLs, mentions, etc.)
-            cleaned_text = re.sub(r'http\S+|www\S+|@\w+|#\w+', '', all_text)
-            
-            if len(cleaned_text.strip()) > 0:
-                plt.figure(figsize=(10, 6))
+            frequencies = word_frequencies.frequencies(sentiment, n=WORD_CLOUD_WORDS)
+            if frequencies:
                 wordcloud = WordCloud(width=800, height=400, 
                                     background_color='white',
                                     colormap='viridis',
-                                    max_words=100).generate(cleaned_text)
+                                    max_words=WORD_CLOUD_WORDS).generate_from_frequencies(frequencies)
                 
+                plt.figure(figsize=(10, 6))
                 plt.imshow(wordcloud, interpolation='bilinear')
                 plt.axis('off')
                 plt.title(f'Word Cloud - {sentiment} Tweets', fontsize=16, fontweight='bold')
                 plt.tight_layout()
                 
-                filename = f'wordcloud_{sentiment.lower()}.png'
-                plt.savefig(filename, dpi=300, bbox_inches='tight')
-                plt.show()
-                print(f"Saved: {filename}")
-    
-    def create_interactive_dashboard(self):
-        """Create an interactive Plotly dashboard"""
-        if self.df is None or len(self.df) == 0:
+                paths.append(self._save_figure(f'wordcloud_{sentiment.lower()}.png'))
+        return paths
+    
+    def create_interactive_dashboard(self, large_data=None):
+        """
+        Create an interactive Plotly dashboard
+        
+        In large-data mode (by default above ``LARGE_DATA_ROWS`` tweets) the
+        HTML stays small whatever the dataset size: tweet lengths are binned
+        here instead of embedded, the timeline is drawn hourly with WebGL
+        (Scattergl) and downsampled with LTTB, and plotly.js is loaded from
+        its CDN instead of being inlined.
+        """
+        if self.row_count == 0:
             print("No data available for dashboard")
             return
+        if large_data is None:
+            large_data = self.row_count > LARGE_DATA_ROWS
+        
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
         
         # Create subplots
         fig = make_subplots(
@@ -190,8 +378,8 @@ class TweetVisualizer:
         )
         
         # Pie chart for sentiment distribution
-        if 'Sentiment' in self.df.columns:
-            sentiment_counts = self.df['Sentiment'].value_counts()
+        if 'Sentiment' in self.columns:
+            sentiment_counts = self.sentiment_counts()
             fig.add_trace(
                 go.Pie(labels=sentiment_counts.index, values=sentiment_counts.values,
                       name="Sentiment"),
@@ -199,7 +387,15 @@ class TweetVisualizer:
             )
         
         # Histogram for tweet length
-        if 'Text' in self.df.columns:
+        length_histogram = self.length_histogram(binned=large_data) if 'Text' in self.columns else None
+        if length_histogram is not None:
+            bin_starts, bin_counts = length_histogram
+            fig.add_trace(
+                go.Bar(x=bin_starts + LENGTH_BIN_WIDTH / 2, y=bin_counts, width=LENGTH_BIN_WIDTH,
+                       name="Tweet Length"),
+                row=1, col=2
+            )
+        elif 'Text' in self.columns:
             tweet_lengths = self.df['Text'].str.len()
             fig.add_trace(
                 go.Histogram(x=tweet_lengths, name="Tweet Length", nbinsx=30),
@@ -207,27 +403,27 @@ class TweetVisualizer:
             )
         
         # Timeline if dates are available
-        if 'Created_At' in self.df.columns and 'Sentiment' in self.df.columns:
-            df_with_dates = self.df.dropna(subset=['Created_At'])
-            if len(df_with_dates) > 0:
-                for sentiment in df_with_dates['Sentiment'].unique():
-                    sentiment_data = df_with_dates[df_with_dates['Sentiment'] == sentiment]
-                    sentiment_counts = sentiment_data.groupby(sentiment_data['Created_At'].dt.date).size()
+        if 'Created_At' in self.columns and 'Sentiment' in self.columns:
+            timeline_data = self.hourly_sentiment_counts() if large_data else None
+            if timeline_data is None:
+                timeline_data = self.daily_sentiment_counts()
+            if len(timeline_data) > 0:
+                scatter = go.Scattergl if large_data else go.Scatter
+                for sentiment in timeline_data.columns:
+                    sentiment_counts = timeline_data[sentiment]
+                    sentiment_counts = sentiment_counts[sentiment_counts > 0]
+                    if large_data:
+                        sentiment_counts = lttb(sentiment_counts, MAX_TIMELINE_POINTS)
                     
                     fig.add_trace(
-                        go.Scatter(x=sentiment_counts.index, y=sentiment_counts.values,
-                                 mode='lines+markers', name=f'{sentiment}'),
+                        scatter(x=sentiment_counts.index, y=sentiment_counts.values,
+                                mode='lines' if large_data else 'lines+markers', name=f'{sentiment}'),
                         row=2, col=1
                     )
         
         # Top words
-        if 'Text' in self.df.columns:
-            all_text = ' '.join(self.df['Text'].tolist())
-            words = re.findall(r'\b\w+\b', all_text.lower())
-            # Filter out common words
-            stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must', 'can', 'rt', 'https', 'http'}
-            filtered_words = [word for word in words if word not in stop_words and len(word) > 2]
-            word_counts = Counter(filtered_words).most_common(10)
+        if 'Text' in self.columns:
+            word_counts = self.top_words(10)
             
             if word_counts:
                 words, counts = zip(*word_counts)
@@ -245,53 +441,264 @@ class TweetVisualizer:
         )
         
         # Save and show
-        fig.write_html("tweet_dashboard.html")
-        fig.show()
-        print("Saved: tweet_dashboard.html")
+        path = self.output_path("tweet_dashboard.html")
+        fig.write_html(path, include_plotlyjs='cdn' if large_data else True)
+        if self.interactive:
+            fig.show()
+        print(f"Saved: {path}")
+        return path
+    
+    def serve(self, host=DEFAULT_HOST, port=DEFAULT_HTTP_PORT, feed_port=DEFAULT_PORT):
+        """
+        Serve a live dashboard at ``http://host:port/`` until interrupted.
+        
+        The page starts from the data loaded here and is updated in place as
+        the collector (script.py) publishes new batches to ``feed_port``.
+        """
+        server = LiveDashboardServer(LiveAggregates.from_visualizer(self), host=host, port=port,
+                                     feed_port=feed_port)
+        print(f"Live dashboard at {server.url} (listening for new batches on port {feed_port})")
+        print("Press Ctrl+C to stop")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nLive dashboard stopped.")
+    
+    def chart_jobs(self):
+        """Independent rendering jobs as ``(name, filename, method name, args)``, slowest first"""
+        jobs = []
+        if 'Text' in self.columns and 'Sentiment' in self.columns:
+            for sentiment in self.word_frequencies().sentiments:
+                name = f'wordcloud_{sentiment.lower()}'
+                jobs.append((name, f'{name}.png', 'create_word_cloud', (sentiment,)))
+        jobs.append(('tweet_dashboard', 'tweet_dashboard.html', 'create_interactive_dashboard', ()))
+        jobs.append(('sentiment_timeline', 'sentiment_timeline.png', 'create_timeline_chart', ()))
+        jobs.append(('sentiment_pie_chart', 'sentiment_pie_chart.png', 'create_sentiment_pie_chart', ()))
+        jobs.append(('sentiment_bar_chart', 'sentiment_bar_chart.png', 'create_sentiment_bar_chart', ()))
+        return jobs
+    
+    def render_key(self, name, method, args):
+        """Cache key for one chart: the data slice it is drawn from, the job and the drawing code"""
+        data = (str(self.storage.fingerprint()), str(self.start), str(self.end), self.summary is not None)
+        return cache_key(data, name, method, args, _render_code_digest())
     
-    def create_all_visualizations(self):
-        """Create all visualizations at once"""
+    def create_all_visualizations(self, output_dir=None, headless=False, workers=1, cache_dir=None,
+                                  profiler=None):
+        """
+        Create all visualizations at once and return ``{chart: (seconds, error, status)}``.
+        
+        ``headless`` renders with the Agg backend and never opens a window;
+        with ``workers`` > 1 (implies headless) independent charts are
+        rendered in parallel worker processes. Files go to ``output_dir``.
+        In headless mode, ``cache_dir`` enables a render cache: charts whose
+        data and code are unchanged since an earlier run are copied from it
+        ("reused") instead of being rendered again ("rebuilt").
+        With a ``profiler`` (see profiling.py), the summary and every
+        rendered chart are profiled, also in worker processes.
+        """
+        profiler = profiler or Profiler()
+        if output_dir is not None:
+            self.output_dir = output_dir
+        if headless or workers > 1:
+            self.interactive = False
+            _pyplot().switch_backend('Agg')
+        cache = RenderCache(cache_dir) if cache_dir and not self.interactive else None
+        
         print("Creating all visualizations...\n")
         
-        self.print_summary()
+        with profiler.profile('summary'):
+            self.print_summary()
         
-        print("\nCreating charts...")
-        self.create_sentiment_pie_chart()
-        self.create_sentiment_bar_chart()
-        self.create_timeline_chart()
+        start = time.perf_counter()
+        timings = {}
+        jobs = []
+        keys = {}
+        for name, filename, method, args in self.chart_jobs():
+            if cache is not None:
+                job_start = time.perf_counter()
+                keys[name] = self.render_key(name, method, args)
+                if cache.fetch(name, keys[name], self.output_path(filename)):
+                    timings[name] = (time.perf_counter() - job_start, None, "reused")
+                    continue
+            jobs.append((name, filename, method, args))
         
-        print("\nCreating word clouds...")
-        try:
-            self.create_word_cloud()
-        except Exception as e:
-            print(f"Could not create word clouds: {e}")
-            print("You might need to install wordcloud: pip install wordcloud")
+        print(f"\nCreating {len(jobs)} charts" + (f" with {workers} workers..." if workers > 1 else "...")
+              + (f" ({len(timings)} unchanged charts reused from cache)" if timings else ""))
+        if workers > 1 and len(jobs) > 1:
+            # Word counts are computed once here rather than in every worker
+            self.word_frequencies()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_render_worker,
+                                     initargs=(self, profiler)) as executor:
+                futures = {name: executor.submit(_render_in_worker, name, method, args)
+                           for name, _, method, args in jobs}
+                rendered = {name: future.result() for name, future in futures.items()}
+        else:
+            rendered = {name: _render(self, method, args, profiler.profile(name))
+                        for name, _, method, args in jobs}
         
-        print("\nCreating interactive dashboard...")
-        try:
-            self.create_interactive_dashboard()
-        except Exception as e:
-            print(f"Could not create interactive dashboard: {e}")
-            print("You might need to install plotly: pip install plotly")
+        for name, filename, _, _ in jobs:
+            seconds, error = rendered[name]
+            path = self.output_path(filename)
+            if cache is not None and not error and os.path.exists(path):
+                cache.store(name, keys[name], path)
+            timings[name] = (seconds, error, "failed" if error else "rebuilt")
+        elapsed = time.perf_counter() - start
         
         print("\n" + "="*50)
         print("VISUALIZATION COMPLETE!")
         print("="*50)
-        print("Generated files:")
-        print("  - sentiment_pie_chart.png")
-        print("  - sentiment_bar_chart.png")
-        print("  - sentiment_timeline.png")
-        print("  - wordcloud_[sentiment].png")
-        print("  - tweet_dashboard.html")
+        print(f"Generated files in {os.path.abspath(self.output_dir)}:")
+        for name, (seconds, error, status) in sorted(timings.items(), key=lambda item: -item[1][0]):
+            print(f"  {name:<28} {seconds:7.2f}s  {status}" + (f": {error}" if error else ""))
+        if cache is not None:
+            reused = sum(1 for _, _, status in timings.values() if status == "reused")
+            print(f"Render cache: {reused} reused, {len(timings) - reused} rebuilt")
+        print(f"Total: {elapsed:.2f}s")
+        if profiler.enabled:
+            print(f"Profiles: {os.path.abspath(profiler.output_dir)}")
+        return timings
+
+
+@functools.lru_cache(maxsize=None)
+def _render_code_digest():
+    source_dir = os.path.dirname(os.path.abspath(__file__))
+    return [file_digest(os.path.join(source_dir, source)) for source in RENDER_SOURCES]
+
+def _render(visualizer, method, args, profile=None):
+    """Run one chart method (inside ``profile``, if given) and return ``(seconds, error message or None)``"""
+    start = time.perf_counter()
+    try:
+        with profile or contextlib.nullcontext():
+            getattr(visualizer, method)(*args)
+        error = None
+    except Exception as e:
+        print(f"Could not create {method}{args}: {e}")
+        error = str(e)
+    return time.perf_counter() - start, error
 
-def main():
+_worker_visualizer = None
+_worker_profiler = None
+
+def _init_render_worker(visualizer, profiler=None):
+    """Keep one headless copy of the visualizer (and the profiler) per worker process"""
+    global _worker_visualizer, _worker_profiler
+    _pyplot().switch_backend('Agg')
+    visualizer.interactive = False
+    _worker_visualizer = visualizer
+    _worker_profiler = profiler or Profiler()
+
+def _render_in_worker(name, method, args):
+    return _render(_worker_visualizer, method, args, _worker_profiler.profile(name))
+
+# Charts of the ``chart`` command and the methods that draw them
+CHARTS = {
+    'pie': 'create_sentiment_pie_chart',
+    'bar': 'create_sentiment_bar_chart',
+    'timeline': 'create_timeline_chart',
+    'wordcloud': 'create_word_cloud',
+    'dashboard': 'create_interactive_dashboard',
+}
+
+def build_parser():
+    """Command line parser (one subcommand per task, ``menu`` for the interactive menu)"""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('-d', '--data', default="tweets_sentiment.csv",
+                        help="CSV file, Parquet directory or SQLite database (default: %(default)s)")
+    common.add_argument('--chunksize', type=int, help="Summarize the data in chunks of this many rows")
+    common.add_argument('--start', type=pd.Timestamp, help="Only tweets created at or after this time")
+    common.add_argument('--end', type=pd.Timestamp, help="Only tweets created before this time")
+    
+    parser = argparse.ArgumentParser(description="Visualize collected tweets")
+    parser.set_defaults(command='menu', data="tweets_sentiment.csv", chunksize=None, start=None, end=None)
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    
+    summary = commands.add_parser('summary', parents=[common], help="Print dataset statistics")
+    summary.add_argument('--timings', action='store_true', help="Print startup, load and summary times")
+    
+    chart = commands.add_parser('chart', parents=[common], help="Create some charts (without opening windows)")
+    chart.add_argument('charts', nargs='+', choices=sorted(CHARTS), metavar='chart',
+                       help=f"One or more of: {', '.join(sorted(CHARTS))}")
+    chart.add_argument('--output-dir', default=".", help="Directory for generated files")
+    chart.add_argument('--show', action='store_true', help="Also show each chart in a window or browser")
+    add_profile_arguments(chart)
+    
+    batch = commands.add_parser('batch', parents=[common],
+                                help="Create all visualizations headlessly, in parallel")
+    batch.add_argument('--output-dir', default=".", help="Directory for generated files")
+    batch.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                       help="Processes rendering charts in parallel")
+    batch.add_argument('--no-cache', action='store_true',
+                       help="Render every chart even if its data has not changed")
+    add_profile_arguments(batch)
+    
+    serve = commands.add_parser('serve', parents=[common],
+                                help="Serve a live dashboard updated by the running collector")
+    serve.add_argument('--port', type=int, default=DEFAULT_HTTP_PORT, help="HTTP port of the live dashboard")
+    serve.add_argument('--feed-port', type=int, default=DEFAULT_PORT,
+                       help="UDP port the collector publishes new batches to")
+    
+    commands.add_parser('menu', parents=[common], help="Choose visualizations from a menu (the default)")
+    return parser
+
+def check_startup(startup):
+    """Warn if startup went over ``STARTUP_BUDGET`` and name the plotting libraries loaded too early"""
+    if startup <= STARTUP_BUDGET:
+        return True
+    loaded = [name for name in PLOTTING_MODULES if name in sys.modules]
+    print(f"Warning: startup took {startup:.2f}s (budget {STARTUP_BUDGET:.2f}s)"
+          + (f"; plotting libraries imported early: {', '.join(loaded)}" if loaded else ""),
+          file=sys.stderr)
+    return False
+
+def main(argv=None):
     """Main function to run visualizations"""
+    args = build_parser().parse_args(argv)
+    
+    if args.command == 'summary':
+        startup = time.perf_counter() - _STARTED
+        check_startup(startup)
+        visualizer = TweetVisualizer(args.data, start=args.start, end=args.end, chunksize=args.chunksize)
+        if visualizer.df is None and visualizer.summary is None:
+            raise SystemExit(1)
+        loaded = time.perf_counter()
+        visualizer.print_summary()
+        if args.timings:
+            print(f"\nStartup {startup:.3f}s, load {loaded - _STARTED - startup:.3f}s, "
+                  f"summary {time.perf_counter() - loaded:.3f}s")
+        return
+    
     print("Tweet Sentiment Visualization Tool")
     print("=" * 40)
     
-    visualizer = TweetVisualizer()
+    visualizer = TweetVisualizer(args.data, start=args.start, end=args.end, chunksize=args.chunksize)
+    visualizer.output_dir = getattr(args, 'output_dir', ".")
+    
+    if visualizer.df is None and visualizer.summary is None:
+        raise SystemExit(1)
+    
+    if args.command == 'serve':
+        visualizer.serve(port=args.port, feed_port=args.feed_port)
+        return
+    
+    if args.command == 'batch':
+        cache_dir = None if args.no_cache else os.path.join(args.output_dir, ".render_cache")
+        timings = visualizer.create_all_visualizations(headless=True, workers=args.workers,
+                                                       cache_dir=cache_dir,
+                                                       profiler=profiler_from_args(args, "visualize"))
+        if any(error for _, error, _ in timings.values()):
+            raise SystemExit(1)
+        return
     
-    if visualizer.df is None:
+    if args.command == 'chart':
+        visualizer.interactive = args.show
+        if not args.show:
+            _pyplot().switch_backend('Agg')
+        profiler = profiler_from_args(args, "visualize")
+        for chart in dict.fromkeys(args.charts):
+            with profiler.profile(chart):
+                getattr(visualizer, CHARTS[chart])()
+        if profiler.enabled:
+            print(f"Profiles: {os.path.abspath(profiler.output_dir)}")
         return
     
     while True:
@@ -0,0 +1,112 @@
+"""
+Per-query high-water marks for incremental polling.
+
+For every query we remember the newest tweet ID already collected, so the
+next cycle can ask the API only for newer tweets (``since_id``). When a
+cycle hits its ``max_results`` budget before reaching the previous mark
+(e.g. after downtime), the skipped ID range is recorded as a gap and
+backfilled a page budget at a time in later cycles.
+"""
+
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+WATERMARKS_SUFFIX = '.watermarks.json'
+
+
+class QueryWatermarks:
+    """Newest collected tweet ID and open gaps per query, persisted as JSON"""
+
+    def __init__(self, path):
+        self.path = path
+        self._queries = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    @classmethod
+    def for_dataset(cls, data_path):
+        """Marks stored next to a dataset (a CSV file or Parquet directory)"""
+        return cls(f"{data_path}{WATERMARKS_SUFFIX}")
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self._queries = json.load(f)
+            logger.info(f"Loaded high-water marks for {len(self._queries)} queries from {self.path}")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Error loading high-water marks from {self.path}: {e}")
+            self._queries = {}
+
+    def save(self):
+        """Write the marks to disk atomically"""
+        with self._lock:
+            data = json.dumps(self._queries, indent=2)
+        tmp_file = f"{self.path}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.path)
+
+    def _entry(self, query):
+        return self._queries.setdefault(query, {'newest_id': None, 'gaps': []})
+
+    def newest_id(self, query):
+        """Newest tweet ID collected for ``query`` (None before the first cycle)"""
+        with self._lock:
+            newest_id = self._queries.get(query, {}).get('newest_id')
+        return int(newest_id) if newest_id is not None else None
+
+    def next_gap(self, query):
+        """Return the most recent ``(since_id, until_id)`` gap for ``query`` or None"""
+        with self._lock:
+            gaps = self._queries.get(query, {}).get('gaps', [])
+            return tuple(int(i) for i in gaps[-1]) if gaps else None
+
+    def record_fetch(self, query, since_id, progress):
+        """
+        Update the marks after a ``since_id`` poll described by ``progress``.
+
+        ``progress`` is the dict filled in by ``script.iter_tweet_pages``.
+        If the poll stopped before reaching ``since_id``, the unfetched
+        range between it and the oldest tweet seen becomes a gap.
+        """
+        with self._lock:
+            entry = self._entry(query)
+            newest_id = progress.get('newest_id')
+            if newest_id is None:
+                return
+            current = entry['newest_id']
+            if current is None or int(newest_id) > int(current):
+                entry['newest_id'] = str(newest_id)
+
+            oldest_id = progress.get('oldest_id')
+            if since_id is not None and not progress.get('exhausted') and oldest_id is not None:
+                entry['gaps'].append([str(since_id), str(oldest_id)])
+                logger.info(f"Recorded gap for {query!r}: tweets {since_id} to {oldest_id} still to fetch")
+        self.save()
+
+    def record_backfill(self, query, gap, progress):
+        """Shrink or close ``gap`` after a backfill run described by ``progress``"""
+        gap_entry = [str(gap[0]), str(gap[1])]
+        with self._lock:
+            gaps = self._entry(query)['gaps']
+            if gap_entry not in gaps:
+                return
+            if progress.get('exhausted'):
+                gaps.remove(gap_entry)
+                logger.info(f"Closed gap for {query!r}: tweets {gap[0]} to {gap[1]}")
+            elif progress.get('oldest_id') is not None:
+                gap_entry_index = gaps.index(gap_entry)
+                gaps[gap_entry_index] = [gap_entry[0], str(progress['oldest_id'])]
+            elif progress.get('error'):
+                # Usually the gap fell out of the search window; give up on it
+                gaps.remove(gap_entry)
+                logger.warning(f"Dropped gap for {query!r}: tweets {gap[0]} to {gap[1]}")
+        self.save()
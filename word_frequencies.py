@@ -0,0 +1,140 @@
+"""
+Streaming word frequencies for word clouds and the Top Words chart.
+
+Every tweet is tokenized once by a single compiled pattern (lowercased,
+with URLs, mentions, hashtags, stop words and words under three letters
+dropped) and counted both under its sentiment and globally. Tables can be
+built in one pass over chunks, updated as new tweets arrive and kept in a
+sidecar file next to the dataset. Like the rollups, the sidecar records
+the storage fingerprint it matches and is rebuilt when stale.
+
+To keep memory bounded, a table that grows past twice ``MAX_TRACKED_WORDS``
+is trimmed to its most frequent words (URL-like one-off tokens would
+otherwise grow it with every batch).
+"""
+
+import re
+from collections import Counter, defaultdict
+
+from sidecar import Sidecar
+
+WORDS_SUFFIX = '.words.json'
+# Bumped when the counting changes, so older sidecars are rebuilt
+WORDS_VERSION = 2
+
+BASE_STOP_WORDS = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must', 'can', 'rt', 'https', 'http'}
+# wordcloud.STOPWORDS, which WordCloud.generate() used to drop before word
+# clouds were drawn from these counts (copied so that counting does not
+# import wordcloud and matplotlib)
+WORDCLOUD_STOP_WORDS = {
+    'a', 'about', 'above', 'after', 'again', 'against', 'all', 'also', 'am', 'an', 'and', 'any', 'are',
+    "aren't", 'as', 'at', 'be', 'because', 'been', 'before', 'being', 'below', 'between', 'both', 'but',
+    'by', 'can', "can't", 'cannot', 'com', 'could', "couldn't", 'did', "didn't", 'do', 'does', "doesn't",
+    'doing', "don't", 'down', 'during', 'each', 'else', 'ever', 'few', 'for', 'from', 'further', 'get',
+    'had', "hadn't", 'has', "hasn't", 'have', "haven't", 'having', 'he', "he'd", "he'll", "he's", 'hence',
+    'her', 'here', "here's", 'hers', 'herself', 'him', 'himself', 'his', 'how', "how's", 'however', 'http',
+    'i', "i'd", "i'll", "i'm", "i've", 'if', 'in', 'into', 'is', "isn't", 'it', "it's", 'its', 'itself',
+    'just', 'k', "let's", 'like', 'me', 'more', 'most', "mustn't", 'my', 'myself', 'no', 'nor', 'not', 'of',
+    'off', 'on', 'once', 'only', 'or', 'other', 'otherwise', 'ought', 'our', 'ours', 'ourselves', 'out',
+    'over', 'own', 'r', 'same', 'shall', "shan't", 'she', "she'd", "she'll", "she's", 'should', "shouldn't",
+    'since', 'so', 'some', 'such', 'than', 'that', "that's", 'the', 'their', 'theirs', 'them', 'themselves',
+    'then', 'there', "there's", 'therefore', 'these', 'they', "they'd", "they'll", "they're", "they've",
+    'this', 'those', 'through', 'to', 'too', 'under', 'until', 'up', 'very', 'was', "wasn't", 'we', "we'd",
+    "we'll", "we're", "we've", 'were', "weren't", 'what', "what's", 'when', "when's", 'where', "where's",
+    'which', 'while', 'who', "who's", 'whom', 'why', "why's", 'with', "won't", 'would', "wouldn't", 'www',
+    'you', "you'd", "you'll", "you're", "you've", 'your', 'yours', 'yourself', 'yourselves'
+}
+# The tokenizer splits contractions, so "don't" is counted as "don" ("won" is a word too)
+STOP_WORDS = (BASE_STOP_WORDS | WORDCLOUD_STOP_WORDS
+              | {word.split("'")[0] for word in WORDCLOUD_STOP_WORDS if word.endswith("n't")} - {'won'})
+# URLs, mentions and hashtags match the first alternatives and yield an
+# empty group, so one findall both skips them and extracts the words
+TOKEN_PATTERN = re.compile(r'http\S+|www\S+|[@#]\w+|(\w+)')
+
+MAX_TRACKED_WORDS = 50_000
+
+# Key under which tweets without a sentiment are counted
+UNLABELED = ''
+
+
+def tokenize(text):
+    """Words of ``text`` that are counted for word clouds and Top Words"""
+    return [word for word in TOKEN_PATTERN.findall(str(text).lower())
+            if len(word) > 2 and word not in STOP_WORDS]
+
+
+class WordFrequencies(Sidecar):
+    """
+    Term frequencies per sentiment (and overall), updated one batch of tweets at a time.
+
+    Without ``storage`` the tables only live in memory. With it, ``load``
+    and ``save`` keep them in ``<storage path>.words.json``.
+    """
+
+    SUFFIX = WORDS_SUFFIX
+    VERSION = WORDS_VERSION
+    NAME = "word frequencies"
+
+    def __init__(self, storage=None, max_words=None):
+        self.max_words = max_words or MAX_TRACKED_WORDS
+        super().__init__(storage)
+
+    def _reset(self):
+        self._counts = defaultdict(Counter)
+
+    def _count_stored(self, chunksize):
+        for chunk in self.storage.iter_chunks(columns=['Text', 'Sentiment'], chunksize=chunksize):
+            self.update(chunk)
+
+    def _payload(self):
+        return {'counts': {s: dict(counts) for s, counts in self._counts.items()}}
+
+    def _restore(self, data):
+        self._counts = defaultdict(Counter, {s: Counter(counts) for s, counts in data.get('counts', {}).items()})
+        return True
+
+    def update(self, df):
+        """Count the words of a DataFrame of tweets (Text and, optionally, Sentiment columns)"""
+        if len(df) == 0 or 'Text' not in df.columns:
+            return
+        sentiments = df['Sentiment'] if 'Sentiment' in df.columns else [None] * len(df)
+        batch = defaultdict(Counter)
+        for text, sentiment in zip(df['Text'], sentiments):
+            if isinstance(text, str):
+                key = str(sentiment) if isinstance(sentiment, str) else UNLABELED
+                batch[key].update(tokenize(text))
+        for sentiment, counts in batch.items():
+            self.add_counts(counts, sentiment)
+
+    def add_counts(self, counts, sentiment=UNLABELED):
+        """Merge already counted ``{word: count}`` into the table for ``sentiment``"""
+        with self._lock:
+            table = self._counts[sentiment]
+            table.update(counts)
+            if len(table) > 2 * self.max_words:
+                kept = table.most_common(self.max_words)
+                table.clear()
+                table.update(dict(kept))
+
+    @property
+    def sentiments(self):
+        """Sentiments that have counted words"""
+        with self._lock:
+            return sorted(s for s, counts in self._counts.items() if s != UNLABELED and counts)
+
+    def counts(self, sentiment=None):
+        """Word counts for one sentiment, or for all tweets when ``sentiment`` is None"""
+        with self._lock:
+            if sentiment is not None:
+                return Counter(self._counts.get(sentiment, {}))
+            total = Counter()
+            for counts in self._counts.values():
+                total.update(counts)
+            return total
+
+    def most_common(self, n=10, sentiment=None):
+        return self.counts(sentiment).most_common(n)
+
+    def frequencies(self, sentiment=None, n=None):
+        """``{word: count}`` of the ``n`` most common words, for ``WordCloud.generate_from_frequencies``"""
+        return dict(self.counts(sentiment).most_common(n))